@@ -0,0 +1,349 @@
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+import subprocess
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from langchain.schema import Document
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import rag.corrective_rag as corrective_rag_module
+import rag.foundation_rag as foundation_rag_module
+from core.chunk_store import ChunkStore
+from core.sqlite_checkpointer import SQLiteCheckpointer
+from rag.foundation_rag import FoundationRAG
+
+DOCS_PATH = os.path.join(project_root, "data", "processed", "university_docs.json")
+RESULTS_PATH = os.path.join(project_root, "benchmarks", "results", "corrective_rag.json")
+
+# graph node -> reported stage
+NODE_STAGES = {
+    "start_turn": "start_turn",
+    "answer_from_structured_data": "structured",
+    "plan_analytical_query": "planning",
+    "answer_from_analytical_index": "analytical",
+    "get_relevant_documents": "retrieval",
+    "grade_and_filter_documents": "grading",
+    "transform_query": "rewrite",
+    "generate_answer_from_documents": "generation",
+    "generate_answer_from_web_search": "web_fallback",
+    "update_memory": "memory",
+}
+
+QUESTION_TEMPLATES = [
+    "What faculties does {university} have?",
+    "How can I contact {university}?",
+    "How many students study at {university}?",
+]
+
+# aggregate and comparison questions: exercise the analytical route
+ANALYTICAL_QUESTIONS = [
+    "Which public universities have more than 100,000 students?",
+    "What are the 5 largest universities?",
+    "Compare the faculties of Cairo and Alexandria University",
+    "How many universities have a faculty of medicine?",
+    "What is the average number of staff of universities with research centers?",
+]
+
+# questions the documents cannot answer: exercise the rewrite and web fallback path
+OFF_TOPIC_QUESTIONS = [
+    "What is the best pizza place in Rome?",
+    "Who won the football world cup in 2014?",
+    "How do I renew a passport in Canada?",
+    "What is the weather like on Mars?",
+    "Recommend a good laptop for gaming.",
+]
+
+WORD_PATTERN = re.compile(r"\w+")
+STOP_WORDS = {
+    "what", "does", "have", "how", "can", "i", "many", "study", "at", "the", "of", "a", "is",
+    "in", "do", "who", "for", "on", "to", "and", "like", "university",
+}
+
+# simulated latency (seconds) and call counts of the stand-in LLMs
+LATENCY = {"gemini": 0.0, "groq": 0.0}
+LLM_CALLS = Counter()
+LLM_CALLS_LOCK = threading.Lock()
+
+
+def count_call(kind):
+    with LLM_CALLS_LOCK:
+        LLM_CALLS[kind] += 1
+
+
+def content_words(text):
+    return {w for w in WORD_PATTERN.findall(text.lower()) if w not in STOP_WORDS}
+
+
+def first_words(text, n):
+    return " ".join(text.split()[:n])
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic local stand-in for `ChatGoogleGenerativeAI`. It recognises the
+    prompt it is called with (grading, condensing, rewrite, summarization, generation),
+    sleeps the simulated latency and answers from the prompt text.
+    """
+
+    json_mode: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-gemini"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(LATENCY["gemini"])
+        text = "\n".join(str(m.content) for m in messages)
+
+        if self.json_mode:
+            count_call("grading")
+            document, _, question = text.partition("User question:")
+            relevant = len(content_words(question) & content_words(document)) >= 2
+            content = json.dumps({"binary_score": "yes" if relevant else "no"})
+        elif "into a standalone question" in text:
+            count_call("condense")
+            content = text.split("Latest question:")[-1].split("Standalone question:")[0].strip()
+        elif "query rewriter" in text:
+            count_call("rewrite")
+            question = text.split("Here is the initial question:")[-1]
+            content = first_words(question.replace("Formulate an improved question.", ""), 15)
+        elif "summarization assistant" in text:
+            count_call("summarization")
+            content = first_words(text.split("words):", 1)[-1], 100)
+        else:
+            count_call("generation")
+            context = text.split("Document Context:", 1)[-1]
+            content = "According to the documents, " + first_words(context, 60)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+def stub_chat_model(**kwargs):
+    """Factory with the `ChatGoogleGenerativeAI` signature."""
+    return StubChatModel(json_mode="model_kwargs" in kwargs)
+
+
+class StubGroq:
+    """Deterministic local stand-in for the `Groq` client used by the web fallback."""
+
+    def __init__(self, api_key=None):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, model=None, **kwargs):
+        time.sleep(LATENCY["groq"])
+        count_call("web_search")
+        content = f"Web results for: {messages[-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class StubSummarizer:
+    """
+    Deterministic local stand-in for the KeyBERT `KeywordSummarizer` shortening the
+    web search query, so `web_fallback` timings exclude model inference like the LLM stubs.
+    """
+
+    def summarize_text(self, text, summary_length=5, n_phrases=5):
+        return first_words(text, n_phrases)
+
+
+class LexicalFoundationRAG(FoundationRAG):
+    """
+    FoundationRAG over `university_docs.json` with word-overlap retrieval, for runs
+    without Chroma and the embedding model. Generation is inherited unchanged.
+    """
+
+    def __init__(self, google_api_key, vector_index=None):
+        self.google_api_key = google_api_key
+        self.vector_index = None
+        with open(DOCS_PATH, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        self.ids = [str(i) for i in range(len(chunks))]
+        self.words = [content_words(c["text"]) for c in chunks]
+        self.chunk_store = ChunkStore(max_size=len(chunks))
+        self.chunk_store.put(self.ids, [Document(page_content=c["text"], metadata=c["metadata"]) for c in chunks])
+
+    def retrieve_chunks(self, query, k=5):
+        query_words = content_words(query)
+        scores = [len(query_words & words) for words in self.words]
+        top = sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:k]
+        return [self.ids[i] for i in top], [1.0 / (1 + scores[i]) for i in top]
+
+
+def load_questions():
+    """Fixed question set: three questions per university plus analytical and off-topic ones."""
+    with open(DOCS_PATH, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+    universities = sorted({c["metadata"]["university_name"] for c in chunks if c["metadata"].get("university_name")})
+    questions = [t.format(university=u.title()) for u in universities for t in QUESTION_TEMPLATES]
+    return questions + ANALYTICAL_QUESTIONS + OFF_TOPIC_QUESTIONS
+
+
+def percentile(values, q):
+    """Percentile `q` (0-100) with linear interpolation."""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """Latency summary in milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(1000 * sum(samples) / len(samples), 3),
+        "p50_ms": round(1000 * percentile(samples, 50), 3),
+        "p95_ms": round(1000 * percentile(samples, 95), 3),
+        "p99_ms": round(1000 * percentile(samples, 99), 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def build_graph(retriever, db_path, max_local_retries=1):
+    """Build the real CorrectiveRAG graph with the LLM clients and KeyBERT replaced by local stand-ins."""
+    corrective_rag_module.ChatGoogleGenerativeAI = stub_chat_model
+    foundation_rag_module.ChatGoogleGenerativeAI = stub_chat_model
+    corrective_rag_module.Groq = StubGroq
+    if retriever == "lexical":
+        corrective_rag_module.FoundationRAG = LexicalFoundationRAG
+
+    rag = corrective_rag_module.CorrectiveRAG(
+        "benchmark-key", "benchmark-key",
+        checkpointer=SQLiteCheckpointer(db_path),
+        grade_delay=0,
+        max_local_retries=max_local_retries,
+    )
+    rag.summarizer = StubSummarizer()
+    return rag.build_graph()
+
+
+def run_question(graph, question, thread_id, node_samples):
+    """Run one question, recording the time of every node; returns the end-to-end time."""
+    config = {"configurable": {"thread_id": thread_id}}
+    start = previous = time.perf_counter()
+    for update in graph.stream({"query": question}, config=config, stream_mode="updates"):
+        now = time.perf_counter()
+        for node in update:
+            node_samples[NODE_STAGES.get(node, node)].append(now - previous)
+        previous = now
+    return time.perf_counter() - start
+
+
+def compare(report, baseline_path):
+    """Print the change of the end-to-end and per-node percentiles against an earlier report."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nChange vs {baseline_path} (commit {baseline.get('commit')}):")
+    rows = [("end_to_end", baseline["end_to_end"], report["end_to_end"])]
+    rows += [(n, baseline["nodes"][n], s) for n, s in report["nodes"].items() if n in baseline["nodes"]]
+    for name, old, new in rows:
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if old[key]:
+                changes.append(f"{key[:-3]} {100 * (new[key] - old[key]) / old[key]:+.1f}%")
+        print(f"  {name:<14} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark of the CorrectiveRAG graph with stubbed LLMs.")
+    parser.add_argument("--retriever", choices=["chroma", "lexical"], default="chroma",
+                        help="chroma: the real vector store; lexical: word overlap over university_docs.json")
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="simulated seconds per Gemini call")
+    parser.add_argument("--groq-latency", type=float, default=0.0, help="simulated seconds per Groq call")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the question set")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed questions run first")
+    parser.add_argument("--local-retries", type=int, default=1,
+                        help="rewrite-and-retrieve attempts on the local index before the web fallback")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="sessions asking each question at the same time (exercises request coalescing)")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--compare", default=None, help="earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    LATENCY["gemini"] = args.gemini_latency
+    LATENCY["groq"] = args.groq_latency
+    questions = load_questions()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = build_graph(args.retriever, os.path.join(tmp, "checkpoints.db"), args.local_retries)
+
+        for i, question in enumerate(questions[:args.warmup]):
+            run_question(graph, question, f"warmup-{i}", defaultdict(list))
+        LLM_CALLS.clear()
+
+        node_samples = defaultdict(list)
+        end_to_end = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for repeat in range(args.repeats):
+                for i, question in enumerate(questions):
+                    # concurrent duplicates: same question, one chat thread each
+                    end_to_end += pool.map(
+                        lambda c: run_question(graph, question, f"bench-{repeat}-{i}-{c}", node_samples),
+                        range(args.concurrency),
+                    )
+        wall_time = time.perf_counter() - started
+
+    runs = len(end_to_end)
+    report = {
+        "benchmark": "corrective_rag",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "retriever": args.retriever,
+            "gemini_latency_s": args.gemini_latency,
+            "groq_latency_s": args.groq_latency,
+            "questions": len(questions),
+            "repeats": args.repeats,
+            "concurrency": args.concurrency,
+            "local_retries": args.local_retries,
+        },
+        "end_to_end": summarize(end_to_end),
+        "throughput_qps": round(runs / wall_time, 3),
+        "nodes": {stage: summarize(samples) for stage, samples in node_samples.items()},
+        "llm_calls": dict(LLM_CALLS),
+        "llm_calls_per_question": {k: round(v / runs, 3) for k, v in LLM_CALLS.items()},
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    e2e = report["end_to_end"]
+    print(f"{runs} runs: p50 {e2e['p50_ms']} ms, p95 {e2e['p95_ms']} ms, p99 {e2e['p99_ms']} ms")
+    for stage, stats in report["nodes"].items():
+        print(f"  {stage:<14} n={stats['count']:<5} p50 {stats['p50_ms']:>9} ms  "
+              f"p95 {stats['p95_ms']:>9} ms  p99 {stats['p99_ms']:>9} ms")
+    print(f"LLM calls: {report['llm_calls']}")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+import subprocess
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import chromadb
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+from core.text_chunker import CHUNK_SIZE, CHUNK_OVERLAP, MAX_TOKENS, build_chunker
+from rag.foundation_rag import FoundationRAG
+
+PROCESSED_PATH = os.path.join(project_root, "data", "processed", "processed_universities_data.json")
+RESULTS_PATH = os.path.join(project_root, "benchmarks", "results", "retrieval_eval.json")
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+CUTOFFS = (1, 3, 5, 10)
+WORD_PATTERN = re.compile(r"\w+")
+
+
+# ---------- Labelled query set ----------
+def generate_queries(path=PROCESSED_PATH):
+    """
+    Labelled questions built from the structured records. Each query names the
+    university it is about and an `answer` string: a chunk is relevant when it
+    belongs to that university and contains the answer. Labels do not depend on
+    chunk ids, so the same set scores any chunking configuration.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        universities = json.load(f)
+
+    queries = []
+
+    def add(kind, question, university, answer):
+        queries.append({"id": len(queries), "kind": kind, "question": question,
+                        "university": university, "answer": answer})
+
+    for u in universities:
+        name = u["university_name"].strip().lower()
+        title = name.title()
+        add("overview", f"When was {title} established and where is it located?", name,
+            f"{name}: {u['about'][:40]}")
+        add("students", f"How many students study at {title}?", name,
+            f"number of students: {u['number_of_students']}")
+        add("staff", f"How many staff members does {title} have?", name,
+            f"number of staff: {u['number_of_staff']}")
+        add("rating", f"What is the rating of {title}?", name, f"rating: {u['rating']}")
+        if u["contact_info"]:
+            add("contact", f"How can I contact {title}?", name, f"contact information for {name}")
+        for faculty in u["faculties"]:
+            add("faculty", f"Tell me about the {faculty['name']} at {title}.", name,
+                f"{faculty['name']} at {name}")
+    return queries
+
+
+def is_relevant(document, query):
+    metadata = document.metadata or {}
+    return (metadata.get("university_name", "").strip().lower() == query["university"]
+            and query["answer"] in document.page_content.lower())
+
+
+# ---------- Retrievers ----------
+class FoundationRetriever:
+    """`FoundationRAG.retrieval` over the persisted Chroma collection, one query at a time as in the app."""
+
+    name = "foundation"
+
+    def __init__(self, chunks=None):
+        # the persisted collection holds university_docs.json: the chunking options do not apply
+        self.rag = FoundationRAG(os.environ.get("GOOGLE_API_KEY", "retrieval-eval"))
+
+    def retrieve(self, questions, k):
+        return [self.rag.retrieval(question, k) for question in questions]
+
+
+class ChromaRetriever:
+    """In-memory Chroma collection over the evaluated chunks, queried in batches."""
+
+    name = "chroma"
+
+    def __init__(self, chunks, embedding_model=EMBEDDING_MODEL, batch_size=64):
+        self.chunks = chunks
+        self.batch_size = batch_size
+        client = chromadb.EphemeralClient()
+        collection_name = f"retrieval_eval_{os.getpid()}_{int(time.time() * 1000)}"
+        self.collection = client.create_collection(
+            name=collection_name,
+            embedding_function=SentenceTransformerEmbeddingFunction(model_name=embedding_model),
+        )
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            self.collection.add(
+                ids=[str(i) for i in range(start, start + len(batch))],
+                documents=[doc.page_content for doc in batch],
+            )
+
+    def retrieve(self, questions, k):
+        results = []
+        for start in range(0, len(questions), self.batch_size):
+            response = self.collection.query(query_texts=questions[start:start + self.batch_size], n_results=k)
+            results.extend([self.chunks[int(i)] for i in ids] for ids in response["ids"])
+        return results
+
+
+class BM25Retriever:
+    """Okapi BM25 over the evaluated chunks: a lexical baseline without the embedding model."""
+
+    name = "bm25"
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(WORD_PATTERN.findall(doc.page_content.lower())) for doc in chunks]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = sum(self.lengths) / max(len(self.lengths), 1)
+        self.postings = defaultdict(list)
+        for i, tf in enumerate(self.term_freqs):
+            for term in tf:
+                self.postings[term].append(i)
+        n = len(chunks)
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+
+    def retrieve(self, questions, k):
+        results = []
+        for question in questions:
+            scores = defaultdict(float)
+            for term in set(WORD_PATTERN.findall(question.lower())):
+                for i in self.postings.get(term, ()):
+                    tf = self.term_freqs[i][term]
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length)
+                    scores[i] += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            top = sorted(scores, key=lambda i: (-scores[i], i))[:k]
+            results.append([self.chunks[i] for i in top])
+        return results
+
+
+RETRIEVERS = {r.name: r for r in (FoundationRetriever, ChromaRetriever, BM25Retriever)}
+
+
+# ---------- Evaluation ----------
+def score(queries, results, k):
+    """recall@cutoff (a relevant chunk in the top results), university recall@cutoff and MRR@k."""
+    cutoffs = [c for c in CUTOFFS if c < k] + [k]
+    hits = {c: 0 for c in cutoffs}
+    university_hits = {c: 0 for c in cutoffs}
+    reciprocal_ranks = 0.0
+    per_kind = defaultdict(lambda: [0, 0])
+
+    for query, documents in zip(queries, results):
+        ranks = [i for i, doc in enumerate(documents[:k]) if is_relevant(doc, query)]
+        university_ranks = [i for i, doc in enumerate(documents[:k])
+                            if (doc.metadata or {}).get("university_name", "").strip().lower() == query["university"]]
+        for c in cutoffs:
+            hits[c] += bool(ranks and ranks[0] < c)
+            university_hits[c] += bool(university_ranks and university_ranks[0] < c)
+        if ranks:
+            reciprocal_ranks += 1 / (ranks[0] + 1)
+        per_kind[query["kind"]][0] += bool(ranks)
+        per_kind[query["kind"]][1] += 1
+
+    n = len(queries)
+    return {
+        "recall": {f"@{c}": round(hits[c] / n, 4) for c in cutoffs},
+        "university_recall": {f"@{c}": round(university_hits[c] / n, 4) for c in cutoffs},
+        "mrr": round(reciprocal_ranks / n, 4),
+        f"recall@{k}_by_kind": {kind: round(h / total, 4) for kind, (h, total) in sorted(per_kind.items())},
+    }
+
+
+def evaluate(retriever_name, chunks, queries, k, embedding_model):
+    start = time.perf_counter()
+    if retriever_name == "chroma":
+        retriever = ChromaRetriever(chunks, embedding_model)
+    else:
+        retriever = RETRIEVERS[retriever_name](chunks)
+    build_seconds = time.perf_counter() - start
+
+    questions = [q["question"] for q in queries]
+    start = time.perf_counter()
+    results = retriever.retrieve(questions, k)
+    elapsed = time.perf_counter() - start
+
+    report = score(queries, results, k)
+    report["queries_per_second"] = round(len(queries) / elapsed, 2)
+    report["build_seconds"] = round(build_seconds, 3)
+    return report
+
+
+def answerable(queries, chunks):
+    """Queries whose answer is inside at least one chunk (answers cut by a chunk boundary are not)."""
+    return sum(any(is_relevant(doc, q) for doc in chunks) for q in queries)
+
+
+def print_run(run):
+    recall = "  ".join(f"{c} {v:.3f}" for c, v in run["recall"].items())
+    print(f"  {run['retriever']:<10} recall {recall}  MRR {run['mrr']:.3f}  {run['queries_per_second']} q/s")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval quality (recall@k, MRR) and speed of the RAG retrievers.")
+    parser.add_argument("--retrievers", nargs="+", choices=sorted(RETRIEVERS), default=["foundation", "chroma", "bm25"])
+    parser.add_argument("--chunker", nargs="+", choices=["recursive", "structure"], default=["recursive", "structure"],
+                        help="chunking strategies to evaluate (chroma and bm25 re-chunk the processed records)")
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[CHUNK_SIZE], help="recursive chunker sizes")
+    parser.add_argument("--chunk-overlap", type=int, nargs="+", default=[CHUNK_OVERLAP], help="recursive chunker overlaps")
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[MAX_TOKENS], help="structure chunker token caps")
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL, help="SentenceTransformer model of the chroma retriever")
+    parser.add_argument("--k", type=int, default=5, help="retrieved chunks per query (the app uses 5)")
+    parser.add_argument("--queries", default=None, help="labelled query set JSON (generated from the processed data if omitted)")
+    parser.add_argument("--save-queries", default=None, help="write the generated query set to this path")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = json.load(f)
+    else:
+        queries = generate_queries()
+    if args.save_queries:
+        with open(args.save_queries, "w", encoding="utf-8") as f:
+            json.dump(queries, f, ensure_ascii=False, indent=4)
+    print(f"{len(queries)} queries: {dict(Counter(q['kind'] for q in queries))}")
+
+    with open(PROCESSED_PATH, "r", encoding="utf-8") as f:
+        universities = json.load(f)
+
+    chunkings = []
+    if "recursive" in args.chunker:
+        chunkings += [{"strategy": "recursive", "chunk_size": size, "chunk_overlap": overlap}
+                      for size, overlap in itertools.product(args.chunk_size, args.chunk_overlap) if overlap < size]
+    if "structure" in args.chunker:
+        chunkings += [{"strategy": "structure", "max_tokens": max_tokens} for max_tokens in args.max_tokens]
+
+    runs = []
+    if "foundation" in args.retrievers:
+        print("\nfoundation (persisted collection, university_docs.json)")
+        runs.append({"retriever": "foundation", "chunking": "university_docs.json",
+                     **evaluate("foundation", None, queries, args.k, args.embedding_model)})
+        print_run(runs[-1])
+
+    for chunking in chunkings:
+        options = {key: value for key, value in chunking.items() if key != "strategy"}
+        chunks = build_chunker(chunking["strategy"], **options).split(universities)
+        words = [len(doc.page_content.split()) for doc in chunks]
+        print(f"\n{json.dumps(chunking)}: {len(chunks)} chunks, {sum(words) / len(words):.0f} words per chunk, "
+              f"{answerable(queries, chunks)}/{len(queries)} answers inside one chunk")
+        for name in args.retrievers:
+            if name == "foundation":
+                continue
+            runs.append({"retriever": name,
+                         "chunking": {**chunking, "chunks": len(chunks), "words_per_chunk": round(sum(words) / len(words), 1)},
+                         **evaluate(name, chunks, queries, args.k, args.embedding_model)})
+            print_run(runs[-1])
+
+    report = {
+        "benchmark": "retrieval_eval",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {"k": args.k, "queries": len(queries), "embedding_model": args.embedding_model},
+        "runs": runs,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
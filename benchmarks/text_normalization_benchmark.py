@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import copy
+import json
+import time
+import argparse
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.text_normalizer import TextNormalizer
+
+RAW_DATA_PATH = os.path.join(project_root, "data", "raw", "raw_universities_data.json")
+
+
+def count_strings(universities):
+    """Number of string fields cleaned by one normalization run."""
+    total = 0
+    for university in universities:
+        total += 5  # university_name, about, research_centers_availability, gender, rating
+        total += 2 * len(university['faculties'])
+        total += 2 * len(university['contact_info'])
+    return total
+
+
+def legacy_normalization(universities):
+    """The original per-field loop of `TextProcessor.normalization` (translation excluded)."""
+    def remove_punctuation(text):
+        return re.sub(r"[^\w\s']", '', text)
+
+    def removing_extra_whitespace(text):
+        return ' '.join(text.replace('\n', '').split())
+
+    for university in universities:
+        university['university_name'] = university['university_name'].strip().lower()
+        university['about'] = removing_extra_whitespace(university['about']).lower()
+        university['about'] = remove_punctuation(university['about'])
+        university['research_centers_availability'] = university['research_centers_availability'].lower()
+        university['gender'] = university['gender'].lower()
+        university['rating'] = remove_punctuation(university['rating'])
+
+        for faculty in university['faculties']:
+            faculty['name'] = removing_extra_whitespace(faculty['name']).lower()
+            faculty['name'] = remove_punctuation(faculty['name'])
+            faculty['about'] = removing_extra_whitespace(faculty['about']).lower()
+            faculty['about'] = remove_punctuation(faculty['about'])
+
+        for contact in university['contact_info']:
+            contact['contact_name'] = remove_punctuation(contact['contact_name']).lower()
+            contact['contact_info'] = removing_extra_whitespace(contact['contact_info']).lower()
+
+
+def bulk_normalization(universities, normalizer):
+    """The column-wise path used by `TextProcessor.normalization` (translation excluded)."""
+    faculties = [faculty for university in universities for faculty in university['faculties']]
+    contacts = [contact for university in universities for contact in university['contact_info']]
+
+    for university in universities:
+        university['university_name'] = university['university_name'].strip().lower()
+    normalizer.normalize_column(universities, 'about')
+    normalizer.normalize_column(universities, 'research_centers_availability',
+                                translate=False, whitespace=False, punctuation=False)
+    normalizer.normalize_column(universities, 'gender',
+                                translate=False, whitespace=False, punctuation=False)
+    normalizer.normalize_column(universities, 'rating',
+                                translate=False, whitespace=False, lowercase=False)
+    normalizer.normalize_column(faculties, 'name')
+    normalizer.normalize_column(faculties, 'about')
+    normalizer.normalize_column(contacts, 'contact_name', whitespace=False)
+    normalizer.normalize_column(contacts, 'contact_info', punctuation=False)
+
+
+def run(runner, data, repeats):
+    """Run `runner` on fresh copies of the data and return the best wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        universities = copy.deepcopy(data)
+        start = time.perf_counter()
+        runner(universities)
+        best = min(best, time.perf_counter() - start)
+    return best, universities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text normalization throughput.")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--data", default=RAW_DATA_PATH)
+    args = parser.parse_args()
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    n_strings = count_strings(data)
+    normalizer = TextNormalizer()
+
+    legacy_time, legacy_out = run(legacy_normalization, data, args.repeats)
+    bulk_time, bulk_out = run(lambda u: bulk_normalization(u, normalizer), data, args.repeats)
+
+    if legacy_out != bulk_out:
+        raise SystemExit("Bulk normalization output differs from the legacy path")
+
+    print(f"strings per run: {n_strings}")
+    print(f"legacy: {n_strings / legacy_time:,.0f} strings/sec ({legacy_time * 1000:.2f} ms)")
+    print(f"bulk:   {n_strings / bulk_time:,.0f} strings/sec ({bulk_time * 1000:.2f} ms)")
+    print(f"speedup: {legacy_time / bulk_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
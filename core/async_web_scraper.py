@@ -0,0 +1,533 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin, urlparse
+from playwright.async_api import async_playwright, Browser, Page
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.web_scraper import (
+    WebScraper,
+    build_contact_info,
+    require_fields,
+    CONTACTS_JS,
+    FACULTIES_JS,
+    UNIVERSITY_DETAILS_JS,
+    UNIVERSITY_LINKS_JS,
+)
+from core.scrape_manifest import ScrapeManifest, content_hash, postback_key, utc_now
+from core.scrape_checkpoint import ScrapeCheckpoint
+
+
+MENU_LINKS_JS = """
+menu => Array.from(menu.querySelectorAll('a')).map(a => ({text: a.textContent, href: a.getAttribute('href')}))
+"""
+
+
+class HostRateLimiter:
+    """
+    Bounds the number of concurrent requests and the request rate per host,
+    so parallel scraping stays polite to the target website.
+    """
+
+    def __init__(self, max_concurrency: int = 4, min_interval: float = 0.5):
+        """
+        Args:
+            max_concurrency (int): Maximum in-flight page loads per host.
+            min_interval (float): Minimum delay in seconds between two requests to the same host.
+        """
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self._semaphores = {}
+        self._locks = {}
+        self._last_request = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Wait for a free slot on the host of `url`, respecting the rate limit."""
+        host = urlparse(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrency))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                wait = self._last_request.get(host, 0.0) + self.min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_request[host] = time.monotonic()
+            yield
+
+
+class BrowserContextPool:
+    """
+    A fixed-size pool of isolated browser contexts shared by scraping tasks.
+    Each borrowed page is opened in a free context and closed on release.
+    """
+
+    def __init__(self, browser: Browser, size: int = 4):
+        self.browser = browser
+        self.size = size
+        self._contexts = []
+        self._available = asyncio.Queue()
+
+    async def start(self):
+        """Create the browser contexts of the pool."""
+        for _ in range(self.size):
+            context = await self.browser.new_context()
+            self._contexts.append(context)
+            self._available.put_nowait(context)
+
+    @asynccontextmanager
+    async def context(self):
+        """Borrow a free context (e.g. for plain HTTP requests via `context.request`)."""
+        context = await self._available.get()
+        try:
+            yield context
+        finally:
+            self._available.put_nowait(context)
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrow a fresh page from a free context."""
+        async with self.context() as context:
+            page = await context.new_page()
+            try:
+                yield page
+            finally:
+                await page.close()
+
+    async def close(self):
+        """Close every context of the pool."""
+        for context in self._contexts:
+            await context.close()
+        self._contexts = []
+
+
+class AsyncWebScraper(WebScraper):
+    """
+    Asynchronous variant of `WebScraper`.
+
+    Universities are scraped concurrently from a pool of headless browser contexts,
+    and the faculties and contacts pages of a university load in parallel.
+    Requests are throttled per host by `HostRateLimiter`. The output keeps the
+    `raw_universities_data.json` schema and the order of the universities list.
+
+    In incremental mode every page is first fingerprinted with a conditional GET
+    (ETag / Last-Modified, falling back to a content hash) against a `ScrapeManifest`;
+    only universities with a changed page are re-scraped and merged into the
+    existing raw dataset.
+
+    Full runs are checkpointed like `WebScraper`: completed universities are appended
+    to a `ScrapeCheckpoint` as they finish, failures are retried with backoff and
+    then quarantined, and a restarted run resumes from the checkpoint.
+    """
+
+    def __init__(self, base_url: str = "https://www.universitiesegypt.com/", pool_size: int = 4,
+                 max_concurrency_per_host: int = 4, min_request_interval: float = 0.5,
+                 headless: bool = True, timeout: float = 30000, manifest: ScrapeManifest = None,
+                 checkpoint: ScrapeCheckpoint = None, max_retries: int = 3, retry_backoff: float = 2.0):
+        """
+        Args:
+            base_url (str): Home page of the website (point it at a local fixture server for testing).
+            pool_size (int): Number of browser contexts in the pool.
+            max_concurrency_per_host (int): Maximum in-flight page loads per host.
+            min_request_interval (float): Minimum delay in seconds between requests to a host.
+            headless (bool): Run Chromium without a visible window.
+            timeout (float): Default Playwright timeout in milliseconds.
+            manifest (ScrapeManifest, optional): Fingerprint manifest used by incremental mode.
+            checkpoint (ScrapeCheckpoint, optional): Checkpoint used by full runs.
+            max_retries (int): Attempts per university before it is quarantined.
+            retry_backoff (float): Delay in seconds before the first retry, doubled on each retry.
+        """
+        super().__init__(checkpoint, max_retries, retry_backoff)
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.headless = headless
+        self.timeout = timeout
+        self.rate_limiter = HostRateLimiter(max_concurrency_per_host, min_request_interval)
+        self.failed_links = []
+        self.manifest = manifest
+        self.changed_universities = []
+        self.removed_universities = []
+
+    async def goto(self, page: Page, url: str):
+        """Navigate `page` to `url` through the per-host rate limiter."""
+        async with self.rate_limiter.slot(url):
+            page.set_default_timeout(self.timeout)
+            await page.goto(url)
+            await page.wait_for_load_state("networkidle")
+
+    async def faculties_scraper(self, page: Page) -> list:
+        """
+        Extract faculty information (name and description) for a university
+        in a single `evaluate` round trip.
+
+        Args:
+            page (Page): The Playwright page object currently displaying the faculty page.
+
+        Returns:
+            list[dict]: Faculties with 'name' and 'about' keys.
+        """
+        faculties = await page.locator(".innerListOfUniversities").nth(0).evaluate(FACULTIES_JS)
+        return [require_fields(faculty, "faculties page") for faculty in faculties]
+
+    async def contact_scraper(self, page: Page) -> list:
+        """
+        Extract contact information, social media links, and map URL from the contact page
+        in a single `evaluate` round trip.
+
+        Args:
+            page (Page): The Playwright page object currently displaying the contact page.
+
+        Returns:
+            list[dict]: Contacts with 'contact_name' and 'contact_info' keys.
+        """
+        extracted = await page.locator(".newsListDate").nth(0).evaluate(CONTACTS_JS)
+        return build_contact_info(extracted)
+
+    async def university_details_scraper(self, page: Page) -> dict:
+        """
+        Extract the overview fields of a university from its main page
+        in a single `evaluate` round trip.
+
+        Args:
+            page (Page): The Playwright page object currently displaying the university page.
+
+        Returns:
+            dict: University record without 'faculties' and 'contact_info'.
+        """
+        details = require_fields(await page.locator(".leftMenu").nth(0).evaluate(UNIVERSITY_DETAILS_JS),
+                                 "university page")
+        details["type"] = "public"
+        return details
+
+    async def get_all_universities_links(self, page: Page):
+        """
+        Collect links to all public universities, following the list pagination.
+
+        Args:
+            page (Page): The Playwright page object displaying the universities list.
+        """
+        seen = set(self.all_links)
+        while True:
+            for href in await page.locator("ol").nth(2).evaluate(UNIVERSITY_LINKS_JS):
+                if href:
+                    href = urljoin(page.url, href)
+                    if href not in seen:
+                        seen.add(href)
+                        self.all_links.append(href)
+
+            next_button = page.locator("#ctl00_ctl00_ContentPlaceHolder1_ContentPlaceHolder1_lnkNext")
+            if await next_button.get_attribute("disabled"):
+                break  # Stop if no next page
+            async with self.rate_limiter.slot(page.url):
+                await next_button.click()
+                await page.wait_for_load_state("networkidle")
+
+    async def menu_page_urls(self, page: Page, *menu_texts: str) -> list:
+        """
+        Return the absolute URLs of left-menu entries (None for entries that are not plain links),
+        reading the whole menu in one round trip.
+        """
+        links = await page.locator(".leftMenu").nth(0).evaluate(MENU_LINKS_JS)
+        urls = []
+        for menu_text in menu_texts:
+            href = next((link["href"] for link in links if menu_text.lower() in link["text"].lower()), None)
+            if not href or href.startswith("javascript"):
+                urls.append(None)
+            else:
+                urls.append(urljoin(page.url, href))
+        return urls
+
+    async def open_menu_page(self, page: Page, university_url: str, page_url, menu_text: str):
+        """Open a university sub-page, clicking its menu entry when it has no direct URL."""
+        if page_url:
+            await self.goto(page, page_url)
+        else:
+            await self.goto(page, university_url)
+            async with self.rate_limiter.slot(university_url):
+                await page.locator(".leftMenu").locator(f"text={menu_text}").click()
+                await page.wait_for_load_state("networkidle")
+
+    async def scrape_menu_page(self, pool: BrowserContextPool, university_url: str, page_url, menu_text: str, extractor):
+        """
+        Open a university sub-page (faculties or contacts) on its own pooled page and extract it.
+        Falls back to clicking the menu entry when the page has no direct URL.
+        """
+        async with pool.page() as page:
+            await self.open_menu_page(page, university_url, page_url, menu_text)
+            return await extractor(page)
+
+    async def scrape_university(self, pool: BrowserContextPool, href: str) -> dict:
+        """
+        Scrape one university: its main page, then its faculties and contacts pages in parallel.
+
+        Args:
+            pool (BrowserContextPool): Pool to borrow pages from.
+            href (str): University page URL.
+
+        Returns:
+            dict: University record in the `raw_universities_data.json` schema.
+        """
+        university, _ = await self._scrape_university(pool, href)
+        return university
+
+    async def _scrape_university(self, pool: BrowserContextPool, href: str):
+        """
+        Scrape one university and also return the pages it was built from, as
+        (manifest key, menu text) pairs: the menu text is None for pages with a URL.
+        """
+        async with pool.page() as page:
+            await self.goto(page, href)
+            university = await self.university_details_scraper(page)
+            faculties_url, contacts_url = await self.menu_page_urls(page, "Faculties / Programs", "Contacts")
+
+        faculties, contact_info = await asyncio.gather(
+            self.scrape_menu_page(pool, href, faculties_url, "Faculties / Programs", self.faculties_scraper),
+            self.scrape_menu_page(pool, href, contacts_url, "Contacts", self.contact_scraper),
+        )
+        university["faculties"] = faculties
+        university["contact_info"] = contact_info
+        # manifest keys of the pages: sub-pages reached by a postback are keyed by their menu entry
+        pages = [(href, None)] + [
+            (url, None) if url else (postback_key(href, menu_text), menu_text)
+            for url, menu_text in ((faculties_url, "Faculties / Programs"), (contacts_url, "Contacts"))
+        ]
+        return university, pages
+
+    async def fingerprint_page(self, pool: BrowserContextPool, url: str):
+        """
+        Fetch a page with a conditional GET and fingerprint it.
+
+        Args:
+            pool (BrowserContextPool): Pool to borrow a context from.
+            url (str): Page URL.
+
+        Returns:
+            tuple[bool, dict]: Whether the page changed since the manifest was written,
+            and its fingerprint (etag, last_modified, content_hash).
+        """
+        headers = self.manifest.conditional_headers(url)
+        async with self.rate_limiter.slot(url):
+            async with pool.context() as context:
+                response = await context.request.get(url, headers=headers, timeout=self.timeout)
+                body = await response.text() if response.status != 304 else None
+                await response.dispose()
+
+        if response.status == 304:
+            return False, self.manifest.page_fingerprint(url)
+
+        fingerprint = {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_hash": content_hash(body),
+        }
+        return self.manifest.has_changed(url, fingerprint), fingerprint
+
+    async def fingerprint_menu_page(self, pool: BrowserContextPool, university_url: str, menu_text: str):
+        """
+        Render a sub-page reached by a postback (no URL to GET) and fingerprint its content.
+
+        Returns:
+            tuple[bool, dict]: Whether the page changed since the manifest was written,
+            and its fingerprint (content_hash, and the menu entry to click).
+        """
+        async with pool.page() as page:
+            await self.open_menu_page(page, university_url, None, menu_text)
+            html = await page.content()
+        fingerprint = {"etag": None, "last_modified": None, "content_hash": content_hash(html), "menu": menu_text}
+        return self.manifest.has_changed(postback_key(university_url, menu_text), fingerprint), fingerprint
+
+    async def scrape_university_if_changed(self, pool: BrowserContextPool, href: str, existing: dict):
+        """
+        Re-scrape a university only if one of its pages changed since the last run.
+
+        Args:
+            pool (BrowserContextPool): Pool to borrow pages from.
+            href (str): University page URL.
+            existing (dict): Previously scraped records keyed by university name.
+
+        Returns:
+            dict | None: The fresh record, or None if the stored record is still current.
+        """
+        known = self.manifest.universities.get(href)
+        fingerprints = {}
+        if known and known["university_name"] in existing:
+            unchanged = True
+            for url, stored in known["pages"].items():
+                if stored.get("menu"):
+                    changed, fingerprints[url] = await self.fingerprint_menu_page(pool, href, stored["menu"])
+                else:
+                    changed, fingerprints[url] = await self.fingerprint_page(pool, url)
+                if changed:
+                    unchanged = False
+                    break
+            if unchanged:
+                return None
+
+        university, pages = await self._scrape_university(pool, href)
+        for url, menu_text in pages:
+            if url in fingerprints:
+                continue
+            if menu_text:
+                _, fingerprints[url] = await self.fingerprint_menu_page(pool, href, menu_text)
+            else:
+                _, fingerprints[url] = await self.fingerprint_page(pool, url)
+        self.manifest.record(href, university["university_name"], {url: fingerprints[url] for url, _ in pages})
+        return university
+
+    async def scrape_university_with_retry(self, pool: BrowserContextPool, href: str):
+        """
+        Scrape a university unless it is already checkpointed or quarantined, retrying
+        with exponential backoff. The result is checkpointed as soon as it completes.
+
+        Returns:
+            dict | None: The university record, or None if it is quarantined.
+        """
+        if href in self.checkpoint.completed:
+            return self.checkpoint.completed[href]
+        if self.checkpoint.is_quarantined(href):
+            print(f"Skipping quarantined university: {href}")
+            self.quarantined_links.append(href)
+            return None
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                record = await self.scrape_university(pool, href)
+            except Exception as e:
+                print(f"Attempt {attempt}/{self.max_retries} failed for {href}: {e}")
+                if attempt == self.max_retries:
+                    self.checkpoint.quarantine(href, str(e))
+                    self.failed_links.append(href)
+                    self.quarantined_links.append(href)
+                    return None
+                await asyncio.sleep(self.retry_delay(attempt))
+            else:
+                self.checkpoint.save_university(href, record)
+                return record
+
+    async def scrap_public_universities_async(self, incremental: bool = False):
+        """
+        Main coroutine to scrape public universities:
+        - Collects all public university links.
+        - Scrapes every university concurrently using the browser context pool.
+
+        Args:
+            incremental (bool): Only re-scrape universities whose pages changed and
+                merge them into the existing raw dataset.
+        """
+        self.incremental = incremental
+        existing = {}
+        if incremental:
+            if self.manifest is None:
+                self.manifest = ScrapeManifest()
+            existing = {u["university_name"]: u for u in self.load_raw_data()}
+
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=self.headless)
+            pool = BrowserContextPool(browser, self.pool_size)
+            await pool.start()
+            try:
+                if not incremental and self.checkpoint.links:
+                    print(f"Resuming from checkpoint: {len(self.checkpoint.completed)} universities already scraped")
+                    self.all_links = list(self.checkpoint.links)
+                else:
+                    async with pool.page() as page:
+                        await self.goto(page, self.base_url)
+
+                        # Extract only public universities
+                        await page.get_by_text("Public Universities").nth(0).click()
+                        await page.wait_for_load_state("networkidle")
+                        await self.get_all_universities_links(page)
+                    if not incremental:
+                        self.checkpoint.save_links(self.all_links)
+
+                if incremental:
+                    tasks = [self.scrape_university_if_changed(pool, href, existing) for href in self.all_links]
+                else:
+                    tasks = [self.scrape_university_with_retry(pool, href) for href in self.all_links]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                await pool.close()
+                await browser.close()
+
+        self.universities_data = []
+        self.changed_universities = []
+        for href, result in zip(self.all_links, results):
+            if isinstance(result, Exception):
+                print(f"Failed to scrape {href}: {result}")
+                self.failed_links.append(href)
+                continue
+            if result is None:
+                # unchanged in incremental mode: the stored record is carried over below
+                continue
+            self.universities_data.append(result)
+            self.changed_universities.append(result["university_name"])
+
+        if incremental:
+            listed = set(self.all_links)
+            for href in [url for url in self.manifest.universities if url not in listed]:
+                self.removed_universities.append(self.manifest.universities[href]["university_name"])
+                self.manifest.forget(href)
+            # keep the stored record of every university that was not re-scraped or removed:
+            # unchanged ones, failed ones, and those the manifest does not know yet (first run)
+            fresh = {university["university_name"]: university for university in self.universities_data}
+            removed = set(self.removed_universities)
+            self.universities_data = [fresh.pop(name, record) for name, record in existing.items()
+                                      if name not in removed]
+            self.universities_data += list(fresh.values())
+            self.manifest.save()
+            self.save_delta()
+
+        print(f"Scraping completed: {len(self.universities_data)} universities, "
+              f"{len(self.changed_universities)} scraped, {len(self.failed_links)} failed")
+
+    def save_delta(self, file_name="scrape_delta.json"):
+        """
+        Save the names of the universities changed or removed by the last incremental run,
+        so downstream preprocessing can process only the delta, and the URLs of the ones
+        that failed (their stored records are kept, they are not removed).
+
+        Args:
+            file_name (str): Name of the JSON file to create in the raw data folder.
+        """
+        os.makedirs(self.raw_data_folder, exist_ok=True)
+        full_path = os.path.join(self.raw_data_folder, file_name)
+        with open(full_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "scraped_at": utc_now(),
+                "changed": self.changed_universities,
+                "removed": self.removed_universities,
+                "failed": self.failed_links,
+            }, f, ensure_ascii=False, indent=4)
+
+    def scrap_public_universities(self, incremental: bool = False):
+        """Run the asynchronous scraper from synchronous code."""
+        asyncio.run(self.scrap_public_universities_async(incremental))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape public universities concurrently.")
+    parser.add_argument("--base-url", default="https://www.universitiesegypt.com/")
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-per-host", type=int, default=4)
+    parser.add_argument("--min-interval", type=float, default=0.5)
+    parser.add_argument("--headful", action="store_true")
+    parser.add_argument("--incremental", action="store_true", help="Only re-scrape changed universities.")
+    args = parser.parse_args()
+
+    scraper = AsyncWebScraper(
+        base_url=args.base_url,
+        pool_size=args.pool_size,
+        max_concurrency_per_host=args.max_per_host,
+        min_request_interval=args.min_interval,
+        headless=not args.headful,
+    )
+    scraper.scrap_public_universities(incremental=args.incremental)
+    scraper.save_data_to_json()
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Tuple
+
+from langchain.schema import Document
+
+from core.metrics import METRICS
+
+
+class ChunkStore:
+    """
+    Shared in-process cache of document chunks, keyed by their Chroma id.
+
+    Graph states only carry chunk ids and scores; nodes resolve the ids here.
+    Chunks are added when they are retrieved, and ids that are not cached
+    (e.g. after a restart, from a checkpointed state) are fetched back from
+    the Chroma collection in one call.
+    """
+
+    def __init__(self, collection=None, max_size: int = 10000):
+        """
+        Args:
+            collection: Chroma collection used to resolve ids that are not cached.
+            max_size (int): Maximum number of cached chunks (least recently used are evicted).
+        """
+        self.collection = collection
+        self.max_size = max_size
+        self._chunks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, ids: Iterable[str], documents: Iterable[Document]):
+        """Cache chunks under their ids."""
+        with self._lock:
+            for chunk_id, document in zip(ids, documents):
+                self._chunks[chunk_id] = document
+                self._chunks.move_to_end(chunk_id)
+            while len(self._chunks) > self.max_size:
+                self._chunks.popitem(last=False)
+
+    def items(self, ids: List[str]) -> List[Tuple[str, Document]]:
+        """
+        Resolve chunk ids to documents, in the order of `ids`.
+
+        Returns:
+            list[tuple[str, Document]]: (id, document) pairs; ids unknown to the collection are skipped.
+        """
+        with self._lock:
+            missing = [chunk_id for chunk_id in ids if chunk_id not in self._chunks]
+        METRICS.inc("cache_requests_total", len(ids) - len(missing), cache="chunks", result="hit")
+        METRICS.inc("cache_requests_total", len(missing), cache="chunks", result="miss")
+        if missing and self.collection is not None:
+            fetched = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            self.put(fetched["ids"], [
+                Document(page_content=text, metadata=metadata or {})
+                for text, metadata in zip(fetched["documents"], fetched["metadatas"])
+            ])
+
+        items = []
+        with self._lock:
+            for chunk_id in ids:
+                document = self._chunks.get(chunk_id)
+                if document is not None:
+                    self._chunks.move_to_end(chunk_id)
+                    items.append((chunk_id, document))
+        return items
+
+    def get(self, ids: List[str]) -> List[Document]:
+        """Resolve chunk ids to documents, in the order of `ids` (unknown ids are skipped)."""
+        return [document for _, document in self.items(ids)]
@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+import functools
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.sqlite_pool import SQLiteConnectionPool
+
+# latency buckets in seconds: LLM calls take seconds, local steps milliseconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra: Optional[dict] = None) -> str:
+    items = list(key) + sorted((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as exposed by Prometheus."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, ending with +Inf."""
+        total, out = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            out.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return out
+
+
+class MetricsRegistry:
+    """
+    In-process metrics: counters and histograms with labels.
+
+    - `inc` / `observe` / `timer` / `timed` record values,
+    - `render_prometheus` returns the Prometheus text format,
+    - `serve_prometheus` exposes it on `/metrics`,
+    - `export_sqlite` appends a snapshot to the `metrics_samples` table.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._histograms: Dict[str, Dict[tuple, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._exporter = None
+
+    def describe(self, name: str, help_text: str):
+        """Set the HELP text of a metric."""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add `value` to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value (seconds for latencies) in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time a block into a histogram, including blocks that raise."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator timing every call of a function into a histogram."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def counter_value(self, name: str, **labels) -> float:
+        return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def reset(self):
+        """Drop every recorded value."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # ---------- Export ----------
+    def samples(self):
+        """Flat samples `(name, labels dict, value)` in the Prometheus naming scheme."""
+        out = []
+        with self._lock:
+            for name, series in self._counters.items():
+                for key, value in series.items():
+                    out.append((name, dict(key), value))
+            for name, series in self._histograms.items():
+                for key, histogram in series.items():
+                    for bound, count in histogram.cumulative():
+                        out.append((f"{name}_bucket", {**dict(key), "le": bound}, count))
+                    out.append((f"{name}_sum", dict(key), histogram.sum))
+                    out.append((f"{name}_count", dict(key), histogram.count))
+        return out
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(key, {'le': bound})} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port: int, host: str = "127.0.0.1", readiness=None):
+        """
+        Serve `/metrics` from a daemon thread (once per process).
+
+        Args:
+            readiness (Callable, optional): Returns the readiness status dict (with a
+                "ready" key) served as JSON on `/ready`: 200 when ready, 503 before.
+        """
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/ready" and readiness is not None:
+                    status = readiness()
+                    body = json.dumps(status).encode("utf-8")
+                    self.send_response(200 if status.get("ready") else 503)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"Metrics served on http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def export_sqlite(self, pool: SQLiteConnectionPool, retention: float = 7 * 24 * 3600,
+                      labels: Optional[dict] = None):
+        """
+        Append a snapshot of every sample to `metrics_samples` (cumulative values,
+        as Prometheus would scrape them) and drop snapshots older than `retention` seconds.
+
+        Args:
+            labels (dict, optional): Labels added to every sample, e.g. the worker
+                process of the serving API.
+        """
+        now = time.time()
+        extra = {k: str(v) for k, v in (labels or {}).items()}
+        rows = [(now, name, json.dumps({**sample_labels, **extra}, sort_keys=True), value)
+                for name, sample_labels, value in self.samples()]
+        with pool.connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metrics_samples (
+                    ts REAL NOT NULL,
+                    name TEXT NOT NULL,
+                    labels TEXT NOT NULL,
+                    value REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_samples_name_ts ON metrics_samples(name, ts)")
+            conn.executemany("INSERT INTO metrics_samples (ts, name, labels, value) VALUES (?, ?, ?, ?)", rows)
+            conn.execute("DELETE FROM metrics_samples WHERE ts < ?", (now - retention,))
+            conn.commit()
+        return len(rows)
+
+    def start_sqlite_export(self, db_path: Optional[str] = None, interval: float = 60,
+                            labels: Optional[dict] = None):
+        """
+        Export to SQLite every `interval` seconds from a daemon thread (once per process),
+        with `labels` added to every sample.
+        """
+        if self._exporter is not None:
+            return
+        db_path = db_path or os.path.join(project_root, "data", "database", "rag_sqlite.db")
+        pool = SQLiteConnectionPool(db_path, size=1)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.export_sqlite(pool, labels=labels)
+                except Exception as e:
+                    print(f"Metrics export failed: {e}")
+
+        self._exporter = threading.Thread(target=run, name="metrics-sqlite", daemon=True)
+        self._exporter.start()
+
+
+# process-wide registry used by the RAG pipeline
+METRICS = MetricsRegistry()
+METRICS.describe("rag_node_seconds", "Wall time of each CorrectiveRAG graph node.")
+METRICS.describe("chroma_query_seconds", "Wall time of Chroma vector queries.")
+METRICS.describe("mmap_index_query_seconds", "Wall time of memory-mapped vector index queries, including the query embedding.")
+METRICS.describe("llm_call_seconds", "Wall time of LLM calls.")
+METRICS.describe("llm_tokens_total", "LLM prompt and completion tokens.")
+METRICS.describe("rag_retrieved_chunks_total", "Chunks returned by retrieval (sum of k).")
+METRICS.describe("rag_filtered_chunks_total", "Chunks kept by the relevance grader.")
+METRICS.describe("cache_requests_total", "Cache lookups by cache and result (hit/miss).")
+METRICS.describe("structured_answers_total", "Questions answered (hit) or not (miss) from the structured records.")
+METRICS.describe("session_titles_total", "Session titles by path (heuristic/model).")
+METRICS.describe("coalesced_calls_total", "Calls run (leader) or shared from an identical in-flight call (follower).")
+METRICS.describe("startup_seconds", "Startup (warm-up) time of each component.")
+METRICS.describe("corrective_attempts_total", "Retrieval attempts of the corrective loop by outcome (generate/transform_query/web_search).")
+METRICS.describe("api_request_seconds", "Wall time of serving API requests, per method.")
+METRICS.describe("api_requests_total", "Serving API requests by method and status.")
+
+
+def record_token_usage(model: str, prompt_tokens, completion_tokens):
+    """Add the token counts of one LLM call (ignored when the provider reports none)."""
+    if prompt_tokens:
+        METRICS.inc("llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        METRICS.inc("llm_tokens_total", completion_tokens, model=model, kind="completion")
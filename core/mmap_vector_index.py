@@ -0,0 +1,130 @@
+import os
+import sys
+import json
+import hashlib
+
+import numpy as np
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+INDEX_DIR = os.path.join(project_root, "data", "index")
+
+
+class MmapVectorIndex:
+    """
+    Read-only exact vector index over the chunk embeddings of the Chroma
+    collection, stored as `.npy` files and opened with `np.load(mmap_mode="r")`.
+
+    Worker processes opening the same files share their pages through the OS
+    page cache instead of each loading a copy of the HNSW index. Distances are
+    squared L2, the default space of the Chroma collection, so rankings match
+    `collection.query` (exactly, where HNSW is approximate).
+
+    Files in `path`:
+        - embeddings.npy: float32 matrix, one row per chunk,
+        - norms.npy: squared norm of every row,
+        - chunks.json: ids, documents and metadatas in row order, and the
+          fingerprint of the collection content they were exported from.
+    """
+
+    def __init__(self, path: str = INDEX_DIR):
+        self.path = path
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.norms = np.load(os.path.join(path, "norms.npy"), mmap_mode="r")
+        with open(os.path.join(path, "chunks.json"), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        self.ids = chunks["ids"]
+        self.documents = chunks["documents"]
+        self.metadatas = chunks["metadatas"]
+        self.fingerprint = chunks.get("fingerprint")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def batches(collection, include, batch_size: int = 1000):
+        """Read a Chroma collection in batches of `batch_size` chunks."""
+        for offset in range(0, collection.count(), batch_size):
+            yield collection.get(include=include, limit=batch_size, offset=offset)
+
+    @staticmethod
+    def update_fingerprint(digest, ids, documents, metadatas):
+        """Add chunks to a SHA-256 digest of the collection content (ids, texts, metadatas, in order)."""
+        for chunk in zip(ids, documents, metadatas):
+            digest.update(json.dumps(chunk, sort_keys=True, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    @classmethod
+    def collection_fingerprint(cls, collection, batch_size: int = 1000) -> str:
+        """Fingerprint of the current content of a collection, read without its embeddings."""
+        digest = hashlib.sha256()
+        for batch in cls.batches(collection, ["documents", "metadatas"], batch_size):
+            cls.update_fingerprint(digest, batch["ids"], batch["documents"], [m or {} for m in batch["metadatas"]])
+        return digest.hexdigest()
+
+    @classmethod
+    def export(cls, collection, path: str = INDEX_DIR, batch_size: int = 1000):
+        """
+        Write the embeddings, documents and metadatas of a Chroma collection to `path`.
+        Files are replaced atomically, so running workers keep their current mapping.
+        """
+        os.makedirs(path, exist_ok=True)
+        ids, documents, metadatas, embeddings = [], [], [], []
+        for batch in cls.batches(collection, ["embeddings", "documents", "metadatas"], batch_size):
+            ids += batch["ids"]
+            documents += batch["documents"]
+            metadatas += [m or {} for m in batch["metadatas"]]
+            embeddings.append(np.asarray(batch["embeddings"], dtype=np.float32))
+
+        matrix = np.vstack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+        files = {
+            "embeddings.npy": matrix,
+            "norms.npy": np.einsum("ij,ij->i", matrix, matrix) if len(matrix) else np.zeros(0, dtype=np.float32),
+        }
+        for name, array in files.items():
+            tmp = os.path.join(path, f".{name}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, os.path.join(path, name))
+        tmp = os.path.join(path, ".chunks.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            digest = hashlib.sha256()
+            cls.update_fingerprint(digest, ids, documents, metadatas)
+            json.dump({"ids": ids, "documents": documents, "metadatas": metadatas,
+                       "fingerprint": digest.hexdigest()}, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(path, "chunks.json"))
+        print(f"Exported {len(ids)} chunk embeddings to {path}")
+
+    @classmethod
+    def open_or_export(cls, collection, path: str = INDEX_DIR) -> "MmapVectorIndex":
+        """
+        Open the index in `path`, exporting the collection first if it is missing or
+        out of date: its fingerprint differs from the collection content (re-chunked
+        or refreshed documents, even with the same number of chunks).
+        """
+        try:
+            index = cls(path)
+            if index.fingerprint == cls.collection_fingerprint(collection):
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+        cls.export(collection, path)
+        return cls(path)
+
+    def search(self, query_embedding, k: int = 5):
+        """
+        Top-k rows closest to a query embedding.
+
+        Returns:
+            tuple[list[str], list[float], list[int]]: Chunk ids, squared L2 distances and row numbers.
+        """
+        if not len(self.ids):
+            return [], [], []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        distances = self.norms - 2 * (self.embeddings @ query) + float(query @ query)
+        k = min(k, len(distances))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return [self.ids[i] for i in top], [float(distances[i]) for i in top], top.tolist()
@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import time
+from typing import Dict, List, Optional
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+
+class ScrapeCheckpoint:
+    """
+    Append-only JSONL checkpoint of a scraping run, so a crashed crawl can resume.
+
+    Each line is one event, replayed in order on load:
+        {"type": "links", "links": [...]}                       collected university links
+        {"type": "university", "url": ..., "record": {...}}     a completed university
+        {"type": "quarantine", "url": ..., "error": ..., "failures": n, "retry_after": epoch}
+        {"type": "names", "names": {url: university_name}}      names of the last finished crawl
+
+    A URL that keeps failing is quarantined and skipped until `retry_after`;
+    the quarantine period doubles with every failed run. The name scraped from
+    every URL is kept across runs, so the last good record of a quarantined
+    university can be found in the previous dataset.
+    """
+
+    def __init__(self, path: Optional[str] = None, quarantine_period: float = 3600):
+        """
+        Args:
+            path (str, optional): Checkpoint file. Defaults to data/raw/scrape_checkpoint.jsonl.
+            quarantine_period (float): Seconds a URL is skipped after its first failed run.
+        """
+        self.path = path or os.path.join(project_root, "data", "raw", "scrape_checkpoint.jsonl")
+        self.quarantine_period = quarantine_period
+        self.links: List[str] = []
+        self.completed: Dict[str, dict] = {}
+        self.quarantined: Dict[str, dict] = {}
+        self.names: Dict[str, str] = {}
+        self.load()
+
+    def load(self):
+        """Replay the checkpoint file. A line truncated by a crash is cut off the file."""
+        if not os.path.exists(self.path):
+            return
+        valid_size = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._apply(event)
+                valid_size += len(line)
+        if valid_size < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_size)
+
+    def _apply(self, event: dict):
+        if event["type"] == "links":
+            self.links = event["links"]
+        elif event["type"] == "university":
+            self.completed[event["url"]] = event["record"]
+            self.names[event["url"]] = event["record"]["university_name"]
+            self.quarantined.pop(event["url"], None)
+        elif event["type"] == "quarantine":
+            self.quarantined[event["url"]] = event
+        elif event["type"] == "names":
+            self.names.update(event["names"])
+
+    def _append(self, event: dict):
+        """Durably append one event to the checkpoint file."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(event)
+
+    def save_links(self, links: List[str]):
+        """Record the collected university links so a resumed run can skip the listing pages."""
+        self._append({"type": "links", "links": list(links)})
+
+    def save_university(self, url: str, record: dict):
+        """Record a completed university."""
+        self._append({"type": "university", "url": url, "record": record})
+
+    def quarantine(self, url: str, error: str):
+        """Quarantine a URL that failed all its retries."""
+        failures = self.quarantined.get(url, {}).get("failures", 0) + 1
+        retry_after = time.time() + self.quarantine_period * 2 ** (failures - 1)
+        self._append({"type": "quarantine", "url": url, "error": error,
+                      "failures": failures, "retry_after": retry_after})
+
+    def is_quarantined(self, url: str) -> bool:
+        """Return True while a URL is inside its quarantine period."""
+        entry = self.quarantined.get(url)
+        return entry is not None and entry["retry_after"] > time.time()
+
+    def settled(self) -> bool:
+        """True once every collected link is completed or quarantined (the crawl was not interrupted)."""
+        return all(url in self.completed or url in self.quarantined for url in self.links)
+
+    def finish(self):
+        """
+        Compact the checkpoint once the full dataset has been saved: completed
+        universities and links are dropped, quarantine entries and names are kept,
+        so the next run collects the links again instead of resuming.
+        The compacted file replaces the old one atomically, so a crash leaves
+        either of them.
+        """
+        events = list(self.quarantined.values())
+        if self.names:
+            events.append({"type": "names", "names": self.names})
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.links = []
+        self.completed = {}
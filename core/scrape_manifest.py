@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import json
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+# Markup that changes on every request (ASP.NET view state, inline scripts)
+VOLATILE_MARKUP_PATTERN = re.compile(
+    r'<script\b.*?</script>|<input\b[^>]*type=["\']hidden["\'][^>]*>',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def content_hash(html: str) -> str:
+    """Return a SHA-256 fingerprint of a page, ignoring volatile markup."""
+    stable = VOLATILE_MARKUP_PATTERN.sub('', html)
+    return hashlib.sha256(stable.encode("utf-8")).hexdigest()
+
+
+def postback_key(university_url: str, menu_text: str) -> str:
+    """Manifest key of a university sub-page reached by a postback (it has no URL of its own)."""
+    return f"{university_url}#{menu_text}"
+
+
+def utc_now() -> str:
+    """Current UTC time as an ISO 8601 string."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class ScrapeManifest:
+    """
+    Local manifest of scraped universities used for incremental re-scraping.
+
+    For every university URL it stores the university name, the time it was
+    last scraped and a fingerprint (ETag, Last-Modified, content hash) of each
+    page the record was built from (main, faculties and contacts pages):
+
+        {
+            "universities": {
+                "<university url>": {
+                    "university_name": "...",
+                    "scraped_at": "...",
+                    "pages": {"<page url>": {"etag": ..., "last_modified": ..., "content_hash": ...}}
+                }
+            }
+        }
+
+    A sub-page reached by a JavaScript postback has no URL to GET: it is keyed
+    "<university url>#<menu text>", and its fingerprint (with a "menu" entry) is
+    the hash of the page rendered by clicking that menu entry.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(project_root, "data", "raw", "scrape_manifest.json")
+        self.universities: Dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        """Load the manifest from disk (an empty manifest if the file does not exist)."""
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.universities = json.load(f).get("universities", {})
+
+    def save(self):
+        """Write the manifest to disk."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"universities": self.universities}, f, ensure_ascii=False, indent=4)
+
+    def page_fingerprint(self, page_url: str) -> Optional[dict]:
+        """Return the stored fingerprint of a page, if any university references it."""
+        for entry in self.universities.values():
+            fingerprint = entry["pages"].get(page_url)
+            if fingerprint is not None:
+                return fingerprint
+        return None
+
+    def conditional_headers(self, page_url: str) -> dict:
+        """HTTP headers for a conditional GET of a previously fingerprinted page."""
+        fingerprint = self.page_fingerprint(page_url) or {}
+        headers = {}
+        if fingerprint.get("etag"):
+            headers["If-None-Match"] = fingerprint["etag"]
+        if fingerprint.get("last_modified"):
+            headers["If-Modified-Since"] = fingerprint["last_modified"]
+        return headers
+
+    def has_changed(self, page_url: str, fingerprint: dict) -> bool:
+        """Compare a freshly computed fingerprint with the stored one."""
+        stored = self.page_fingerprint(page_url)
+        if stored is None:
+            return True
+        return stored.get("content_hash") != fingerprint.get("content_hash")
+
+    def record(self, university_url: str, university_name: str, pages: Dict[str, dict]):
+        """Store the fingerprints of a freshly scraped university."""
+        self.universities[university_url] = {
+            "university_name": university_name,
+            "scraped_at": utc_now(),
+            "pages": pages,
+        }
+
+    def forget(self, university_url: str):
+        """Remove a university that is no longer listed on the website."""
+        self.universities.pop(university_url, None)
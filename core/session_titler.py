@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Optional
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.metrics import METRICS
+
+
+def placeholder_title(text: str, max_length: int = 40) -> str:
+    """Truncated first line of a prompt, shown until the real title is ready."""
+    first_line = " ".join(str(text).split())
+    if len(first_line) <= max_length:
+        return first_line.lower()
+    return first_line[:max_length].rsplit(" ", 1)[0].lower() + "…"
+
+
+class SessionTitler:
+    """
+    Generates chat session titles off the request path.
+
+    - Short prompts get their title from `KeywordSummarizer.quick_title` inline.
+    - Longer prompts get a placeholder title immediately; KeyBERT runs on a
+      single background worker and the final title is delivered to `on_title`.
+    """
+
+    def __init__(self, on_title: Callable[[str, str], None], summarizer=None, summary_length: int = 5):
+        """
+        Args:
+            on_title (Callable): `on_title(session_id, title)`, called with every final title.
+            summarizer (KeywordSummarizer, optional): Keyword extractor used for long prompts,
+                created (with its KeyBERT, numpy and scikit-learn imports) on first use if not given.
+            summary_length (int): Maximum number of words of a title.
+        """
+        self._summarizer = summarizer
+        self._summarizer_lock = threading.Lock()
+        self.on_title = on_title
+        self.summary_length = summary_length
+        # one worker: KeyBERT is CPU bound (its embedding cache is shared with other threads, under a lock)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-titler")
+
+    @property
+    def summarizer(self):
+        with self._summarizer_lock:
+            if self._summarizer is None:
+                from models.keyword_summarizer import KeywordSummarizer
+
+                self._summarizer = KeywordSummarizer()
+            return self._summarizer
+
+    def title(self, session_id: str, text: str) -> Optional[Future]:
+        """
+        Title a session from its first prompt.
+
+        Returns:
+            Future | None: Future of the background title, or None if the title
+            was produced inline by the fast path.
+        """
+        quick = self.summarizer.quick_title(str(text), self.summary_length)
+        if quick is not None:
+            METRICS.inc("session_titles_total", path="heuristic")
+            self.on_title(session_id, quick)
+            return None
+        METRICS.inc("session_titles_total", path="model")
+        self.on_title(session_id, placeholder_title(text))
+        return self._executor.submit(self._generate, session_id, str(text))
+
+    def _generate(self, session_id: str, text: str) -> str:
+        try:
+            title = self.summarizer.summarize_text(text, self.summary_length).lower()
+        except Exception as e:
+            print(f"Session titling failed for {session_id}: {e}")
+            raise
+        self.on_title(session_id, title)
+        return title
+
+    def close(self):
+        """Drop titles not started yet and wait for the running one."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable, Tuple
+
+from core.metrics import METRICS
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls with the same key: the first caller (the
+    leader) runs the function, callers arriving while it runs (followers)
+    wait for its result instead of running it again. Results are not kept
+    once the flight lands, so this is coalescing, not caching: a call made
+    after the leader finished runs again.
+
+    Only results are shared: when the leader raises, its followers retry (one
+    of them becoming the new leader), so one caller's failure (e.g. a
+    rate-limited API key) is not handed to the others.
+    """
+
+    def __init__(self, name: str = "default"):
+        """
+        Args:
+            name (str): Label of the `coalesced_calls_total` metric.
+        """
+        self.name = name
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable, stage: str = "") -> Tuple[object, bool]:
+        """
+        Run `fn()` unless a call with the same key is in flight.
+
+        Args:
+            key (Hashable): Identity of the call.
+            fn (Callable): Function computing the result.
+            stage (str, optional): Metric label for the kind of call.
+
+        Returns:
+            tuple[object, bool]: The result, and True when it was shared from another caller's flight.
+        """
+        while True:
+            with self._lock:
+                future = self._flights.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._flights[key] = future
+            METRICS.inc("coalesced_calls_total", flight=self.name, stage=stage,
+                        role="leader" if leader else "follower")
+            if leader:
+                break
+            try:
+                return future.result(), True
+            except BaseException:
+                continue
+
+        # the flight is removed before it lands, so retrying followers start a new one
+        try:
+            value = fn()
+        except BaseException as e:
+            self._land(key)
+            future.set_exception(e)
+            raise
+        self._land(key)
+        future.set_result(value)
+        return value, False
+
+    def _land(self, key: Hashable):
+        with self._lock:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        with self._lock:
+            return len(self._flights)
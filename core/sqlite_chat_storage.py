@@ -1,36 +1,51 @@
 import sqlite3
 import json
 import os
+import re
 import sys
 import time
+import atexit
 import random
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from models.keyword_summarizer import KeywordSummarizer
-from core.text_preprocessor import TextProcessor
+from core.sqlite_pool import SQLiteConnectionPool
+from core.sqlite_write_behind import WriteBehindQueue
+from core.session_titler import SessionTitler
 
 class SQLiteChatStorage:
     """
     SQLite-backed chat storage.
     - Stores chat sessions and messages.
     - Messages have: id, session_id, role ('user'|'assistant'), content, metadata (JSON), created_at.
+    - The database runs in WAL mode behind a connection pool, so it can be shared
+      by concurrent Streamlit sessions; session and message lookups are indexed.
+    - With `write_behind=True` writes are queued and committed in batches by a
+      background thread; write methods then return a Future, and reads of a session
+      first wait for that session's pending writes (read-your-writes).
+    - Message content is indexed with FTS5 for `search_messages`.
     """
 
-    def __init__(self):
-        self.keyword_summarizer = KeywordSummarizer()
-        self.tp = TextProcessor()
-        self.db_path = os.path.join(project_root, "data", "database", "rag_sqlite.db")
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+    def __init__(self, db_path: Optional[str] = None, pool_size: int = 8, write_behind: bool = True):
+        self.db_path = db_path or os.path.join(project_root, "data", "database", "rag_sqlite.db")
+        self.pool = SQLiteConnectionPool(self.db_path, size=pool_size)
         self._init_tables()
+        self.writer = WriteBehindQueue(self.pool) if write_behind else None
+        # the keyword summarizer is created on the first session title, not with the storage
+        self.titler = SessionTitler(self.rename_session)
+        # pending writes are flushed when the process exits
+        atexit.register(self.close)
 
     def _init_tables(self):
-        cur = self.conn.cursor()
+        with self.pool.connection() as conn:
+            self._create_schema(conn)
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        cur = conn.cursor()
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS sessions (
@@ -53,7 +68,74 @@ class SQLiteChatStorage:
             )
             """
         )
-        self.conn.commit()
+        # sessions created before per-user filtering have no owner
+        session_columns = {row["name"] for row in cur.execute("PRAGMA table_info(sessions)")}
+        if "user_id" not in session_columns:
+            cur.execute("ALTER TABLE sessions ADD COLUMN user_id TEXT")
+        # messages of a session are always read in id order
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_id ON messages(session_id, id)")
+        # sessions are listed newest first, optionally per user
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions(created_at, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_created_at ON sessions(user_id, created_at, id)")
+        self._create_search_index(cur)
+        conn.commit()
+
+    def _create_search_index(self, cur: sqlite3.Cursor):
+        """
+        FTS5 index over message content. It is an external-content table: the text
+        is stored once in `messages`, and triggers keep the index in sync.
+        """
+        exists = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                content,
+                content='messages',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        cur.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+            """
+        )
+        if not exists:
+            # index the history written before search existed
+            cur.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+
+    def _write(self, op, session_id: Optional[str] = None, prepare=None):
+        """
+        Run a write operation `op(conn, prepared)`: queued on the write-behind
+        thread (returns a Future) or executed and committed immediately.
+        """
+        if self.writer is not None:
+            return self.writer.submit(op, session_id, prepare)
+        with self.pool.connection() as conn:
+            result = op(conn, prepare() if prepare else None)
+            conn.commit()
+        return result
+
+    def _wait_for_writes(self, session_id: Optional[str] = None):
+        """Make pending writes of a session (all sessions if None) visible to reads."""
+        if self.writer is not None:
+            self.writer.wait(session_id)
+
+    def flush(self):
+        """Block until every queued write is committed."""
+        self._wait_for_writes()
 
     def time_random_id(self):
         """Generate a unique session ID based on timestamp and random number."""
@@ -62,28 +144,43 @@ class SQLiteChatStorage:
         return f"session_{timestamp}_{rand}"
     
     # ---------- Session methods ----------
-    def create_session(self, session_id: str, name: str) -> str:
+    def create_session(self, session_id: str, name: str, user_id: Optional[str] = None) -> str:
         """
         Create a new session if it does not already exist.
 
         Args:
             session_id: Unique session identifier.
             name: Initial name of the session.
+            user_id: Optional owner of the session.
 
         Returns:
             The session ID.
         """
-        cur = self.conn.cursor()
-        cur.execute("SELECT id FROM sessions WHERE id = ?", (session_id,))
-        if cur.fetchone() is None:
-            cur.execute(
-                "INSERT INTO sessions (id, name) VALUES (?, ?)",
-                (session_id, name),
+        def op(conn, _):
+            conn.execute(
+                "INSERT OR IGNORE INTO sessions (id, name, user_id) VALUES (?, ?, ?)",
+                (session_id, name, user_id),
             )
-            self.conn.commit()
+        self._write(op, session_id)
         return session_id
 
-    def update_session_name(self, session_id: str, new_name: str) -> bool:
+    def rename_session(self, session_id: str, name: str):
+        """
+        Store a session name as is.
+
+        Returns:
+            bool: True if the session exists (a Future resolving to it when write-behind is enabled).
+        """
+        def op(conn, _):
+            cur = conn.execute("UPDATE sessions SET name = ? WHERE id = ?", (name, session_id))
+            return cur.rowcount > 0
+        return self._write(op, session_id)
+
+    @property
+    def keyword_summarizer(self):
+        return self.titler.summarizer
+
+    def update_session_name(self, session_id: str, new_name: str):
         """
         Generate and update a short, meaningful name for a session.
 
@@ -91,83 +188,161 @@ class SQLiteChatStorage:
         or phrase from the provided session content, making it suitable for
         display in the user interface (e.g., session titles or summaries).
 
-        The extracted name is stored in the database, replacing the previous
-        session name associated with the given session ID.
+        Short texts are named inline by a heuristic. Longer texts get a
+        placeholder name right away and are named by KeyBERT on the
+        `SessionTitler` background worker, off the request path.
 
         Args:
             session_id (str): Unique identifier of the session to update.
             new_name (str): The text or message content to derive the new name from.
 
         Returns:
-            bool: True if the session name was successfully updated, False otherwise.
+            Future | None: Future of the generated name, or None if the heuristic named the session.
         """
-        new_name = self.keyword_summarizer.summarize_text(str(new_name), 5).lower()
-        cur = self.conn.cursor()
-        cur.execute("UPDATE sessions SET name = ? WHERE id = ?", (new_name, session_id))
-        self.conn.commit()
-        return cur.rowcount > 0 
+        return self.titler.title(session_id, new_name)
 
 
-    def list_sessions(self) -> List[Dict[str, Any]]:
-        """Return all sessions ordered by creation date (most recent first)."""
+    def list_sessions(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[str, str]] = None,
+        since: Optional[Tuple[str, str]] = None,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return sessions ordered by creation date (most recent first), using keyset
+        pagination on (created_at, id) so each page is an index range scan.
+
+        Args:
+            limit: Maximum number of sessions to return (all if None).
+            before: Cursor (created_at, id); only sessions strictly older are returned.
+            since: Cursor (created_at, id); only sessions at or newer than it are returned.
+            user_id: If given, only sessions owned by this user.
 
-        cur = self.conn.cursor()
-        cur.execute("SELECT id, name, created_at FROM sessions ORDER BY created_at DESC")
-        rows = cur.fetchall()
+        Returns:
+            List of session dicts with keys: id, name, created_at
+        """
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if before is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(before)
+        if since is not None:
+            clauses.append("(created_at, id) >= (?, ?)")
+            params.extend(since)
+
+        self._wait_for_writes()
+        query = "SELECT id, name, created_at FROM sessions"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
         return [dict(r) for r in rows]
 
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve session  by ID."""
-        cur = self.conn.cursor()
-        cur.execute("SELECT id, name, created_at FROM sessions WHERE id = ?", (session_id,))
-        row = cur.fetchone()
+        self._wait_for_writes(session_id)
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT id, name, created_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
         return dict(row) if row else None
 
     def delete_session(self, session_id: str):
         """Delete a session and all its messages."""
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
-        cur.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
-        self.conn.commit()
+        def op(conn, _):
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        return self._write(op, session_id)
+
+    def delete_sessions(self, session_ids: List[str]):
+        """
+        Delete several sessions and their messages in one transaction.
+
+        Returns:
+            int: Number of sessions deleted (a Future resolving to it when write-behind is enabled).
+        """
+        ids = [(session_id,) for session_id in session_ids]
+
+        def op(conn, _):
+            conn.executemany("DELETE FROM messages WHERE session_id = ?", ids)
+            cur = conn.executemany("DELETE FROM sessions WHERE id = ?", ids)
+            return cur.rowcount
+        return self._write(op)
+
+    def delete_archived_sessions(self, last_message_ids: Dict[str, int]):
+        """
+        Delete archived sessions and their messages in one transaction, skipping
+        every session that received a message after it was archived (a message
+        with an id above its last archived one).
+
+        Args:
+            last_message_ids: Session id -> id of its last archived message (0 if none).
 
-    def list_empty_sessions(self) -> List[Dict[str, Any]]:
+        Returns:
+            int: Number of sessions deleted (a Future resolving to it when write-behind is enabled).
+        """
+        not_newer = "NOT EXISTS (SELECT 1 FROM messages m WHERE m.session_id = ? AND m.id > ?)"
+        params = [(session_id, session_id, last_id) for session_id, last_id in last_message_ids.items()]
+
+        def op(conn, _):
+            # the messages go only if there is no newer one, and then the session goes too
+            conn.executemany(f"DELETE FROM messages WHERE session_id = ? AND {not_newer}", params)
+            return sum(
+                conn.execute(f"DELETE FROM sessions WHERE id = ? AND {not_newer}", p).rowcount for p in params
+            )
+        return self._write(op)
+
+    # empty sessions: an index probe on messages(session_id, id) per session
+    # instead of joining every message
+    EMPTY_SESSIONS_WHERE = """
+        created_at <= datetime('now', ?)
+        AND NOT EXISTS (SELECT 1 FROM messages m WHERE m.session_id = sessions.id)
+    """
+
+    def list_empty_sessions(self, min_age: int = 0) -> List[Dict[str, Any]]:
         """
         Return all sessions that have no messages.
 
+        Args:
+            min_age: Only sessions created at least this many seconds ago.
+
         Returns:
             List of session dicts with keys: id, name, created_at
         """
-        cur = self.conn.cursor()
-        cur.execute("""
-            SELECT s.id, s.name, s.created_at
-            FROM sessions s
-            LEFT JOIN messages m ON s.id = m.session_id
-            WHERE m.id IS NULL
-            ORDER BY s.created_at DESC
-        """)
-        rows = cur.fetchall()
+        self._wait_for_writes()
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT id, name, created_at
+                FROM sessions
+                WHERE {self.EMPTY_SESSIONS_WHERE}
+                ORDER BY created_at DESC
+            """, (f"-{int(min_age)} seconds",)).fetchall()
         return [dict(r) for r in rows]
     
-    def delete_empty_sessions(self) -> int:
+    def delete_empty_sessions(self, min_age: int = 0) -> int:
         """
         Delete all sessions that have no messages.
 
+        Args:
+            min_age: Only sessions created at least this many seconds ago, so
+                sessions just opened by other users are kept.
+
         Returns:
-            int: Number of sessions deleted.
-        """
-        cur = self.conn.cursor()
-        cur.execute("""
-            DELETE FROM sessions
-            WHERE id IN (
-                SELECT s.id
-                FROM sessions s
-                LEFT JOIN messages m ON s.id = m.session_id
-                WHERE m.id IS NULL
+            int: Number of sessions deleted (a Future resolving to it when write-behind is enabled).
+        """
+        def op(conn, _):
+            cur = conn.execute(
+                f"DELETE FROM sessions WHERE {self.EMPTY_SESSIONS_WHERE}",
+                (f"-{int(min_age)} seconds",),
             )
-        """)
-        deleted_count = cur.rowcount
-        self.conn.commit()
-        return deleted_count
+            return cur.rowcount
+        return self._write(op)
 
     # ---------- Message methods ----------
     def add_message(self, session_id: str, role: str, content: str, metadata: Optional[dict] = None):
@@ -181,16 +356,17 @@ class SQLiteChatStorage:
             metadata: Optional additional data (sources, etc.)
 
         Returns:
-            Message ID in database.
+            Message ID in database (a Future resolving to it when write-behind is enabled).
         """
         metadata_json = json.dumps(metadata) if metadata is not None else None
-        cur = self.conn.cursor()
-        cur.execute(
-            "INSERT INTO messages (session_id, role, content, metadata) VALUES (?, ?, ?, ?)",
-            (session_id, role, content, metadata_json),
-        )
-        self.conn.commit()
-        return cur.lastrowid
+
+        def op(conn, _):
+            cur = conn.execute(
+                "INSERT INTO messages (session_id, role, content, metadata) VALUES (?, ?, ?, ?)",
+                (session_id, role, content, metadata_json),
+            )
+            return cur.lastrowid
+        return self._write(op, session_id)
 
     def add_user_message(self, session_id: str, content: str, metadata: Optional[dict] = None):
         return self.add_message(session_id, "user", content, metadata)
@@ -198,44 +374,125 @@ class SQLiteChatStorage:
     def add_ai_message(self, session_id: str, content: str, metadata: Optional[dict] = None):
         return self.add_message(session_id, "assistant", content, metadata)
 
-    def get_messages(self, session_id: str) -> List[Dict[str, Any]]:
+    def get_messages(self, session_id: str, decode_metadata: bool = True) -> List[Dict[str, Any]]:
         """Return all messages of a session in chronological order."""
 
-        cur = self.conn.cursor()
-        cur.execute(
-            "SELECT id, role, content, metadata, created_at FROM messages WHERE session_id = ? ORDER BY id ASC",
-            (session_id,),
-        )
-        rows = cur.fetchall()
-        out = []
-        for r in rows:
-            item = dict(r)
-            item["metadata"] = json.loads(item["metadata"]) if item["metadata"] else None
-            out.append(item)
-        return out
+        self._wait_for_writes(session_id)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT id, role, content, metadata, created_at FROM messages WHERE session_id = ? ORDER BY id ASC",
+                (session_id,),
+            ).fetchall()
+        return self._rows_to_messages(rows, decode_metadata)
 
-    def get_last_n_messages(self, session_id: str, n: int = 20) -> List[Dict[str, Any]]:
-        """Return the last n messages of a session in chronological order."""
+    @staticmethod
+    def _match_expression(query: str) -> str:
+        """
+        Turn free text into an FTS5 MATCH expression: every word must appear, and
+        the last word also matches as a prefix (search as you type). Words are
+        quoted so FTS5 operators in user input are treated as text.
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return ""
+        terms = [f'"{w}"' for w in words]
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    def search_messages(self, query: str, limit: int = 20, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Full-text search over all messages, best matches first (BM25).
 
-        cur = self.conn.cursor()
-        cur.execute(
-            "SELECT id, role, content, metadata, created_at FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
-            (session_id, n),
-        )
-        rows = cur.fetchall()
+        Args:
+            query: Free text typed by the user.
+            limit: Maximum number of results.
+            user_id: If given, only messages of sessions owned by this user.
+
+        Returns:
+            List of dicts with keys: message_id, session_id, session_name, role,
+            created_at, snippet (matched terms wrapped in ** for markdown).
+        """
+        expression = self._match_expression(query)
+        if not expression:
+            return []
+
+        sql = """
+            SELECT m.id AS message_id, m.session_id, s.name AS session_name, m.role, m.created_at,
+                   snippet(messages_fts, 0, '**', '**', '…', 12) AS snippet
+            FROM messages_fts
+            JOIN messages m ON m.id = messages_fts.rowid
+            JOIN sessions s ON s.id = m.session_id
+            WHERE messages_fts MATCH ?
+        """
+        params: List[Any] = [expression]
+        if user_id is not None:
+            sql += " AND s.user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY bm25(messages_fts) LIMIT ?"
+        params.append(limit)
+
+        self._wait_for_writes()
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
 
-        rows = list(rows)[::-1]
+    def get_last_n_messages(
+        self,
+        session_id: str,
+        n: int = 20,
+        before_id: Optional[int] = None,
+        decode_metadata: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the last n messages of a session in chronological order.
+
+        Args:
+            session_id: Session to read.
+            n: Window size.
+            before_id: Keyset cursor; only messages with a smaller id are returned,
+                which pages backward through the history ("load earlier messages").
+            decode_metadata: Decode the metadata JSON now. If False the raw JSON string
+                is kept and decoded on demand with `message_metadata`.
+        """
+        query = "SELECT id, role, content, metadata, created_at FROM messages WHERE session_id = ?"
+        params = [session_id]
+        if before_id is not None:
+            query += " AND id < ?"
+            params.append(before_id)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(n)
+
+        self._wait_for_writes(session_id)
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        return self._rows_to_messages(rows[::-1], decode_metadata)
+
+    def _rows_to_messages(self, rows, decode_metadata: bool) -> List[Dict[str, Any]]:
         out = []
         for r in rows:
             item = dict(r)
-            item["metadata"] = json.loads(item["metadata"]) if item["metadata"] else None
+            if decode_metadata:
+                item["metadata"] = json.loads(item["metadata"]) if item["metadata"] else None
             out.append(item)
         return out
 
+    @staticmethod
+    def message_metadata(message: Dict[str, Any]) -> Optional[dict]:
+        """
+        Return the decoded metadata of a message, decoding (and caching) it
+        on first access if it was loaded with `decode_metadata=False`.
+        """
+        metadata = message.get("metadata")
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata) if metadata else None
+            message["metadata"] = metadata
+        return metadata
+
     def close(self):
-        """Close the SQLite connection safely."""
-        try:
-            self.conn.close()
-        except Exception:
-            pass
+        """Flush pending writes and close all pooled SQLite connections safely."""
+        self.titler.close()
+        if self.writer is not None:
+            self.writer.close()
+        self.pool.close()
 
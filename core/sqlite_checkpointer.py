@@ -0,0 +1,314 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from core.sqlite_pool import SQLiteConnectionPool
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer stored in the chat SQLite database (`rag_sqlite.db`),
+    so conversation threads survive restarts and use no process memory.
+
+    Memory stays bounded:
+    - only the `keep_last` newest checkpoints of a thread are kept (older ones
+      are deleted on every `put`), since the app never time-travels;
+    - threads without a checkpoint for `ttl` seconds are deleted by `prune`,
+      which `put` runs at most once every `prune_interval` seconds.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, pool: Optional[SQLiteConnectionPool] = None,
+                 keep_last: int = 2, ttl: float = 7 * 24 * 3600, prune_interval: float = 600, serde=None):
+        """
+        Args:
+            db_path (str, optional): SQLite database. Defaults to data/database/rag_sqlite.db.
+            pool (SQLiteConnectionPool, optional): Pool to share instead of opening one.
+            keep_last (int): Checkpoints kept per thread and namespace.
+            ttl (float): Seconds of inactivity after which a thread is deleted. None keeps threads forever.
+            prune_interval (float): Minimum seconds between two TTL prunes.
+            serde: LangGraph serializer. Defaults to the JsonPlus serializer.
+        """
+        super().__init__(serde=serde)
+        self.db_path = db_path or os.path.join(project_root, "data", "database", "rag_sqlite.db")
+        self.pool = pool or SQLiteConnectionPool(self.db_path)
+        self.keep_last = keep_last
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+        self._create_schema()
+
+    def _create_schema(self):
+        with self.pool.connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS graph_checkpoints (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT,
+                    type TEXT,
+                    checkpoint BLOB,
+                    metadata_type TEXT,
+                    metadata BLOB,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS graph_writes (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    type TEXT,
+                    value BLOB,
+                    task_path TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_graph_checkpoints_updated_at ON graph_checkpoints(updated_at)")
+            conn.commit()
+
+    # ---------- Reads ----------
+    def _row_to_tuple(self, conn, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = row["thread_id"], row["checkpoint_ns"], row["checkpoint_id"]
+        writes = conn.execute(
+            """
+            SELECT task_id, channel, type, value FROM graph_writes
+            WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+            ORDER BY task_id, idx
+            """,
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        parent_id = row["parent_checkpoint_id"]
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=self.serde.loads_typed((row["type"], row["checkpoint"])),
+            metadata=self.serde.loads_typed((row["metadata_type"], row["metadata"])),
+            parent_config=({"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id,
+            }} if parent_id else None),
+            pending_writes=[
+                (w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["value"]))) for w in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the checkpoint of `config` (the newest of the thread if it has no checkpoint_id)."""
+        configurable = config["configurable"]
+        params = [configurable["thread_id"], configurable.get("checkpoint_ns", "")]
+        query = "SELECT * FROM graph_checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self.pool.connection() as conn:
+            row = conn.execute(query, params).fetchone()
+            return self._row_to_tuple(conn, row) if row else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, optionally of one thread, matching metadata `filter`."""
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before is not None and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+
+        query = "SELECT * FROM graph_checkpoints"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+            results = []
+            for row in rows:
+                item = self._row_to_tuple(conn, row)
+                if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                    continue
+                results.append(item)
+                if limit is not None and len(results) >= limit:
+                    break
+        yield from results
+
+    # ---------- Writes ----------
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        """Store a checkpoint and drop the thread's checkpoints beyond `keep_last`."""
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.pool.connection() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO graph_checkpoints
+                    (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                     type, checkpoint, metadata_type, metadata, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (thread_id, checkpoint_ns, checkpoint["id"], configurable.get("checkpoint_id"),
+                 type_, data, metadata_type, metadata_data, time.time()),
+            )
+            if self.keep_last:
+                self._trim_thread(conn, thread_id, checkpoint_ns)
+            conn.commit()
+
+        self._maybe_prune()
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"],
+        }}
+
+    def _trim_thread(self, conn, thread_id: str, checkpoint_ns: str):
+        kept = """
+            SELECT checkpoint_id FROM graph_checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ?
+            ORDER BY checkpoint_id DESC LIMIT ?
+        """
+        params = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last)
+        conn.execute(
+            f"DELETE FROM graph_checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({kept})",
+            params,
+        )
+        conn.execute(
+            f"DELETE FROM graph_writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({kept})",
+            params,
+        )
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        """Store the pending writes of a task against a checkpoint."""
+        configurable = config["configurable"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self.serde.dumps_typed(value)
+            rows.append((configurable["thread_id"], configurable.get("checkpoint_ns", ""),
+                         configurable["checkpoint_id"], task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, type_, data, task_path))
+        # special writes (errors, interrupts) replace earlier ones; regular writes are kept once
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        with self.pool.connection() as conn:
+            conn.executemany(
+                f"""
+                {verb} INTO graph_writes
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of a thread."""
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM graph_checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM graph_writes WHERE thread_id = ?", (thread_id,))
+            conn.commit()
+
+    def prune(self, ttl: Optional[float] = None) -> int:
+        """
+        Delete threads whose newest checkpoint is older than `ttl` seconds.
+
+        Returns:
+            int: Number of deleted threads.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is None:
+            return 0
+        cutoff = time.time() - ttl
+        with self.pool.connection() as conn:
+            expired = [r[0] for r in conn.execute(
+                """
+                SELECT thread_id FROM graph_checkpoints
+                GROUP BY thread_id
+                HAVING MAX(updated_at) < ?
+                """,
+                (cutoff,),
+            ).fetchall()]
+            ids = [(thread_id,) for thread_id in expired]
+            conn.executemany("DELETE FROM graph_checkpoints WHERE thread_id = ?", ids)
+            conn.executemany("DELETE FROM graph_writes WHERE thread_id = ?", ids)
+            conn.commit()
+        return len(expired)
+
+    def _maybe_prune(self):
+        now = time.time()
+        if now - self._last_prune < self.prune_interval or not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_prune = now
+            deleted = self.prune()
+            if deleted:
+                print(f"Pruned {deleted} expired conversation threads")
+        except Exception as e:
+            print(f"Checkpoint pruning failed: {e}")
+        finally:
+            self._prune_lock.release()
+
+    # ---------- Async API (run the sync methods in the default executor) ----------
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.put_writes, config, writes, task_id, task_path
+        )
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.delete_thread, thread_id)
@@ -0,0 +1,268 @@
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.sqlite_chat_storage import SQLiteChatStorage
+
+
+class RetentionPolicy:
+    """
+    How long chat data stays in `rag_sqlite.db`.
+
+    Attributes:
+        archive_after_days (int | None): Sessions without activity for this many days are
+            moved to the compressed JSONL archive. None keeps every session.
+        archive_retention_days (int | None): Archive files older than this are deleted.
+            None keeps archives forever.
+        empty_session_min_age (int): Seconds an empty session is kept before cleanup, so
+            sessions just opened by users are not deleted under them.
+        batch_size (int): Sessions archived per transaction.
+    """
+
+    def __init__(self, archive_after_days: Optional[int] = 90, archive_retention_days: Optional[int] = None,
+                 empty_session_min_age: int = 3600, batch_size: int = 200):
+        self.archive_after_days = archive_after_days
+        self.archive_retention_days = archive_retention_days
+        self.empty_session_min_age = empty_session_min_age
+        self.batch_size = batch_size
+
+
+class SQLiteMaintenance:
+    """
+    Periodic maintenance of the chat database, run off the request path:
+
+    - removes empty sessions (indexed, older than the policy's minimum age),
+    - archives inactive sessions to `archive/sessions-YYYYMMDD.jsonl.gz` and deletes them,
+    - returns free pages to the file system with incremental VACUUM,
+    - refreshes query planner statistics with ANALYZE (`PRAGMA optimize`).
+    """
+
+    def __init__(self, storage: SQLiteChatStorage, policy: Optional[RetentionPolicy] = None,
+                 archive_dir: Optional[str] = None, interval: float = 3600, vacuum_pages: int = 1000):
+        """
+        Args:
+            storage (SQLiteChatStorage): Storage whose database is maintained.
+            policy (RetentionPolicy, optional): Retention settings. Defaults to `RetentionPolicy()`.
+            archive_dir (str, optional): Archive folder. Defaults to data/database/archive.
+            interval (float): Seconds between two runs of the background thread.
+            vacuum_pages (int): Maximum free pages released per run.
+        """
+        self.storage = storage
+        self.policy = policy or RetentionPolicy()
+        self.archive_dir = archive_dir or os.path.join(project_root, "data", "database", "archive")
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _result(value):
+        # storage writes return a Future when write-behind is enabled
+        return value.result() if hasattr(value, "result") else value
+
+    def incremental_vacuum_enabled(self) -> bool:
+        """Whether the database is in `auto_vacuum=INCREMENTAL` mode."""
+        with self.storage.pool.connection() as conn:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    def ensure_incremental_vacuum(self) -> bool:
+        """
+        Switch the database to `auto_vacuum=INCREMENTAL`. Databases created without it
+        need one full VACUUM to convert, which is done here once. The VACUUM rewrites
+        the whole file and blocks every writer meanwhile, so it is only run from the
+        command line (`python core/sqlite_maintenance.py`), never by `start()`.
+
+        Returns:
+            bool: True if the database was converted by this call.
+        """
+        with self.storage.pool.connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        print("Converted chat database to incremental auto-vacuum")
+        return True
+
+    def cleanup_empty_sessions(self) -> int:
+        """Delete empty sessions older than the policy's minimum age."""
+        return self._result(self.storage.delete_empty_sessions(self.policy.empty_session_min_age))
+
+    def _inactive_sessions(self, conn, limit: int) -> List[dict]:
+        cutoff = f"-{int(self.policy.archive_after_days)} days"
+        rows = conn.execute(
+            """
+            SELECT id, name, user_id, created_at
+            FROM sessions
+            WHERE created_at < datetime('now', ?)
+              AND NOT EXISTS (
+                  SELECT 1 FROM messages m
+                  WHERE m.session_id = sessions.id AND m.created_at >= datetime('now', ?)
+              )
+            ORDER BY created_at, id
+            LIMIT ?
+            """,
+            (cutoff, cutoff, limit),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def _archive_path(self) -> str:
+        day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        return os.path.join(self.archive_dir, f"sessions-{day}.jsonl.gz")
+
+    def archive_inactive_sessions(self) -> int:
+        """
+        Move sessions inactive for `archive_after_days` to the compressed JSONL archive,
+        one session (with its messages) per line. A batch is deleted from the database
+        only after it has been written and synced to the archive, except the sessions
+        that received a message in the meantime.
+
+        Returns:
+            int: Number of archived sessions.
+        """
+        if self.policy.archive_after_days is None:
+            return 0
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived = 0
+        while not self._stop.is_set():
+            with self.storage.pool.connection() as conn:
+                sessions = self._inactive_sessions(conn, self.policy.batch_size)
+                for session in sessions:
+                    rows = conn.execute(
+                        "SELECT id, role, content, metadata, created_at FROM messages "
+                        "WHERE session_id = ? ORDER BY id ASC",
+                        (session["id"],),
+                    ).fetchall()
+                    session["messages"] = [dict(r) for r in rows]
+            if not sessions:
+                break
+
+            # gzip files may hold several members: appending keeps earlier batches intact
+            with open(self._archive_path(), "ab") as f:
+                with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                    for session in sessions:
+                        gz.write((json.dumps(session, ensure_ascii=False) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+
+            # a session written to since it was read stays in the database (and is archived
+            # again, with its new messages, once it is inactive)
+            deleted = self._result(self.storage.delete_archived_sessions(
+                {s["id"]: max((m["id"] for m in s["messages"]), default=0) for s in sessions}
+            ))
+            archived += deleted
+            if deleted < len(sessions):
+                # the skipped sessions are active again and will not be listed by the next batch
+                print(f"Archiving: {len(sessions) - deleted} sessions received new messages and were kept")
+        return archived
+
+    def purge_old_archives(self) -> int:
+        """Delete archive files older than `archive_retention_days`."""
+        if self.policy.archive_retention_days is None or not os.path.isdir(self.archive_dir):
+            return 0
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.policy.archive_retention_days)
+        removed = 0
+        for file_name in os.listdir(self.archive_dir):
+            if not (file_name.startswith("sessions-") and file_name.endswith(".jsonl.gz")):
+                continue
+            try:
+                day = datetime.strptime(file_name[len("sessions-"):-len(".jsonl.gz")], "%Y%m%d")
+            except ValueError:
+                continue
+            if day.replace(tzinfo=timezone.utc) < cutoff:
+                os.remove(os.path.join(self.archive_dir, file_name))
+                removed += 1
+        return removed
+
+    def vacuum(self) -> int:
+        """
+        Release up to `vacuum_pages` free pages.
+
+        Returns:
+            int: Number of free pages before the incremental vacuum.
+        """
+        with self.storage.pool.connection() as conn:
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages:
+                # executescript steps the pragma to completion; execute() frees a single page
+                conn.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});")
+            # move the WAL back into the database file so it does not grow either
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return free_pages
+
+    def analyze(self):
+        """Refresh the planner statistics of tables whose contents changed."""
+        with self.storage.pool.connection() as conn:
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("PRAGMA optimize")
+
+    def run_once(self) -> dict:
+        """Run every maintenance job once and return what each one did."""
+        start = time.perf_counter()
+        report = {
+            "empty_sessions_deleted": self.cleanup_empty_sessions(),
+            "sessions_archived": self.archive_inactive_sessions(),
+            "archives_purged": self.purge_old_archives(),
+            "free_pages": self.vacuum(),
+        }
+        self.analyze()
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        print(f"Chat database maintenance: {report}")
+        return report
+
+    def _run(self):
+        try:
+            if not self.incremental_vacuum_enabled():
+                print("Chat database free pages are not released: run `python core/sqlite_maintenance.py` "
+                      "once (while the app is stopped) to enable incremental auto-vacuum")
+        except Exception as e:
+            print(f"Could not read the auto-vacuum mode: {e}")
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Chat database maintenance failed: {e}")
+
+    def start(self):
+        """Run maintenance every `interval` seconds in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="sqlite-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run chat database maintenance once "
+                                                 "(converting the database to incremental auto-vacuum if needed).")
+    parser.add_argument("--db-path", default=None, help="SQLite database (defaults to data/database/rag_sqlite.db)")
+    parser.add_argument("--archive-after-days", type=int, default=90)
+    parser.add_argument("--archive-retention-days", type=int, default=None)
+    parser.add_argument("--empty-session-min-age", type=int, default=3600, help="seconds")
+    args = parser.parse_args()
+
+    storage = SQLiteChatStorage(args.db_path, write_behind=False)
+    maintenance = SQLiteMaintenance(storage, RetentionPolicy(
+        archive_after_days=args.archive_after_days,
+        archive_retention_days=args.archive_retention_days,
+        empty_session_min_age=args.empty_session_min_age,
+    ))
+    maintenance.ensure_incremental_vacuum()
+    maintenance.run_once()
+    storage.close()
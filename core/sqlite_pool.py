@@ -0,0 +1,82 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteConnectionPool:
+    """
+    A small, thread-safe pool of SQLite connections to one database file.
+
+    - The database runs in WAL mode, so readers never block the writer and
+      commits only fsync at checkpoints (`synchronous=NORMAL`).
+    - A connection is used by one thread at a time: it is checked out for the
+      duration of an operation and returned afterwards, so any number of
+      Streamlit script threads can share the pool safely.
+    """
+
+    def __init__(self, db_path: str, size: int = 8, timeout: float = 30.0):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file.
+            size (int): Maximum number of open connections.
+            timeout (float): Seconds to wait on a locked database before failing.
+        """
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._opened = 1
+        self._lock = threading.Lock()
+
+        # journal_mode is persistent: set it once for the database file
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._idle.put(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_grow = self._opened < self.size
+            if can_grow:
+                self._opened += 1
+        if can_grow:
+            return self._connect()
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for one operation. An open transaction is
+        rolled back if the operation raises.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Close every connection of the pool."""
+        with self._lock:
+            connections, self._all = self._all, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
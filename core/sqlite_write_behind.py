@@ -0,0 +1,179 @@
+import time
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from core.sqlite_pool import SQLiteConnectionPool
+
+
+class _WriteOp:
+    __slots__ = ("op", "prepare", "session_id", "future")
+
+    def __init__(self, op, prepare, session_id):
+        self.op = op
+        self.prepare = prepare
+        self.session_id = session_id
+        self.future = Future()
+
+
+class WriteBehindQueue:
+    """
+    Write-behind queue for SQLite: writes from every session are queued and
+    committed by one background thread in batched transactions, so commit
+    (fsync) latency stays off the caller's path.
+
+    - Writes are applied in submission order.
+    - `wait(session_id)` blocks until the pending writes of a session are
+      committed, which gives readers read-your-writes for that session.
+    - `flush()` / `close()` drain the queue (called on shutdown).
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool, max_batch: int = 256, max_delay: float = 0.05):
+        """
+        Args:
+            pool (SQLiteConnectionPool): Pool the writer borrows its connection from.
+            max_batch (int): Maximum number of writes committed in one transaction.
+            max_delay (float): Seconds the writer waits for more writes before committing a batch.
+        """
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._pending = Counter()
+        self._cond = threading.Condition()
+        self._urgent = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="sqlite-write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, op: Callable, session_id: Optional[str] = None,
+               prepare: Optional[Callable] = None) -> Future:
+        """
+        Queue a write.
+
+        Args:
+            op (Callable): `op(conn, prepared)` executing the statements; its return value resolves the future.
+            session_id (str, optional): Session the write belongs to (for `wait`).
+            prepare (Callable, optional): Expensive computation run by the writer thread before
+                the transaction starts (e.g. model inference); its result is passed to `op`.
+
+        Returns:
+            Future: Resolves to the return value of `op` once committed.
+        """
+        if self._closed:
+            raise RuntimeError("WriteBehindQueue is closed")
+        item = _WriteOp(op, prepare, session_id)
+        with self._cond:
+            self._pending[session_id] += 1
+            self._pending["__all__"] += 1
+        self._queue.put(item)
+        return item.future
+
+    def wait(self, session_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the queued writes of `session_id` (all writes if None) are committed.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        key = "__all__" if session_id is None else session_id
+        with self._cond:
+            if self._pending[key] == 0:
+                return True
+            self._urgent.set()
+            return self._cond.wait_for(lambda: self._pending[key] == 0, timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued write is committed."""
+        return self.wait(None, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush the queue and stop the writer thread."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _collect_batch(self, first: _WriteOp) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and not self._urgent.is_set():
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect_batch(first)
+            self._urgent.clear()
+
+            prepared = []
+            for item in batch:
+                try:
+                    prepared.append(item.prepare() if item.prepare else None)
+                except Exception as e:
+                    prepared.append(e)
+
+            try:
+                results = self._commit(batch, prepared)
+            except Exception as e:
+                # never let the writer thread die with readers waiting on it
+                print(f"Write-behind batch failed: {e}")
+                results = [(False, e)] * len(batch)
+            with self._cond:
+                for item, (ok, value) in zip(batch, results):
+                    if ok:
+                        item.future.set_result(value)
+                    else:
+                        item.future.set_exception(value)
+                    for key in (item.session_id, "__all__"):
+                        self._pending[key] -= 1
+                        if not self._pending[key]:
+                            # a missing key counts 0: sessions without queued writes take no memory
+                            del self._pending[key]
+                self._cond.notify_all()
+
+    def _commit(self, batch: list, prepared: list) -> list:
+        """Run a batch in one transaction; on failure replay it one write at a time."""
+        with self.pool.connection() as conn:
+            try:
+                results = []
+                for item, value in zip(batch, prepared):
+                    if isinstance(value, Exception):
+                        raise value
+                    results.append((True, item.op(conn, value)))
+                conn.commit()
+                return results
+            except Exception:
+                conn.rollback()
+
+            results = []
+            for item, value in zip(batch, prepared):
+                try:
+                    if isinstance(value, Exception):
+                        raise value
+                    result = item.op(conn, value)
+                    conn.commit()
+                    results.append((True, result))
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Write-behind operation failed: {e}")
+                    results.append((False, e))
+            return results
@@ -0,0 +1,203 @@
+import os
+import sys
+from functools import lru_cache
+
+from langchain.docstore.document import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from transformers import AutoTokenizer
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.university_index import university_metadata
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+# all-MiniLM-L6-v2 truncates its input at 256 word pieces: longer chunks are only partly embedded
+MAX_TOKENS = 256
+OVERLAP_TOKENS = 20
+TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+SECTION_TYPES = ("overview", "stats", "faculty", "contacts")
+
+
+def stats_text(university):
+    return (
+        f"research centers availability: {university['research_centers_availability']}\n\n"
+        f"number of students: {university['number_of_students']}\n\n"
+        f"number of staff: {university['number_of_staff']}\n\n"
+        f"gender: {university['gender']}\n\n"
+        f"rating: {university['rating']}\n\n"
+        f"type: {university['type']}"
+    )
+
+
+def contacts_text(university):
+    contacts = university['contact_info']
+    return "; ".join(f"{c['contact_name']}: {c['contact_info']}" for c in contacts)
+
+
+def flatten_university(university):
+    """
+    Flatten a processed university record into one text, in the layout of
+    flattened_universities.json: overview, stats, faculties, then contacts.
+    """
+    faculties = [
+        f"{f['name']} at {university['university_name']}: {f['about']}"
+        for f in university['faculties']
+    ]
+    faculty_text = "\n".join(faculties)
+    return (
+        f"{university['university_name']}: {university['about']}\n\n"
+        f"{stats_text(university)}\n\n"
+        f"{faculty_text}\n\n"
+        f"Contact information for {university['university_name']}: {contacts_text(university)}"
+    )
+
+
+class RecursiveChunker:
+    """
+    Character-based splitting of the flattened text of each university with
+    LangChain's `RecursiveCharacterTextSplitter`. Records may be cut anywhere.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+
+    def split(self, universities):
+        """
+        Args:
+            universities (list[dict]): Processed university records.
+
+        Returns:
+            list[Document]: The chunks, in university order.
+        """
+        all_chunks = []
+        for university in universities:
+            chunks = self.text_splitter.create_documents(
+                [flatten_university(university)],
+                metadatas=[university_metadata(university)]
+            )
+            all_chunks.extend(chunks)
+        return all_chunks
+
+
+@lru_cache(maxsize=4)
+def load_tokenizer(name=TOKENIZER_NAME):
+    return AutoTokenizer.from_pretrained(name)
+
+
+class StructureChunker:
+    """
+    One chunk per logical section of a university: overview, stats, each
+    faculty and contacts. Every chunk carries a `section` metadata field (and
+    `faculty_name` for faculties) and starts with a header naming the
+    university, so it can be understood on its own.
+
+    Sections longer than `max_tokens` word pieces of the embedding tokenizer are
+    split on word boundaries; every piece repeats the section header and
+    overlaps the previous one by `overlap_tokens`.
+    """
+
+    def __init__(self, max_tokens=MAX_TOKENS, overlap_tokens=OVERLAP_TOKENS, tokenizer=TOKENIZER_NAME):
+        """
+        Args:
+            max_tokens (int): Maximum word pieces per chunk, header included.
+            overlap_tokens (int): Word pieces repeated at the start of a continuation piece.
+            tokenizer (str | callable): Hugging Face tokenizer name, or a function
+                returning the number of tokens of a string.
+        """
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        if callable(tokenizer):
+            self.count_tokens = tokenizer
+        else:
+            hf_tokenizer = load_tokenizer(tokenizer)
+            self.count_tokens = lambda text: len(hf_tokenizer.tokenize(text))
+        self._word_tokens = {}
+
+    def sections(self, university):
+        """(section type, header, body, extra metadata) of every section of a university."""
+        name = university['university_name']
+        yield "overview", f"{name}:", university['about'], {}
+        yield "stats", f"{name} facts:", stats_text(university), {}
+        for faculty in university['faculties']:
+            yield "faculty", f"{faculty['name']} at {name}:", faculty['about'], {"faculty_name": faculty['name']}
+        if university['contact_info']:
+            yield "contacts", f"Contact information for {name}:", contacts_text(university), {}
+
+    def _tokens(self, word):
+        count = self._word_tokens.get(word)
+        if count is None:
+            count = self._word_tokens[word] = self.count_tokens(word)
+        return count
+
+    def _pieces(self, header, body):
+        """Split `body` so that header + piece fits in `max_tokens`."""
+        text = f"{header} {body}"
+        if self.count_tokens(text) <= self.max_tokens:
+            return [text]
+
+        budget = max(self.max_tokens - self.count_tokens(header), 1)
+        # keep line breaks (stats, contacts) by splitting on spaces only
+        words = body.split(" ")
+        pieces, start = [], 0
+        while start < len(words):
+            end, used = start, 0
+            while end < len(words) and (end == start or used + self._tokens(words[end]) <= budget):
+                used += self._tokens(words[end])
+                end += 1
+            pieces.append(f"{header} {' '.join(words[start:end])}")
+            if end >= len(words):
+                break
+            # step back over `overlap_tokens` worth of words, always moving forward
+            back, overlap = end, 0
+            while back - 1 > start and overlap + self._tokens(words[back - 1]) <= self.overlap_tokens:
+                back -= 1
+                overlap += self._tokens(words[back])
+            start = back
+        return pieces
+
+    def split(self, universities):
+        """
+        Args:
+            universities (list[dict]): Processed university records.
+
+        Returns:
+            list[Document]: The chunks, in university and section order.
+        """
+        all_chunks = []
+        for university in universities:
+            for section, header, body, extra in self.sections(university):
+                pieces = self._pieces(header, body)
+                for i, piece in enumerate(pieces):
+                    metadata = {**university_metadata(university), "section": section, **extra}
+                    if len(pieces) > 1:
+                        metadata["part"] = i + 1
+                    all_chunks.append(Document(page_content=piece, metadata=metadata))
+        return all_chunks
+
+
+CHUNKERS = {"recursive": RecursiveChunker, "structure": StructureChunker}
+
+
+def build_chunker(strategy="recursive", **options):
+    """
+    Args:
+        strategy (str): "recursive" (character splitter) or "structure" (one chunk per section).
+        **options: Arguments of the chunker class (chunk_size / chunk_overlap, or max_tokens / overlap_tokens).
+
+    Returns:
+        RecursiveChunker | StructureChunker
+    """
+    if strategy not in CHUNKERS:
+        raise ValueError(f"Unknown chunking strategy '{strategy}', expected one of {sorted(CHUNKERS)}")
+    return CHUNKERS[strategy](**options)
@@ -0,0 +1,126 @@
+import re
+from typing import Callable, Iterable, List, Optional
+
+# Compiled once at import time and shared by every caller
+ARABIC_PATTERN = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]+')
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s']")
+
+
+class _PunctuationTable(dict):
+    """
+    `str.translate` table deleting every character matched by PUNCTUATION_PATTERN.
+    Code points are classified with the regex the first time they are seen and
+    memoized, so deletion runs as a single C-level pass per string.
+    """
+
+    def __missing__(self, code_point: int):
+        value = None if PUNCTUATION_PATTERN.match(chr(code_point)) else code_point
+        self[code_point] = value
+        return value
+
+
+PUNCTUATION_TABLE = _PunctuationTable()
+
+
+def is_arabic(text: str) -> bool:
+    """Return True if the string contains Arabic characters."""
+    return ARABIC_PATTERN.search(text) is not None
+
+
+def remove_punctuation(text: str) -> str:
+    """Remove all punctuation from a string, except apostrophes."""
+    return text.translate(PUNCTUATION_TABLE)
+
+
+def removing_extra_whitespace(text: str) -> str:
+    """Drop newlines and collapse runs of whitespace into single spaces."""
+    return ' '.join(text.replace('\n', '').split())
+
+
+class TextNormalizer:
+    """
+    TextNormalizer applies the cleaning steps used by `TextProcessor` in a single
+    fused pass per string: translate -> whitespace -> lowercase -> punctuation.
+
+    Steps can be switched off per call so every field of the university records
+    keeps its original cleaning recipe. `clean_many` works on whole columns of
+    strings and sends all Arabic strings to the translator in one batch.
+
+    Attributes:
+        translator (Callable[[list[str]], list[str]] | None): Batch translator
+            applied to strings containing Arabic characters.
+    """
+
+    def __init__(self, translator: Optional[Callable[[List[str]], List[str]]] = None):
+        self.translator = translator
+
+    @staticmethod
+    def _fused_pass(whitespace: bool, lowercase: bool, punctuation: bool) -> Callable[[str], str]:
+        """Build the single-string clean function for a combination of steps."""
+        if whitespace and lowercase and punctuation:
+            return lambda text: ' '.join(text.replace('\n', '').split()).lower().translate(PUNCTUATION_TABLE)
+
+        def clean(text: str) -> str:
+            if whitespace:
+                text = ' '.join(text.replace('\n', '').split())
+            if lowercase:
+                text = text.lower()
+            if punctuation:
+                text = text.translate(PUNCTUATION_TABLE)
+            return text
+        return clean
+
+    def _translate_column(self, texts: List[str]) -> List[str]:
+        """Translate the Arabic strings of a column, each distinct string only once."""
+        pending = list(dict.fromkeys(t for t in texts if ARABIC_PATTERN.search(t)))
+        if not pending:
+            return texts
+        translated = dict(zip(pending, self.translator(pending)))
+        return [translated.get(t, t) for t in texts]
+
+    def clean(self, text: str, translate: bool = True, whitespace: bool = True,
+              lowercase: bool = True, punctuation: bool = True) -> str:
+        """
+        Clean a single string.
+
+        Args:
+            text (str): Input string.
+            translate (bool): Translate Arabic text first (requires a translator).
+            whitespace (bool): Drop newlines and collapse whitespace.
+            lowercase (bool): Convert to lowercase.
+            punctuation (bool): Remove punctuation except apostrophes.
+
+        Returns:
+            str: Cleaned string.
+        """
+        return self.clean_many([text], translate, whitespace, lowercase, punctuation)[0]
+
+    def clean_many(self, texts: Iterable[str], translate: bool = True, whitespace: bool = True,
+                   lowercase: bool = True, punctuation: bool = True) -> List[str]:
+        """
+        Clean a whole column of strings at once.
+
+        Args:
+            texts (Iterable[str]): Input strings.
+            translate, whitespace, lowercase, punctuation (bool): Steps to apply, see `clean`.
+
+        Returns:
+            list[str]: Cleaned strings, in input order.
+        """
+        texts = list(texts)
+        if translate and self.translator is not None:
+            texts = self._translate_column(texts)
+        return list(map(self._fused_pass(whitespace, lowercase, punctuation), texts))
+
+    def normalize_column(self, records: List[dict], field: str, **steps) -> None:
+        """
+        Clean `field` in-place on every record of a list of dicts.
+
+        Args:
+            records (list[dict]): Records holding the field.
+            field (str): Key of the string field to clean.
+            **steps: Step switches forwarded to `clean_many`.
+        """
+        cleaned = self.clean_many((r[field] for r in records), **steps)
+        for record, value in zip(records, cleaned):
+            record[field] = value
@@ -1,10 +1,8 @@
-import re
 import json
 import os 
 import sys
 from langdetect import detect
 from langchain.docstore.document import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from transformers import MarianMTModel, MarianTokenizer
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
@@ -14,6 +12,10 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+from core import text_normalizer
+from core.text_normalizer import TextNormalizer
+from core.text_chunker import build_chunker, flatten_university, university_metadata
+
 
 class TextProcessor():
     """
@@ -29,6 +31,8 @@ class TextProcessor():
         model_name = "Helsinki-NLP/opus-mt-ar-en"
         self.tokenizer = MarianTokenizer.from_pretrained(model_name)
         self.model = MarianMTModel.from_pretrained(model_name)
+        self.translation_batch_size = 16
+        self.normalizer = TextNormalizer(translator=self.translate_batch)
 
         # Data containers
         self.universities_data = []
@@ -57,7 +61,7 @@ class TextProcessor():
         Returns:
             str: Cleaned string.
         """
-        return re.sub(r"[^\w\s']", '', text)
+        return text_normalizer.remove_punctuation(text)
 
     def removing_extra_whitespace(self, text):
         """
@@ -69,7 +73,7 @@ class TextProcessor():
         Returns:
             str: Normalized string.
         """
-        return ' '.join(text.replace('\n', '').split())
+        return text_normalizer.removing_extra_whitespace(text)
     
     def is_arabic(self, text: str) -> bool:
         """
@@ -81,8 +85,7 @@ class TextProcessor():
         Returns:
             bool: True if Arabic characters are found.
         """
-        arabic_pattern = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]+')
-        return arabic_pattern.search(text)
+        return text_normalizer.is_arabic(text)
 
     def translate_if_arabic(self, text: str) -> str:
         """
@@ -104,39 +107,84 @@ class TextProcessor():
             print(f"Translation failed for: {text[:50]}... Error: {e}")
             return text
         
-    def normalization(self):
+    def translate_batch(self, texts: list) -> list:
+        """
+        Translate a list of Arabic strings to English with MarianMT,
+        `translation_batch_size` strings per forward pass.
+
+        Args:
+            texts (list[str]): Strings to translate.
+
+        Returns:
+            list[str]: Translated strings (originals are kept for failed batches).
+        """
+        translated = []
+        for start in range(0, len(texts), self.translation_batch_size):
+            batch = texts[start:start + self.translation_batch_size]
+            try:
+                inputs = self.tokenizer(batch, return_tensors="pt", padding=True)
+                outputs = self.model.generate(**inputs)
+                translated.extend(self.tokenizer.batch_decode(outputs, skip_special_tokens=True))
+            except Exception as e:
+                print(f"Translation failed for batch starting with: {batch[0][:50]}... Error: {e}")
+                translated.extend(batch)
+        return translated
+
+    def normalization(self, only_universities=None):
         """
         Load raw data and normalize it:
         - Translate Arabic text to English.
         - Remove punctuation and extra whitespace.
         - Convert text to lowercase.
+
+        Each field is cleaned as a whole column across all universities
+        (one fused pass per string, one translation batch per column).
+
+        Args:
+            only_universities (list[str], optional): Names of the universities to
+                re-process (e.g. the "changed" list of `scrape_delta.json`). Records of
+                other universities are reused from the existing processed file.
         """
         self.universities_data  = self.load_data(self.full_path_of_raw_data)
-        for university in self.universities_data:
+        universities = self.universities_data
+
+        processed_path = os.path.join(self.full_path_of_processed_folder, "processed_universities_data.json")
+        previous = {}
+        if only_universities is not None and os.path.exists(processed_path):
+            previous = {u['university_name']: u for u in self.load_data(processed_path)}
+            wanted = {name.strip().lower() for name in only_universities}
+            universities = [
+                u for u in universities
+                if u['university_name'].strip().lower() in wanted
+                or u['university_name'].strip().lower() not in previous
+            ]
+        faculties = [faculty for university in universities for faculty in university['faculties']]
+        contacts = [contact for university in universities for contact in university['contact_info']]
+        normalizer = self.normalizer
+
+        for university in universities:
             university['university_name'] = university['university_name'].strip().lower()
 
-            university['about'] = self.translate_if_arabic(university['about'])
-            university['about'] = self.removing_extra_whitespace(university['about']).lower()
-            university['about'] = self.remove_punctuation(university['about'])
-            
-            university['research_centers_availability'] = university['research_centers_availability'].lower()
-            university['gender'] = university['gender'].lower()
-            university['rating'] = self.remove_punctuation(university['rating'])
-
-            for faculty in university['faculties']:
-                faculty['name'] = self.translate_if_arabic(faculty['name'])
-                faculty['name'] = self.removing_extra_whitespace(faculty['name']).lower()
-                faculty['name'] = self.remove_punctuation(faculty['name'])
-
-                faculty['about'] = self.translate_if_arabic(faculty['about'])
-                faculty['about'] = self.removing_extra_whitespace(faculty['about']).lower()
-                faculty['about'] = self.remove_punctuation(faculty['about'])
-                
-            for contact in university['contact_info']:
-                contact['contact_name'] = self.translate_if_arabic(contact['contact_name'])
-                contact['contact_name'] = self.remove_punctuation(contact['contact_name']).lower()
-                contact['contact_info'] = self.translate_if_arabic(contact['contact_info'])
-                contact['contact_info'] = self.removing_extra_whitespace(contact['contact_info']).lower()
+        normalizer.normalize_column(universities, 'about')
+        normalizer.normalize_column(universities, 'research_centers_availability',
+                                    translate=False, whitespace=False, punctuation=False)
+        normalizer.normalize_column(universities, 'gender',
+                                    translate=False, whitespace=False, punctuation=False)
+        normalizer.normalize_column(universities, 'rating',
+                                    translate=False, whitespace=False, lowercase=False)
+
+        normalizer.normalize_column(faculties, 'name')
+        normalizer.normalize_column(faculties, 'about')
+
+        normalizer.normalize_column(contacts, 'contact_name', whitespace=False)
+        normalizer.normalize_column(contacts, 'contact_info', punctuation=False)
+
+        if previous:
+            fresh = {u['university_name']: u for u in universities}
+            self.universities_data = [
+                fresh.get(name) or previous[name]
+                for name in (u['university_name'].strip().lower() for u in self.universities_data)
+            ]
 
         self.save_data_into_processed_folder(self.universities_data, "processed_universities_data.json")
         
@@ -150,37 +198,9 @@ class TextProcessor():
         flattened = []
 
         for university in self.universities_processed_data:
-            # Flatten faculties
-            faculties = [
-                f"{f['name']} at {university['university_name']}: {f['about']}"
-                for f in university['faculties']
-            ]
-            faculty_text = "\n".join(faculties)
-
-            # Flatten contact info
-            contacts = university['contact_info']
-            contact_texts = [f"{c['contact_name']}: {c['contact_info']}" for c in contacts]
-            contact_text = "; ".join(contact_texts)
-
-            # Build flattened text
             flattened.append({
-                "text": (
-                    f"{university['university_name']}: {university['about']}\n\n"
-                    f"research centers availability: {university['research_centers_availability']}\n\n"
-                    f"number of students: {university['number_of_students']}\n\n"
-                    f"number of staff: {university['number_of_staff']}\n\n"
-                    f"gender: {university['gender']}\n\n"
-                    f"rating: {university['rating']}\n\n"
-                    f"type: {university['type']}\n\n"
-                    f"{faculty_text}\n\n"
-                    f"Contact information for {university['university_name']}: {contact_text}"
-                ),
-                "metadata": {
-                    "university_name": university["university_name"],
-                    "source": "https://www.universitiesegypt.com/",
-                    "scrapping_date": "28-9-2025",
-                    "type": university['type']
-                }
+                "text": flatten_university(university),
+                "metadata": university_metadata(university)
             })
 
             # Save each university as a TXT file
@@ -189,27 +209,21 @@ class TextProcessor():
         # Save the flattened JSON
         self.save_data_into_processed_folder(flattened, "flattened_universities.json")
 
-    def chunking(self):
+    def chunking(self, strategy="recursive", **options):
         """
-        Create chunks from flattened university texts for RAG.
-        Uses RecursiveCharacterTextSplitter from LangChain.
+        Create chunks from the processed university records for RAG.
+
+        Args:
+            strategy (str, optional): "recursive" splits the flattened text with LangChain's
+                RecursiveCharacterTextSplitter; "structure" emits one chunk per section
+                (overview, stats, each faculty, contacts). Defaults to "recursive".
+            **options: Chunker options, e.g. chunk_size / chunk_overlap for "recursive",
+                max_tokens / overlap_tokens for "structure".
         """
-        full_path = os.path.join(self.full_path_of_processed_folder, "flattened_universities.json")
+        full_path = os.path.join(self.full_path_of_processed_folder, "processed_universities_data.json")
         universities_data = self.load_data(full_path)
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,      
-            chunk_overlap=100 
-        )
-
-        all_chunks = []
-
-        for university in universities_data:
-            chunks = text_splitter.create_documents(
-                [university["text"]],
-                metadatas=[university["metadata"]]  
-            )
-            all_chunks.extend(chunks)
+        all_chunks = build_chunker(strategy, **options).split(universities_data)
 
         # Save chunks as JSON
         all_chunks_data = [
@@ -267,8 +281,22 @@ class TextProcessor():
             json.dump(data, f, ensure_ascii=False, indent=4)
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Normalize, flatten and chunk the scraped data.")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only re-normalize universities listed in data/raw/scrape_delta.json.")
+    parser.add_argument("--chunker", choices=["recursive", "structure"], default="recursive",
+                        help="recursive: character splitter over the flattened text; structure: one chunk per section.")
+    parser.add_argument("--max-tokens", type=int, default=None,
+                        help="Token cap per chunk of the structure chunker (defaults to the embedding model limit, 256).")
+    args = parser.parse_args()
+
     text_pr = TextProcessor()
-    text_pr.normalization()
+    changed = None
+    if args.delta:
+        changed = text_pr.load_data(os.path.join(project_root, "data", "raw", "scrape_delta.json"))["changed"]
+    text_pr.normalization(only_universities=changed)
     text_pr.flatting_json()
-    text_pr.chunking()
+    chunk_options = {"max_tokens": args.max_tokens} if args.chunker == "structure" and args.max_tokens else {}
+    text_pr.chunking(args.chunker, **chunk_options)
 
@@ -0,0 +1,167 @@
+import os
+import re
+import sys
+import json
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+PROCESSED_PATH = os.path.join(project_root, "data", "processed", "processed_universities_data.json")
+
+NON_WORD = re.compile(r"[^\w&]+")
+PARENTHESES = re.compile(r"\(([^)]*)\)")
+THOUSANDS_SEPARATOR = re.compile(r"(?<=\d),(?=\d{3}\b)")
+# "cairo and alexandria universities" -> "cairo university and alexandria university"
+COORDINATED_PLURAL = re.compile(r"\b(?!universit(?:y|ies)\b)(\w+) and ((?:\w+ ){1,3}?)universities\b")
+COORDINATED = re.compile(r"\b(?!universit(?:y|ies)\b)(\w+) and (?=(?:\w+ ){1,3}university\b)")
+# "compare cairo and alexandria": bare names joined by "and" after a comparison word
+COMPARISON_WORDS = {"compare", "comparing", "comparison", "between"}
+
+FACULTY_WORD = re.compile(r"[a-z]+")
+# words that do not identify a faculty
+FACULTY_STOP_WORDS = {"faculty", "college", "school", "institute", "of", "and", "the", "for", "at", "in"}
+
+
+def university_metadata(university):
+    """Metadata shared by every chunk of a university."""
+    return {
+        "university_name": university["university_name"],
+        "source": "https://www.universitiesegypt.com/",
+        "scrapping_date": "28-9-2025",
+        "type": university['type']
+    }
+
+
+def faculty_name_words(text: str) -> list:
+    """Words identifying a faculty, in order: "Faculty of Veterinary Medicine" -> ["veterinary", "medicine"]."""
+    return [w for w in FACULTY_WORD.findall(text.lower()) if w not in FACULTY_STOP_WORDS]
+
+
+def faculty_words(text: str) -> set:
+    return set(faculty_name_words(text))
+
+
+def normalize(text: str) -> str:
+    """Lowercase, punctuation (except & and thousands separators) replaced by spaces, single spaces."""
+    return NON_WORD.sub(" ", THOUSANDS_SEPARATOR.sub("", text.lower())).strip()
+
+
+class UniversityIndex:
+    """
+    In-memory table of the structured university records of
+    `processed_universities_data.json`, indexed by university name.
+
+    Names are matched in free text through their aliases: the full name, the
+    name without its parenthesised acronym, the acronym itself ("ejust"),
+    "university of X" / "X university" and the name without a leading "al"/"el".
+    """
+
+    def __init__(self, path: str = PROCESSED_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            universities = json.load(f)
+
+        self.records = {}
+        self.aliases = {}
+        for university in universities:
+            name = university["university_name"].strip().lower()
+            self.records[name] = university
+            for alias in self.name_aliases(name):
+                # an alias shared by two universities identifies neither
+                if self.aliases.setdefault(alias, name) != name:
+                    self.aliases[alias] = None
+        self.aliases = {alias: name for alias, name in self.aliases.items() if name}
+
+        # longest alias first, so "suez canal university" wins over "suez university"
+        alternatives = sorted(self.aliases, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(" + "|".join(re.escape(a) for a in alternatives) + r")\b")
+
+    @staticmethod
+    def name_aliases(name: str):
+        aliases = {normalize(name)}
+        acronym = PARENTHESES.search(name)
+        base = normalize(PARENTHESES.sub(" ", name))
+        if acronym:
+            aliases.add(normalize(acronym.group(1)))
+        aliases.add(base)
+        if base.endswith(" university"):
+            aliases.add("university of " + base[:-len(" university")])
+        elif base.startswith("university of "):
+            aliases.add(base[len("university of "):] + " university")
+        for alias in list(aliases):
+            for article in ("al ", "el "):
+                if alias.startswith(article):
+                    aliases.add(alias[len(article):])
+        return {a for a in aliases if a}
+
+    def prepare(self, text: str) -> str:
+        """
+        Normalized text with coordinated names spelled out ("cairo and alexandria
+        universities", "compare cairo and alexandria").
+        """
+        text = normalize(text)
+        text = COORDINATED_PLURAL.sub(r"\1 university and \2university", text)
+        text = COORDINATED.sub(r"\1 university and ", text)
+        return self.spell_out_pair(text)
+
+    def spelled_out(self, words: list):
+        """`words` if they name a university, `words` + "university" if they are a bare name, else None."""
+        name = " ".join(words)
+        if name in self.aliases:
+            return words
+        if name + " university" in self.aliases:
+            return words + ["university"]
+        return None
+
+    def spell_out_pair(self, text: str) -> str:
+        """
+        "faculties of cairo and alexandria" -> "faculties of cairo university and
+        alexandria university": the first "and" after a comparison word joining two
+        names (up to three words each), at least one of them bare. Anything else
+        is left unchanged.
+        """
+        words = text.split()
+        start = next((i for i, word in enumerate(words) if word in COMPARISON_WORDS), None)
+        if start is None:
+            return text
+        for i in range(start + 1, len(words)):
+            if words[i] != "and":
+                continue
+            for n in range(min(3, i - start - 1), 0, -1):
+                left = self.spelled_out(words[i - n:i])
+                if left:
+                    break
+            else:
+                continue
+            for m in range(min(3, len(words) - i - 1), 0, -1):
+                right = self.spelled_out(words[i + 1:i + 1 + m])
+                if right:
+                    break
+            else:
+                continue
+            if len(left) > n or len(right) > m:
+                return " ".join(words[:i - n] + left + ["and"] + right + words[i + 1 + m:])
+        return text
+
+    def find_universities(self, text: str) -> list:
+        """Names of the universities mentioned in `text`, in order of first mention."""
+        names = []
+        for match in self.pattern.finditer(self.prepare(text)):
+            name = self.aliases[match.group(1)]
+            if name not in names:
+                names.append(name)
+        return names
+
+    @staticmethod
+    def display_name(name: str) -> str:
+        """Title-cased name with an upper-case acronym: "Military Technical College (MTC)"."""
+        return PARENTHESES.sub(lambda m: f"({m.group(1).upper()})", name.title())
+
+    def record(self, name: str) -> dict:
+        """The processed record of a university."""
+        return self.records[name]
+
+    def metadata(self, name: str) -> dict:
+        """Source metadata of a university, as attached to its chunks."""
+        return university_metadata(self.records[name])
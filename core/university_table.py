@@ -0,0 +1,148 @@
+import os
+import re
+import sys
+import json
+
+import numpy as np
+
+# Add project root to sys.path for relative imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.university_index import PROCESSED_PATH, UniversityIndex, faculty_name_words, faculty_words
+
+NUMERIC_COLUMNS = ("number_of_students", "number_of_staff", "rating", "students_per_staff", "staff_per_student")
+# decimals shown for the ratio columns (counts and ratings are shown as integers)
+RATIO_DECIMALS = {"students_per_staff": 1, "staff_per_student": 3}
+CATEGORICAL_COLUMNS = ("gender", "type", "research_centers_availability")
+
+COMPARATORS = {
+    ">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+    "==": np.equal, "!=": np.not_equal,
+}
+
+
+def parse_number(value) -> float:
+    value = str(value).replace(",", "").strip()
+    return float(value) if re.fullmatch(r"\d+(\.\d+)?", value) else np.nan
+
+
+class UniversityTable:
+    """
+    Columnar in-memory table of the university records for aggregate and
+    comparison queries: one NumPy array per attribute (numeric fields parsed to
+    float64 with NaN for missing values, categorical fields as strings) plus an
+    inverted index from faculty name words to the faculties holding them.
+
+    Filters are vectorised boolean masks, sorts are `argsort`s, so every
+    query over the table runs in microseconds.
+    """
+
+    def __init__(self, path: str = PROCESSED_PATH, index: UniversityIndex = None):
+        with open(path, "r", encoding="utf-8") as f:
+            universities = json.load(f)
+
+        self.index = index or UniversityIndex(path)
+        self.names = np.array([u["university_name"].strip().lower() for u in universities], dtype=object)
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.columns = {
+            "number_of_students": np.array([parse_number(u["number_of_students"]) for u in universities]),
+            "number_of_staff": np.array([parse_number(u["number_of_staff"]) for u in universities]),
+            "rating": np.array([parse_number(u["rating"]) for u in universities]),
+        }
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = self.columns["number_of_students"] / self.columns["number_of_staff"]
+            inverse = self.columns["number_of_staff"] / self.columns["number_of_students"]
+        self.columns["students_per_staff"] = np.where(np.isfinite(ratio), np.round(ratio, 1), np.nan)
+        self.columns["staff_per_student"] = np.where(np.isfinite(inverse), np.round(inverse, 3), np.nan)
+        for column in CATEGORICAL_COLUMNS:
+            self.columns[column] = np.array([str(u[column]).strip().lower() for u in universities], dtype=object)
+
+        # faculty names per university, and word -> {(row, faculty position)}
+        self.faculties = [[f["name"].strip().lower() for f in u["faculties"]] for u in universities]
+        self.faculty_index = {}
+        for row, faculties in enumerate(self.faculties):
+            for position, faculty in enumerate(faculties):
+                for word in faculty_words(faculty):
+                    self.faculty_index.setdefault(word, set()).add((row, position))
+
+    def __len__(self):
+        return len(self.names)
+
+    def mask(self, filters) -> np.ndarray:
+        """
+        Boolean mask of the rows matching every `(column, operator, value)` filter.
+        Rows with a missing numeric value never match a numeric filter.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for column, operator, value in filters:
+            values = self.columns[column]
+            if column in NUMERIC_COLUMNS:
+                with np.errstate(invalid="ignore"):
+                    mask &= ~np.isnan(values) & COMPARATORS[operator](values, float(value))
+            else:
+                mask &= COMPARATORS[operator](values, str(value).lower())
+        return mask
+
+    def faculty_rows(self, words) -> dict:
+        """
+        Rows having a faculty whose name starts with the words (in any order), with
+        the matching faculty names: "medicine" matches the faculty of medicine (for
+        girls), not the faculty of veterinary medicine.
+        """
+        words = faculty_words(" ".join(words))
+        if not words:
+            return {}
+        hits = set.intersection(*(self.faculty_index.get(w, set()) for w in words))
+        rows = {}
+        for row, position in sorted(hits):
+            faculty = self.faculties[row][position]
+            if set(faculty_name_words(faculty)[:len(words)]) == words:
+                rows.setdefault(row, []).append(faculty)
+        return rows
+
+    def faculty_mask(self, words):
+        """
+        Returns:
+            tuple[np.ndarray, dict]: Mask of the rows having a matching faculty, and
+            the matching faculty names per row (see `faculty_rows`).
+        """
+        rows = self.faculty_rows(words)
+        mask = np.zeros(len(self), dtype=bool)
+        mask[list(rows)] = True
+        return mask, rows
+
+    def select(self, mask=None, sort=None, descending=True, limit=None) -> np.ndarray:
+        """
+        Row numbers of the masked rows, optionally sorted by a numeric column
+        (missing values last) and cut to `limit`.
+        """
+        rows = np.flatnonzero(mask if mask is not None else np.ones(len(self), dtype=bool))
+        if sort is not None:
+            values = self.columns[sort][rows]
+            present = ~np.isnan(values)
+            order = np.argsort(-values[present] if descending else values[present], kind="stable")
+            rows = np.concatenate([rows[present][order], rows[~present]])
+        return rows[:limit] if limit else rows
+
+    def count_known(self, column: str, rows) -> int:
+        """Number of rows with a value in a numeric column."""
+        return int((~np.isnan(self.columns[column][rows])).sum())
+
+    def aggregate(self, function: str, column: str, rows) -> float:
+        """"mean", "sum", "min" or "max" of a numeric column over rows, ignoring missing values."""
+        values = self.columns[column][rows]
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return np.nan
+        return float({"mean": np.mean, "sum": np.sum, "min": np.min, "max": np.max}[function](values))
+
+    def value(self, row: int, column: str):
+        """Display value of a cell ("unknown" when missing)."""
+        value = self.columns[column][row]
+        if column in NUMERIC_COLUMNS:
+            if np.isnan(value):
+                return "unknown"
+            return f"{value:,.{RATIO_DECIMALS.get(column, 0)}f}"
+        return value or "unknown"
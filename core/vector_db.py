@@ -15,6 +15,7 @@ class VectorDB:
         self.data_path = os.path.join(project_root, "data", "processed", "university_docs.json")
         self.chroma_client = chromadb.PersistentClient(path=os.path.join(project_root, "data" ,"chroma_db"))
         self.chroma_collection = None
+        self.embedding_function = None
 
     def load_chunk_data(self):
         with open(self.data_path, "r", encoding="utf-8") as f:
@@ -23,10 +24,10 @@ class VectorDB:
 
     def create_collection(self, name="egyptian_public_universities"):
         text_embedder = TextEmbedder()
-        embedding_function = text_embedder.embedding()
+        self.embedding_function = text_embedder.embedding()
         self.chroma_collection = self.chroma_client.get_or_create_collection(
             name=name,
-            embedding_function=embedding_function
+            embedding_function=self.embedding_function
         )
         return self.chroma_collection
 
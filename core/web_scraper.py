@@ -1,7 +1,7 @@
 import os
 import sys
-import re
 import json
+import time
 from playwright.sync_api import sync_playwright, Page
 
 # Add project root to sys.path for relative imports
@@ -9,18 +9,142 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+from core.scrape_checkpoint import ScrapeCheckpoint
+
+# In-page extractors: each section of a page is read in a single `evaluate` round trip
+UNIVERSITY_LINKS_JS = """
+ol => Array.from(ol.querySelectorAll('li')).map(li => {
+    const a = li.querySelector('a');
+    return a ? a.getAttribute('href') : null;
+})
+"""
+
+UNIVERSITY_DETAILS_JS = """
+() => {
+    const text = selector => {
+        const el = document.querySelector(selector);
+        return el ? el.textContent : null;
+    };
+    const detail = label => {
+        const item = Array.from(document.querySelectorAll('.newsListDate i'))
+            .find(i => i.textContent.toLowerCase().includes(label.toLowerCase()));
+        const span = item ? item.querySelector('span') : null;
+        return span ? span.textContent : null;
+    };
+    return {
+        university_name: text('.leftMenu h1'),
+        about: text('.blockAll'),
+        research_centers_availability: detail('Research Centers Availability'),
+        number_of_students: detail('Number of Students'),
+        number_of_staff: detail('Number of Staff'),
+        gender: detail('Gender:'),
+        rating: text('#ctl00_ctl00_ContentPlaceHolder1_ContentPlaceHolder1_spAvgRating'),
+    };
+}
+"""
+
+FACULTIES_JS = """
+parent => Array.from(parent.children).filter(el => el.tagName === 'DIV').map(faculty => {
+    const name = faculty.querySelector('h2');
+    const about = Array.from(faculty.querySelectorAll('p')).find(p => /\\S/.test(p.textContent));
+    return {name: name ? name.textContent : null, about: about ? about.textContent : null};
+})
+"""
+
+CONTACTS_JS = """
+parent => {
+    const items = Array.from(parent.children).filter(el => el.tagName === 'I').slice(0, -1);
+    const contacts = items.map(item => {
+        const name = item.querySelector('strong');
+        const info = item.querySelector('span');
+        return {contact_name: name ? name.textContent : null, contact_info: info ? info.textContent : null};
+    });
+    const social = document.querySelector('.socialIcon');
+    const links = social ? Array.from(social.querySelectorAll('a')).map(a => {
+        const icon = a.querySelector('i');
+        return {href: a.getAttribute('href'), icon_class: icon ? icon.getAttribute('class') : null};
+    }) : [];
+    const map = document.querySelector('iframe');
+    return {contacts: contacts, social: links, map_src: map ? map.getAttribute('src') : null};
+}
+"""
+
+
+def require_fields(record: dict, section: str) -> dict:
+    """
+    Check a record read by an in-page extractor: a field whose element is
+    missing (e.g. after a page layout change) comes back as null, so raise
+    instead of saving it, and let the retries and the quarantine handle it.
+
+    Args:
+        record (dict): Extracted fields.
+        section (str): Page section, for the error message.
+
+    Returns:
+        dict: The record, unchanged.
+
+    Raises:
+        ValueError: If a field is null.
+    """
+    missing = [field for field, value in record.items() if value is None]
+    if missing:
+        raise ValueError(f"{section}: no element for {', '.join(missing)}")
+    return record
+
+
+def build_contact_info(extracted: dict) -> list:
+    """
+    Convert the output of CONTACTS_JS into the `contact_info` list of a university record.
+
+    Args:
+        extracted (dict): Contacts, social links and map URL read from the contact page.
+
+    Returns:
+        list[dict]: Contacts with 'contact_name' and 'contact_info' keys.
+    """
+    contact_info = [require_fields(contact, "contacts page") for contact in extracted["contacts"]]
+    for link in extracted["social"]:
+        require_fields(link, "contacts page social link")
+        # get platform name from the class of <i> inside <a>
+        platform = link["icon_class"].split()[-1].replace("fa-", "").capitalize()
+        contact_info.append({'contact_name': platform, "contact_info": link["href"]})
+    require_fields({"map_src": extracted["map_src"]}, "contacts page")
+    contact_info.append({'contact_name': 'map_src', 'contact_info': extracted["map_src"]})
+    return contact_info
+
+
 class WebScraper:
     """
     A scraper class to extract detailed information about Egyptian public universities
     from the 'universitiesegypt.com' website using Playwright.
+
+    Every completed university is appended to a `ScrapeCheckpoint`, so a crawl
+    that fails partway through resumes where it stopped. Failing universities are
+    retried with exponential backoff and then quarantined instead of aborting the run.
     """
 
-    def __init__(self):
+    def __init__(self, checkpoint: ScrapeCheckpoint = None, max_retries: int = 3, retry_backoff: float = 2.0):
+        """
+        Args:
+            checkpoint (ScrapeCheckpoint, optional): Checkpoint to resume from and append to.
+            max_retries (int): Attempts per university before it is quarantined.
+            retry_backoff (float): Delay in seconds before the first retry, doubled on each retry.
+        """
         self.raw_data_folder = os.path.join(project_root, "data", "raw")
         self.universities_data = []
         self.faculties = []
         self.contact_info = []
         self.all_links = []
+        self.quarantined_links = []
+        # incremental runs (AsyncWebScraper) merge into the dataset and keep the checkpoint
+        self.incremental = False
+        self.checkpoint = checkpoint or ScrapeCheckpoint()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def retry_delay(self, attempt: int) -> float:
+        """Backoff delay in seconds before retry number `attempt` (1-based)."""
+        return self.retry_backoff * 2 ** (attempt - 1)
 
     def faculties_scraper(self, page: Page):
         """
@@ -29,18 +153,8 @@ class WebScraper:
         Args:
             page (Page): The Playwright page object currently displaying the faculty page.
         """
-        self.faculties = []
-        faculties_parent = page.locator(".innerListOfUniversities").nth(0)
-        faculties_list = faculties_parent.locator("> div")
-
-        for i in range(faculties_list.count()):
-            faculty = faculties_list.nth(i)
-            faculty_name = faculty.locator("h2").text_content()
-            about_faculty = faculty.locator("p").filter(has_text=re.compile(r"\S")).first.text_content()
-
-            self.faculties.append({
-                'name': faculty_name, 
-                'about': about_faculty})
+        faculties = page.locator(".innerListOfUniversities").nth(0).evaluate(FACULTIES_JS)
+        self.faculties = [require_fields(faculty, "faculties page") for faculty in faculties]
 
     def contact_scraper(self, page: Page):
         """
@@ -49,33 +163,8 @@ class WebScraper:
         Args:
             page (Page): The Playwright page object currently displaying the contact page.
         """
-        self.contact_info = []
-        soical_media_contact = []
-        contact_parent = page.locator(".newsListDate").nth(0)
-        contact_list = contact_parent.locator("> i")  
-
-        for i in range(contact_list.count() - 1):
-            contact = contact_list.nth(i)
-            contact_name = contact.locator("strong").text_content()
-            info = contact.locator("span").text_content()
-            self.contact_info.append({'contact_name': contact_name, "contact_info":info})
-            
-        # social media contact
-        social_div = page.locator(".socialIcon").nth(0)
-        links = social_div.locator("a")  
-
-        for i in range(links.count()):
-            link = links.nth(i)
-            href = link.get_attribute("href")
-            
-            # get platform name from the class of <i> inside <a>
-            icon_class = link.locator("i").get_attribute("class")
-            platform = icon_class.split()[-1].replace("fa-", "").capitalize()
-            self.contact_info.append({'contact_name': platform, "contact_info":href})
-            
-        # get map 
-        map_src  = page.locator("iframe").nth(0).get_attribute("src")
-        self.contact_info.append({'contact_name': 'map_src', 'contact_info':map_src})
+        extracted = page.locator(".newsListDate").nth(0).evaluate(CONTACTS_JS)
+        self.contact_info = build_contact_info(extracted)
 
 
     def get_all_universities_links(self, page: Page):
@@ -85,13 +174,13 @@ class WebScraper:
         Args:
             page (Page): The Playwright page object displaying the universities list.
         """
+        seen = set(self.all_links)
         while True:
-            list_of_universities = page.locator("ol").nth(2)
-            universities = list_of_universities.locator("li")
+            hrefs = page.locator("ol").nth(2).evaluate(UNIVERSITY_LINKS_JS)
 
-            for i in range(universities.count()):
-                href = universities.nth(i).locator("a").get_attribute("href")
-                if href and href not in self.all_links:
+            for href in hrefs:
+                if href and href not in seen:
+                    seen.add(href)
                     self.all_links.append(href)
 
             next_button = page.locator("#ctl00_ctl00_ContentPlaceHolder1_ContentPlaceHolder1_lnkNext")
@@ -101,85 +190,169 @@ class WebScraper:
             page.wait_for_load_state("networkidle")
 
     
+    def scrape_university(self, page: Page, href: str) -> dict:
+        """
+        Scrape one university: its main page, faculties page and contacts page.
+
+        Args:
+            page (Page): The Playwright page object to navigate with.
+            href (str): University page URL.
+
+        Returns:
+            dict: University record in the `raw_universities_data.json` schema.
+        """
+        page.goto(href)
+        menu = page.locator(".leftMenu")
+        details = require_fields(menu.evaluate(UNIVERSITY_DETAILS_JS), "university page")
+
+        # Faculties Page
+        faculties_item = menu.locator("text=Faculties / Programs")
+        faculties_item.click()
+
+        page.wait_for_load_state("networkidle")
+        self.faculties_scraper(page)
+
+        # Contact Page
+        page.wait_for_load_state("networkidle")
+        contact_item = menu.locator("text=Contacts")
+        contact_item.click()
+        page.wait_for_load_state("networkidle")
+        self.contact_scraper(page)
+
+        return {
+            **details,
+            "type": "public",
+            "faculties": self.faculties,
+            "contact_info": self.contact_info
+        }
+
+    def scrape_university_with_retry(self, page: Page, href: str):
+        """
+        Scrape a university, retrying with exponential backoff. The university is
+        checkpointed on success and quarantined once all retries failed.
+
+        Returns:
+            dict | None: The university record, or None if it was quarantined.
+        """
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                record = self.scrape_university(page, href)
+            except Exception as e:
+                print(f"Attempt {attempt}/{self.max_retries} failed for {href}: {e}")
+                if attempt == self.max_retries:
+                    self.checkpoint.quarantine(href, str(e))
+                    self.quarantined_links.append(href)
+                    return None
+                time.sleep(self.retry_delay(attempt))
+            else:
+                self.checkpoint.save_university(href, record)
+                return record
+
     def scrap_public_universities(self):
         """
         Main method to scrape public universities:
-        - Collects all public university links.
-        - Visits each university and scrapes its information.
+        - Collects all public university links (or reuses them from the checkpoint).
+        - Visits each university not yet checkpointed and scrapes its information.
         """
         pw = sync_playwright().start()
         browser = pw.chromium.launch(headless=False, slow_mo=5000)
-        page = browser.new_page()
-        page.goto("https://www.universitiesegypt.com/")
-        
-         # Extract only public universities
-        page.get_by_text("Public Universities").nth(0).click()
-        page.wait_for_load_state("networkidle")
+        try:
+            page = browser.new_page()
 
-        # Gather all university URLs
-        self.get_all_universities_links(page)
+            if self.checkpoint.links:
+                print(f"Resuming from checkpoint: {len(self.checkpoint.completed)} universities already scraped")
+                self.all_links = list(self.checkpoint.links)
+            else:
+                page.goto("https://www.universitiesegypt.com/")
 
-        # Loop through universities
-        for href in self.all_links:
-            page.goto(href)
-            menu = page.locator(".leftMenu")
-            university_name = menu.locator("h1").text_content()
-            detailed_data = page.locator(".newsListDate")
-            research_centers_availability = detailed_data.locator("i:has-text('Research Centers Availability') span").text_content()
-            number_of_students = detailed_data.locator("i:has-text('Number of Students') span").text_content()
-            number_of_staff = detailed_data.locator("i:has-text('Number of Staff') span").text_content()
-            gender = detailed_data.locator("i:has-text('Gender:') span").text_content()
-            university_about = page.locator(".blockAll").text_content()
-            rating = page.locator("#ctl00_ctl00_ContentPlaceHolder1_ContentPlaceHolder1_spAvgRating").text_content()
+                # Extract only public universities
+                page.get_by_text("Public Universities").nth(0).click()
+                page.wait_for_load_state("networkidle")
 
+                # Gather all university URLs
+                self.get_all_universities_links(page)
+                self.checkpoint.save_links(self.all_links)
 
-            # Faculties Page
-            faculties_item = menu.locator("text=Faculties / Programs")
-            faculties_item.click()
+            # Loop through universities
+            for href in self.all_links:
+                if href in self.checkpoint.completed:
+                    self.universities_data.append(self.checkpoint.completed[href])
+                    continue
+                if self.checkpoint.is_quarantined(href):
+                    print(f"Skipping quarantined university: {href}")
+                    self.quarantined_links.append(href)
+                    continue
 
-            page.wait_for_load_state("networkidle")
-            self.faculties_scraper(page)
+                record = self.scrape_university_with_retry(page, href)
+                if record is not None:
+                    self.universities_data.append(record)
+        finally:
+            browser.close()
+            pw.stop()
 
-            # Contact Page
-            page.wait_for_load_state("networkidle")
-            contact_item = menu.locator("text=Contacts")
-            contact_item.click()
-            self.contact_scraper(page)
-
-            # Append to dataset
-            self.universities_data.append({
-                "university_name": university_name,
-                "about": university_about,
-                "research_centers_availability": research_centers_availability,
-                "number_of_students": number_of_students,
-                "number_of_staff": number_of_staff,
-                "gender": gender,
-                "rating": rating,
-                "type": "public",
-                "faculties": self.faculties,
-                "contact_info": self.contact_info
-            })
-
-        print(self.universities_data)
-
-        browser.close()
-        pw.stop()
-        print("Scraping completed successfully") 
+        print(f"Scraping completed: {len(self.universities_data)} universities, "
+              f"{len(self.checkpoint.quarantined)} quarantined")
 
     
+    def load_raw_data(self, file_name="raw_universities_data.json") -> list:
+        """Load the previously saved raw dataset (empty if it does not exist yet)."""
+        full_path = os.path.join(self.raw_data_folder, file_name)
+        if not os.path.exists(full_path):
+            return []
+        with open(full_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def carry_quarantined(self, previous: list):
+        """
+        Add the last good record (from the previous dataset) of every university
+        quarantined in this run, so a failing page does not drop it from the data.
+
+        Args:
+            previous (list): The previously saved raw dataset.
+        """
+        previous = {u["university_name"]: u for u in previous}
+        present = {u["university_name"] for u in self.universities_data}
+        for href in self.quarantined_links:
+            name = self.checkpoint.names.get(href)
+            if name in present:
+                continue
+            if name in previous:
+                self.universities_data.append(previous[name])
+                present.add(name)
+            else:
+                print(f"No previous record of quarantined university: {href}")
+
     def save_data_to_json(self, file_name="raw_universities_data.json"):
         """
-        Save the scraped data into a JSON file inside the raw data folder.
+        Save the scraped data into a JSON file inside the raw data folder, atomically
+        (a crash leaves the previous file). Quarantined universities keep their last
+        good record.
 
         Args:
             file_name (str): Name of the JSON file to create.
         """
+        self.carry_quarantined(self.load_raw_data(file_name))
         os.makedirs(self.raw_data_folder, exist_ok=True)
         full_path = os.path.join(self.raw_data_folder, file_name)
-        with open(full_path, "w", encoding="utf-8") as f:
+        tmp = full_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(self.universities_data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, full_path)
         print(f"Data saved to {full_path}")
 
+        if self.incremental:
+            # an incremental run leaves the checkpoint of an interrupted full crawl alone
+            print("Checkpoint kept")
+            return
+        if not self.checkpoint.settled():
+            # universities that failed outside the retry loop: the next run resumes this crawl
+            print("Checkpoint kept: some universities were neither scraped nor quarantined")
+            return
+        # The dataset is complete on disk: the next run starts a fresh crawl, retrying
+        # the quarantined universities once their quarantine period is over
+        self.checkpoint.finish()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,26 @@
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
 from keybert import KeyBERT
+from sklearn.feature_extraction.text import CountVectorizer, ENGLISH_STOP_WORDS
+from sklearn.metrics.pairwise import cosine_similarity
+
+from core.metrics import METRICS
+
+WORD_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+@lru_cache(maxsize=1)
+def load_keybert() -> KeyBERT:
+    """
+    The process-wide KeyBERT model, loaded on first use. Every summarizer shares
+    it; loading it before forking worker processes shares its memory too.
+    """
+    return KeyBERT()
+
 
 class KeywordSummarizer:
     """
@@ -9,11 +31,61 @@ class KeywordSummarizer:
     names based on the content of longer text inputs — for example, naming
     chat sessions or summarizing topics.
 
+    Embeddings of candidate n-grams are cached: chat prompts about the same
+    universities and faculties share most of their candidates, so only new
+    phrases reach the embedding model.
+
     Attributes:
-        kw_model (KeyBERT): The underlying KeyBERT keyword extraction model.
+        kw_model (KeyBERT): The underlying KeyBERT keyword extraction model,
+            loaded on first use (short titles never need it).
+        cache_size (int): Maximum number of cached candidate embeddings.
     """
-    def __init__(self):
-        self.kw_model = KeyBERT()
+    def __init__(self, cache_size: int = 50000):
+        self.cache_size = cache_size
+        self._embedding_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def kw_model(self) -> KeyBERT:
+        return load_keybert()
+
+    def quick_title(self, text: str, max_words: int = 5):
+        """
+        Cheap title for short texts, without running the model.
+
+        A text with at most `max_words` content words (stop words removed) is
+        its own best key phrase, so it is returned as is.
+
+        Args:
+            text (str): The input text.
+            max_words (int, optional): Maximum number of content words. Defaults to 5.
+
+        Returns:
+            str | None: The title, or None if the text needs KeyBERT.
+        """
+        words = [w for w in WORD_PATTERN.findall(text.lower()) if w not in ENGLISH_STOP_WORDS]
+        if not words or len(words) > max_words:
+            return None
+        return " ".join(words)
+
+    def _embed_candidates(self, candidates: list) -> np.ndarray:
+        # the cache is shared by the threads titling sessions: hits are copied out under
+        # the lock, and the model runs outside it
+        with self._lock:
+            embeddings = {c: self._embedding_cache[c] for c in candidates if c in self._embedding_cache}
+        missing = [c for c in candidates if c not in embeddings]
+        METRICS.inc("cache_requests_total", len(candidates) - len(missing), cache="keyword_embeddings", result="hit")
+        METRICS.inc("cache_requests_total", len(missing), cache="keyword_embeddings", result="miss")
+        if missing:
+            embeddings.update(zip(missing, self.kw_model.model.embed(missing)))
+
+        with self._lock:
+            for candidate in candidates:
+                self._embedding_cache[candidate] = embeddings[candidate]
+                self._embedding_cache.move_to_end(candidate)
+            while len(self._embedding_cache) > self.cache_size:
+                self._embedding_cache.popitem(last=False)
+        return np.vstack([embeddings[c] for c in candidates])
 
     def summarize_text(self, text: str, summary_length: int = 5, n_phrases: int = 5):
         """
@@ -31,5 +103,15 @@ class KeywordSummarizer:
         Returns:
             str: The extracted keyword or a shortened fallback string.
         """
-        keywords = self.kw_model.extract_keywords(text, keyphrase_ngram_range=(1,n_phrases), stop_words='english', top_n=1)
-        return keywords[0][0] if keywords else text[:summary_length]
+        try:
+            vectorizer = CountVectorizer(ngram_range=(1, n_phrases), stop_words='english').fit([text])
+        except ValueError:
+            # only stop words
+            return text[:summary_length]
+        candidates = list(vectorizer.get_feature_names_out())
+
+        # same scoring as KeyBERT.extract_keywords(top_n=1), with cached candidate embeddings
+        doc_embedding = self.kw_model.model.embed([text])
+        candidate_embeddings = self._embed_candidates(candidates)
+        similarities = cosine_similarity(doc_embedding, candidate_embeddings)[0]
+        return candidates[int(np.argmax(similarities))]
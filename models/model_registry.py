@@ -0,0 +1,48 @@
+import threading
+from typing import Any, Callable, Dict
+
+
+class ModelRegistry:
+    """
+    Registry of LLM clients, looked up by name.
+
+    Graph nodes get their models from here instead of from the workflow state,
+    so the state stays serializable and small. A model is built by its factory
+    on first use and then shared.
+
+    Example:
+        registry.register("basic", lambda: ChatGoogleGenerativeAI(model="gemini-2.5-flash"))
+        model = registry.get("basic")
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """
+        Register (or replace) the factory of a model.
+
+        Args:
+            name (str): Name the nodes use to look the model up.
+            factory (Callable): Builds the model client; called once, on first use.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._models.pop(name, None)
+
+    def get(self, name: str):
+        """
+        Return the model registered under `name`, building it on first use.
+
+        Raises:
+            KeyError: If no model is registered under `name`.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._factories[name]()
+            return self._models[name]
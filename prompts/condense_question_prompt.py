@@ -0,0 +1,14 @@
+CONDENSE_QUESTION_PROMPT = """
+You rewrite the latest question of a conversation about Egyptian universities into a standalone question.
+    Rules:
+    - Replace pronouns and references ("it", "there", "the second one", "what about Cairo?") with the names they refer to
+    - Keep the meaning, wording and language of the latest question; do not answer it
+    - If the question is already standalone, return it unchanged
+    - Output only the standalone question (no explanations or extra sentences)
+
+{conversation_context}
+
+Latest question: {question}
+
+Standalone question:
+"""
@@ -0,0 +1,296 @@
+import os
+import re
+import sys
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from langchain.schema import Document
+from core.university_table import UniversityTable, faculty_words
+
+# question word -> numeric column
+COLUMN_WORDS = [
+    (re.compile(r"\bstaff (to|per) students?\b|\bstaff students? ratio\b"), "staff_per_student"),
+    (re.compile(r"\bstudents? (to|per) staff\b|\bstaff ratio\b|\bstudent staff ratio\b"), "students_per_staff"),
+    (re.compile(r"\bstudents?\b|\benrol+ment\b"), "number_of_students"),
+    (re.compile(r"\bstaff\b|\bemployees\b|\bprofessors\b|\blecturers\b"), "number_of_staff"),
+    (re.compile(r"\brating\b|\brated\b"), "rating"),
+]
+
+NUMBER = r"(\d[\d,]*(?:\.\d+)?)\s*(k|thousand|m|million)?"
+COMPARISONS = [
+    (re.compile(r"\b(more than|greater than|over|above|exceeding)\s+" + NUMBER), ">"),
+    (re.compile(r"\b(at least|minimum of|no less than)\s+" + NUMBER), ">="),
+    (re.compile(r"\b(less than|fewer than|under|below)\s+" + NUMBER), "<"),
+    (re.compile(r"\b(at most|maximum of|no more than)\s+" + NUMBER), "<="),
+]
+MULTIPLIERS = {None: 1, "k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6}
+
+RANK_DESCENDING = re.compile(r"\b(most|largest|biggest|highest|top|best rated|maximum)\b")
+RANK_ASCENDING = re.compile(r"\b(fewest|least|smallest|lowest|bottom|minimum)\b")
+TOP_N = re.compile(r"\b(top|first|bottom)\s+(\d+)\b|\b(\d+)\s+(largest|biggest|smallest|highest|lowest)\b")
+AGGREGATES = [
+    (re.compile(r"\b(average|mean)\b"), "mean"),
+    (re.compile(r"\b(total|sum|combined|in total)\b"), "sum"),
+]
+COMPARE = re.compile(r"\b(compare|comparison|versus|vs|difference|differ|between|both|bigger|larger|smaller|more|fewer)\b")
+# the question is about the set of universities, not one of them
+COLLECTION = re.compile(r"\b(universities|which (university|one)|list|how many universities|rank|ranking|any university)\b")
+RANK_BY = re.compile(r"\b(rank|ranked|ranking|sort|sorted|order|ordered)\b")
+FACULTY = re.compile(
+    r"\b(?:faculty|faculties|college|school) (?:of|for) ([a-z ]+?)"
+    r"(?=$| at | in | with | that | having | where | and (?:more|less|fewer|over|under|above|below|at|a|an|which|how|have|has|is|are)\b)"
+)
+FACULTIES = re.compile(r"\bfaculties\b")
+
+CATEGORY_FILTERS = [
+    (re.compile(r"\bpublic\b"), ("type", "==", "public")),
+    (re.compile(r"\bprivate\b"), ("type", "==", "private")),
+    (re.compile(r"\b(mixed|co ?ed(ucational)?)\b"), ("gender", "==", "mixed")),
+    (re.compile(r"\b(male only|men only|boys only|all male|for men|for males)\b"), ("gender", "==", "male")),
+    (re.compile(r"\b(female only|women only|girls only|all female|for women|for females)\b"), ("gender", "==", "female")),
+    (re.compile(r"\b(without|no|lack(ing)?) research (centers?|centres?)\b"), ("research_centers_availability", "==", "no")),
+    (re.compile(r"\b(with|have|has|having|offer|offers) research (centers?|centres?)\b"), ("research_centers_availability", "==", "yes")),
+]
+
+COLUMN_LABELS = {
+    "number_of_students": "students",
+    "number_of_staff": "staff",
+    "rating": "rating",
+    "students_per_staff": "students per staff",
+    "staff_per_student": "staff per student",
+    "gender": "gender",
+    "type": "type",
+    "research_centers_availability": "research centers",
+}
+MAX_ROWS = 30
+
+
+def parse_amount(number: str, unit) -> float:
+    return float(number.replace(",", "")) * MULTIPLIERS[unit]
+
+
+class AnalyticalQueryEngine:
+    """
+    Aggregate and comparison questions over `UniversityTable`:
+
+    - filters: "public universities with more than 100,000 students", "with research centers",
+    - rankings: "the 5 largest universities", "which university has the lowest rating",
+    - aggregates: "average number of students of public universities",
+    - comparisons of named universities: "compare Cairo and Alexandria University",
+    - faculty lookups and comparisons: "universities with a faculty of medicine",
+      "compare the faculties of Cairo and Alexandria University".
+
+    `plan` turns a question into a plain dict (None when the question is not
+    analytical), `execute` runs it on the table and returns a compact text
+    table, which is the only context handed to the generation model.
+    """
+
+    def __init__(self, table: UniversityTable = None):
+        self.table = table or UniversityTable()
+
+    def plan(self, question: str):
+        """
+        Parse a question into a query plan.
+
+        Returns:
+            dict | None: {"action", "universities", "filters", "faculty", "sort",
+            "descending", "limit", "aggregate", "columns"}, or None.
+        """
+        text = self.table.index.prepare(question)
+        universities = self.table.index.find_universities(text)
+
+        # drop the university names before looking for numbers and column words
+        rest = self.table.index.pattern.sub(" ", text)
+        columns = []
+        for pattern, column in COLUMN_WORDS:
+            if pattern.search(rest) and column not in columns:
+                columns.append(column)
+                if column in ("students_per_staff", "staff_per_student"):
+                    break
+
+        filters = [f for pattern, f in CATEGORY_FILTERS if pattern.search(rest)]
+        for pattern, operator in COMPARISONS:
+            for match in pattern.finditer(rest):
+                column = self.column_near(rest, match.start(), match.end()) or (columns[0] if columns else None)
+                if column is None:
+                    return None
+                filters.append((column, operator, parse_amount(match.group(2), match.group(3))))
+
+        faculty = FACULTY.search(rest)
+        faculty = self.faculty_name(faculty.group(1)) if faculty else None
+
+        plan = {"action": None, "universities": universities, "filters": filters, "faculty": faculty,
+                "sort": None, "descending": True, "limit": None, "aggregate": None, "columns": columns}
+
+        if len(universities) >= 2 and (COMPARE.search(rest) or FACULTIES.search(rest) or columns):
+            plan["action"] = "compare_faculties" if FACULTIES.search(rest) and not columns else "compare"
+            return plan
+        if universities:
+            # questions about one university are left to the structured fast path and retrieval
+            return None
+
+        for pattern, function in AGGREGATES:
+            if pattern.search(rest) and columns and COLLECTION.search(rest):
+                plan["action"], plan["aggregate"] = "aggregate", [function, columns[0]]
+                return plan
+
+        ascending, descending = RANK_ASCENDING.search(rest), RANK_DESCENDING.search(rest)
+        if (ascending or descending) and (columns or re.search(r"\b(largest|biggest|smallest)\b", rest)):
+            plan["sort"] = columns[0] if columns else "number_of_students"
+            if ascending and descending:
+                plan["descending"] = descending.start() < ascending.start()
+            else:
+                plan["descending"] = bool(descending)
+            top = TOP_N.search(rest)
+            plan["limit"] = int(top.group(2) or top.group(3)) if top else (None if "universities" in rest else 1)
+            plan["action"] = "list"
+            return plan
+
+        if RANK_BY.search(rest) and columns:
+            plan["action"], plan["sort"] = "list", columns[0]
+            plan["descending"] = not ascending
+            return plan
+
+        if COLLECTION.search(rest) and (filters or faculty):
+            plan["action"] = "count" if "how many universities" in rest else "list"
+            if columns and not plan["sort"]:
+                plan["sort"] = columns[0]
+            return plan
+        return None
+
+    def faculty_name(self, text: str) -> list:
+        """
+        Words of the faculty named in a question, cut at the first "and" not followed
+        by a faculty name word: "medicine and surgery" is kept whole, "medicine and
+        their admission requirements" is cut to "medicine".
+        """
+        parts = text.split(" and ")
+        words = faculty_words(parts[0])
+        for part in parts[1:]:
+            following = part.split()
+            if not following or following[0] not in self.table.faculty_index:
+                break
+            words |= faculty_words(part)
+        return sorted(words)
+
+    @staticmethod
+    def column_near(text: str, start: int, end: int):
+        """
+        Numeric column of a comparison: named right after the number ("over 100,000
+        students"), else right before the comparison ("a rating above 400").
+        """
+        for words in (" ".join(text[end:].split()[:2]), " ".join(text[:start].split()[-3:])):
+            for pattern, column in COLUMN_WORDS:
+                if pattern.search(words):
+                    return column
+        return None
+
+    def execute(self, plan: dict):
+        """
+        Run a plan on the table.
+
+        Returns:
+            tuple[str, list[str]]: Compact text result and the universities it lists.
+        """
+        table = self.table
+        action = plan["action"]
+
+        if action == "compare_faculties":
+            return self.compare_faculties(plan["universities"])
+
+        if action == "compare":
+            rows = [table.rows[name] for name in plan["universities"]]
+            columns = plan["columns"] or ["number_of_students", "number_of_staff", "students_per_staff",
+                                          "rating", "gender", "type", "research_centers_availability"]
+            return self.format_rows("Comparison", rows, columns), [table.names[r] for r in rows]
+
+        mask = table.mask(plan["filters"])
+        faculties = {}
+        if plan["faculty"]:
+            faculty_mask, faculties = table.faculty_mask(plan["faculty"])
+            mask &= faculty_mask
+        description = self.describe(plan)
+
+        if action == "aggregate":
+            function, column = plan["aggregate"]
+            rows = table.select(mask)
+            value = table.aggregate(function, column, rows)
+            known = table.count_known(column, rows)
+            result = (f"{function} of {COLUMN_LABELS[column]} over {len(rows)} universities{description} "
+                      f"({known} with a known value): "
+                      + ("unknown" if value != value else f"{value:,.1f}"))
+            # the extremes give the generation model something to comment on
+            ranked = table.select(mask, sort=column)[:known]
+            extremes = list(dict.fromkeys([*ranked[:1], *ranked[-1:]]))
+            if extremes:
+                result += "\n\n" + self.format_rows("Highest and lowest", extremes, [column])
+            return result, [table.names[r] for r in extremes]
+
+        rows = table.select(mask, sort=plan["sort"], descending=plan["descending"], limit=plan["limit"])
+        columns = [c for c in dict.fromkeys([f[0] for f in plan["filters"]] + plan["columns"]
+                                            + ([plan["sort"]] if plan["sort"] else []))]
+        count = int(mask.sum())
+        header = f"{count} {'university' if count == 1 else 'universities'}{description}"
+        if plan["sort"]:
+            header += f", sorted by {COLUMN_LABELS[plan['sort']]} ({'highest' if plan['descending'] else 'lowest'} first)"
+        if not len(rows):
+            return header + ": none.", []
+        faculty_column = {r: "; ".join(faculties[r]) for r in rows} if faculties else None
+        return (header + "\n\n" + self.format_rows("Universities", rows, columns, faculty_column),
+                [table.names[r] for r in rows])
+
+    def describe(self, plan: dict) -> str:
+        parts = []
+        for column, operator, value in plan["filters"]:
+            operator = "=" if operator == "==" else operator
+            if isinstance(value, float):
+                parts.append(f"{COLUMN_LABELS[column]} {operator} {value:,.0f}")
+            else:
+                parts.append(f"{COLUMN_LABELS[column]} {operator} {value}")
+        if plan["faculty"]:
+            parts.append(f"has a faculty matching '{' '.join(plan['faculty'])}'")
+        return (" where " + ", ".join(parts)) if parts else ""
+
+    def format_rows(self, title, rows, columns, faculty_column=None) -> str:
+        rows = list(rows)[:MAX_ROWS]
+        header = ["university"] + [COLUMN_LABELS[c] for c in columns] + (["matching faculties"] if faculty_column else [])
+        lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        for row in rows:
+            cells = [self.table.index.display_name(self.table.names[row])]
+            cells += [self.table.value(row, c) for c in columns]
+            if faculty_column:
+                cells.append(faculty_column[row])
+            lines.append("| " + " | ".join(str(c) for c in cells) + " |")
+        return f"{title}:\n" + "\n".join(lines)
+
+    def compare_faculties(self, universities):
+        table = self.table
+        faculties = {name: set(table.faculties[table.rows[name]]) for name in universities}
+        common = set.intersection(*faculties.values())
+        lines = [f"Faculties in common ({len(common)}): " + (", ".join(sorted(common)) or "none")]
+        for name in universities:
+            only = faculties[name] - common
+            lines.append(f"Only at {table.index.display_name(name)} ({len(only)} of {len(faculties[name])}): "
+                         + (", ".join(sorted(only)) or "none"))
+        return "\n".join(lines), list(universities)
+
+    def answer_context(self, question: str, plan: dict = None):
+        """
+        Plan and run a question, as a single Document for `FoundationRAG.generation`.
+
+        Returns:
+            tuple[Document, list[str]] | None: The result document and the universities it lists.
+        """
+        plan = plan or self.plan(question)
+        if plan is None:
+            return None
+        text, universities = self.execute(plan)
+        document = Document(
+            page_content=f"Result of the query over the records of {len(self.table)} Egyptian public universities "
+                         f"(values as published on universitiesegypt.com):\n\n{text}",
+            metadata={"source": "https://www.universitiesegypt.com/", "university_name": ", ".join(universities)},
+        )
+        return document, universities
@@ -0,0 +1,149 @@
+import os
+import sys
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from prompts.summarization_prompt import SUMMARIZATION_PROMPT
+from prompts.condense_question_prompt import CONDENSE_QUESTION_PROMPT
+
+
+def count_words(text: str) -> int:
+    """Word count, used as a cheap token estimate (the summarization prompt is sized in words)."""
+    return len(text.split())
+
+
+def truncate_words(text: str, max_words: int) -> str:
+    """Keep the first `max_words` words of a text."""
+    words = text.split()
+    if len(words) <= max_words:
+        return text
+    return " ".join(words[:max_words]) + " …"
+
+
+class ConversationMemory:
+    """
+    Bounded memory of a chat thread, kept in the graph state:
+
+    - `recent_turns`: the last turns verbatim (answers truncated),
+    - `conversation_summary`: a rolling summary of every older turn.
+
+    When the recent turns exceed `recent_words`, the oldest ones are folded into
+    the summary with `SUMMARIZATION_PROMPT`, so the context added to prompts stays
+    under roughly `summary_words + recent_words` words however long the chat gets.
+    """
+
+    def __init__(self, model=None, max_recent_turns: int = 3, recent_words: int = 400,
+                 summary_words: int = 120, answer_words: int = 150):
+        """
+        Args:
+            model: Chat model writing the rolling summary.
+            max_recent_turns (int): Turns kept verbatim.
+            recent_words (int): Word budget of the verbatim turns.
+            summary_words (int): Target (and hard cap) length of the rolling summary.
+            answer_words (int): Words of each assistant answer kept in a turn.
+        """
+        self.model = model
+        self.max_recent_turns = max_recent_turns
+        self.recent_words = recent_words
+        self.summary_words = summary_words
+        self.answer_words = answer_words
+
+    @staticmethod
+    def format_turns(turns: list) -> str:
+        return "\n".join(f"User: {t['question']}\nAssistant: {t['answer']}" for t in turns)
+
+    def context(self, state) -> str:
+        """
+        Conversation context to add to prompts: the summary and the recent turns.
+
+        Returns:
+            str: Empty string on the first turn of a thread.
+        """
+        parts = []
+        summary = state.get("conversation_summary")
+        if summary:
+            parts.append(f"Summary of the earlier conversation:\n{summary}")
+        turns = state.get("recent_turns") or []
+        if turns:
+            parts.append(f"Recent conversation:\n{self.format_turns(turns)}")
+        return "\n\n".join(parts)
+
+    def summarize(self, model, summary: str, turns: list) -> str:
+        """Fold `turns` into the previous summary with SUMMARIZATION_PROMPT."""
+        text = self.format_turns(turns)
+        if summary:
+            text = f"{summary}\n{text}"
+        chain = PromptTemplate.from_template(SUMMARIZATION_PROMPT) | model | StrOutputParser()
+        new_summary = chain.invoke({
+            "summary_length": self.summary_words,
+            "original_length": count_words(text),
+            "text": text,
+        })
+        # the model only approximates the requested length
+        return truncate_words(new_summary.strip(), self.summary_words)
+
+    def start_turn(self, state):
+        """Remember the question as asked, before any query rewriting."""
+        state["question"] = state["query"]
+        return state
+
+    def condense(self, model, state) -> str:
+        """
+        Rewrite the follow-up question of the turn into a standalone question
+        ("and its faculties?" -> "What faculties does Cairo University have?"),
+        so routing and retrieval do not depend on the conversation context.
+
+        Returns:
+            str: The question unchanged on the first turn of a thread or if the
+            rewrite fails.
+        """
+        question = state["question"]
+        conversation_context = self.context(state)
+        if not conversation_context:
+            return question
+        chain = PromptTemplate.from_template(CONDENSE_QUESTION_PROMPT) | model | StrOutputParser()
+        try:
+            standalone = chain.invoke({
+                "conversation_context": conversation_context,
+                "question": question,
+            }).strip()
+        except Exception as e:
+            # route the question as asked rather than failing the turn
+            print(f"Question condensing failed: {e}")
+            return question
+        return standalone or question
+
+    def update(self, state):
+        """
+        Add the finished turn to the memory, folding the oldest turns into the
+        summary once the verbatim turns are over budget.
+        """
+        turns = list(state.get("recent_turns") or [])
+        turns.append({
+            "question": state.get("question") or state["query"],
+            "answer": truncate_words(state.get("agent_response") or "", self.answer_words),
+        })
+
+        folded = []
+        while len(turns) > 1 and (
+            len(turns) > self.max_recent_turns
+            or count_words(self.format_turns(turns)) > self.recent_words
+        ):
+            folded.append(turns.pop(0))
+
+        if folded:
+            try:
+                state["conversation_summary"] = self.summarize(
+                    self.model, state.get("conversation_summary") or "", folded
+                )
+            except Exception as e:
+                # keep answering without the folded turns rather than failing the turn
+                print(f"Conversation summarization failed: {e}")
+
+        state["recent_turns"] = turns
+        return state
@@ -5,7 +5,9 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+import copy
 import time
+import hashlib
 from groq import Groq
 from models.keyword_summarizer import KeywordSummarizer
 from langsmith.run_helpers import traceable
@@ -13,7 +15,16 @@ from rag.foundation_rag import FoundationRAG
 from langchain.schema import HumanMessage
 from langgraph.graph import END, StateGraph, START
 from rag.grade_documents import GradeDocuments
-from langgraph.checkpoint.memory import InMemorySaver
+from models.model_registry import ModelRegistry
+from core.metrics import METRICS, record_token_usage
+from rag.llm_metrics import LLMMetricsCallback
+from rag.conversation_memory import ConversationMemory
+from rag.structured_answers import StructuredAnswerer
+from rag.analytical_queries import AnalyticalQueryEngine
+from core.university_index import UniversityIndex, normalize
+from core.single_flight import SingleFlight
+from core.university_table import UniversityTable
+from core.sqlite_checkpointer import SQLiteCheckpointer
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain.output_parsers import PydanticOutputParser
@@ -28,52 +39,201 @@ class CorrectiveRAG():
     CorrectiveRAG:
     1. A foundational RAG engine (FoundationRAG) for retrieval and generation.
     2. Document grading and filtering to improve answer quality.
-    3. Query rewriting when no relevant documents are found.
-    4. Web search fallback using Groq if necessary.
+    3. A bounded corrective loop when no relevant documents are found: the query
+       is rewritten and retried against the local index with a larger k, grading
+       only the chunks not graded yet, up to `max_local_retries` times.
+    4. Web search fallback using Groq once the local attempts are exhausted.
+    5. Per-thread conversation memory (rolling summary + recent turns), so
+       follow-up questions keep their context with a bounded prompt size. A
+       follow-up is condensed into a standalone query once per turn, and routed
+       and retrieved on that.
+
+    6. A structured fast path answering factual questions about one university
+       (students, staff, rating, contacts...) from the processed records, before
+       any retrieval or LLM call.
+    7. An analytical route for aggregate and comparison questions across
+       universities, run on a columnar table; only the compact result reaches
+       the generation model.
+    8. Single-flight coalescing of the LLM steps (grading, generation, rewriting,
+       web search): concurrent turns asking the same question with the same API
+       keys share one execution. Flights are per process: with the pre-fork
+       server (`serving/api_server.py`) each worker coalesces its own requests.
 
     The workflow is implemented as a StateGraph to manage conditional execution.
     """
 
-    def __init__(self, google_api_key, groq_key):
-        self.base_rag = FoundationRAG(google_api_key)
+    # shared by every instance (the app builds one per API key pair), so identical
+    # questions in flight at the same time are answered once per process and key pair
+    flights = SingleFlight("corrective_rag")
+
+    def __init__(self, google_api_key, groq_key, checkpointer=None, grade_delay=6.0, vector_index=None,
+                 max_local_retries=1, retrieval_k=5, expand_k=5):
+        """
+        Args:
+            google_api_key (str): Gemini API key.
+            groq_key (str): Groq API key.
+            checkpointer (BaseCheckpointSaver, optional): Conversation thread storage.
+                Defaults to a `SQLiteCheckpointer` in the chat database.
+            grade_delay (float, optional): Pause in seconds after each grading call,
+                to stay under the Gemini rate limit. Defaults to 6.
+            vector_index (MmapVectorIndex, optional): Memory-mapped vector index searched
+                instead of the Chroma collection (see `FoundationRAG`).
+            max_local_retries (int, optional): Rewrite-and-retrieve attempts against the local
+                index before the web search fallback. Defaults to 1 (0 keeps the old
+                rewrite-then-web behaviour: the query is rewritten once, then searched on the web).
+            retrieval_k (int, optional): Chunks retrieved by the first attempt. Defaults to 5.
+            expand_k (int, optional): Chunks added to k by every retry. Defaults to 5.
+        """
+        self.base_rag = FoundationRAG(google_api_key, vector_index=vector_index)
         self.groq_key = groq_key
         self.google_api_key = google_api_key
-        self.checkpointer = InMemorySaver()
+        # flights are keyed on the key pair too: a caller never gets an answer paid for
+        # with someone else's keys (keys are not validated before joining a flight)
+        self.key_id = hashlib.sha256(f"{google_api_key}\0{groq_key}".encode("utf-8")).hexdigest()
+        self.checkpointer = checkpointer or SQLiteCheckpointer()
+        self.grade_delay = grade_delay
+        self.max_local_retries = max_local_retries
+        self.retrieval_k = retrieval_k
+        self.expand_k = expand_k
         self.summarizer = KeywordSummarizer()
-
-    
-    def get_model(self, state):  
+        self.models = ModelRegistry()
+        self.get_model()
+        self.memory = ConversationMemory(self.models.get("basic"))
+        index = UniversityIndex()
+        self.structured_answerer = StructuredAnswerer(index)
+        self.analytical_engine = AnalyticalQueryEngine(UniversityTable(index=index))
+
+    def get_model(self):
         """
-        Add models to the workflow state:
-            - filter_model: used for grading document relevance.
-            - basic_model: used for query rewriting and generation.
+        Register the models in the model registry, outside the workflow state
+        (they are not serializable and would be copied into every checkpoint):
+            - filter: used for grading document relevance.
+            - basic: used for condensing follow-ups, query rewriting and generation.
         """
         model_name = "gemini-2.5-flash"
 
-        filter_model = ChatGoogleGenerativeAI(
+        self.models.register("filter", lambda: ChatGoogleGenerativeAI(
             model=model_name,
             temperature=0.7,
             model_kwargs={"response_mime_type": "application/json"},
-            api_key=self.google_api_key
-        )
+            api_key=self.google_api_key,
+            callbacks=[LLMMetricsCallback("filter")]
+        ))
 
-        model = ChatGoogleGenerativeAI(
+        self.models.register("basic", lambda: ChatGoogleGenerativeAI(
             model=model_name,
-            api_key=self.google_api_key
-        )
+            api_key=self.google_api_key,
+            callbacks=[LLMMetricsCallback("basic")]
+        ))
+
 
-        state['filter_model'] = filter_model
-        state['basic_model'] = model
+    def coalesce(self, stage, state, fn, *key):
+        """
+        Run a costly step once for identical turns in flight at the same time
+        (e.g. many students asking the same question on results day). The key is
+        the stage, the API key pair, the normalized query and whatever else the
+        step output depends on; followers wait for the leader and get a copy of
+        its result. Only turns of the same process are coalesced.
+        """
+        value, shared = self.flights.do((stage, self.key_id, normalize(state["query"])) + key, fn, stage=stage)
+        return copy.deepcopy(value) if shared else value
+
+    def start_turn(self, state):
+        """
+        Reset the corrective loop of the previous turn, remember the question as
+        asked and condense a follow-up into a standalone query: the structured
+        lookup, the analytical planner and retrieval all run on that query.
+        """
+        state["graded_chunk_ids"] = []
+        state["corrective_attempts"] = []
+        state = self.memory.start_turn(state)
+        conversation_context = self.memory.context(state)
+        if conversation_context:
+            state["query"] = self.coalesce(
+                "condense", state,
+                lambda: self.memory.condense(self.models.get("basic"), state),
+                conversation_context,
+            )
+        return state
 
+    def answer_from_structured_data(self, state):
+        """Answer single-field factual questions from the structured records, if possible."""
+        result = self.structured_answerer.answer(state["query"])
+        state["structured_answer"] = result is not None
+        METRICS.inc("structured_answers_total", result="hit" if result else "miss")
+        if result is not None:
+            state["agent_response"], state["agent_metadata"] = result
         return state
 
+    def decide_answer_path(self, state):
+        """Skip retrieval when the structured records already answered the question."""
+        if state.get("structured_answer"):
+            return "answered"
+        else:
+            return "retrieve"
+
+    def plan_analytical_query(self, state):
+        """Parse aggregate / comparison questions into a plan for the university table."""
+        state["analytical_plan"] = self.analytical_engine.plan(state["query"])
+        return state
+
+    def decide_retrieval_route(self, state):
+        """Run analytical questions on the university table instead of chunk retrieval."""
+        if state.get("analytical_plan"):
+            return "analytical"
+        else:
+            return "retrieve"
+
+    def answer_from_analytical_index(self, state):
+        """
+        Execute the analytical plan and generate the answer from its compact
+        result table, without chunk retrieval or grading.
+        """
+        query = state['query']
+        conversation_context = self.memory.context(state)
+
+        def answer():
+            document, universities = self.analytical_engine.answer_context(query, state["analytical_plan"])
+            initial_state = {"messages": [HumanMessage(content=query)]}
+            result = self.base_rag.generation(
+                initial_state, [document], conversation_context=conversation_context
+            )
+            metadata = {
+                "sources": [document.metadata["source"]],
+                "university_name": universities,
+            } if universities else None
+            return result["messages"][-1].content, metadata
+
+        state['agent_response'], state['agent_metadata'] = self.coalesce(
+            "analytical", state, answer, conversation_context
+        )
+        return state
 
     def get_relevant_documents(self, state):
-        """Retrieve relevant documents from the vector DB for the current query."""
+        """
+        Retrieve relevant chunks (ids and distances) from the vector DB for the current query.
+        Retries of the corrective loop retrieve a larger k and keep only the chunks
+        no earlier attempt of the turn has graded.
+        """
         query = state["query"]
-
-        documents = self.base_rag.retrieval(query)
-        state["relevant_documents"] = documents
+        attempts = state.setdefault("corrective_attempts", [])
+        k = self.retrieval_k + len(attempts) * self.expand_k
+
+        started = time.perf_counter()
+        ids, scores = self.base_rag.retrieve_chunks(query, k)
+        graded = set(state.get("graded_chunk_ids") or [])
+        new = [(chunk_id, score) for chunk_id, score in zip(ids, scores) if chunk_id not in graded]
+        state["chunk_ids"] = [chunk_id for chunk_id, _ in new]
+        state["chunk_scores"] = [score for _, score in new]
+
+        attempts.append({
+            "attempt": len(attempts),
+            "query": query,
+            "k": k,
+            "new_chunks": len(new),
+            "retrieval_seconds": round(time.perf_counter() - started, 4),
+        })
+        METRICS.inc("rag_retrieved_chunks_total", len(state["chunk_ids"]))
         return state
     
     @traceable
@@ -82,27 +242,45 @@ class CorrectiveRAG():
         Grade each retrieved document to filter out irrelevant results.
         Uses a structured grading prompt and Pydantic parser.
         """
-        filtered_documents = []
-        parser = PydanticOutputParser(pydantic_object=GradeDocuments)
         query = state['query']
-        model = state['filter_model']
-        documents = state['relevant_documents']
-        grade_prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", GRADE_DOCUMENTS_PROMPT),
-                ("human", "Retrieved document: \n\n {document} \n\n User question: {query}"),
-            ]
+        scores = dict(zip(state['chunk_ids'], state['chunk_scores']))
+
+        def grade():
+            filtered_ids, filtered_scores = [], []
+            parser = PydanticOutputParser(pydantic_object=GradeDocuments)
+            model = self.models.get("filter")
+            grade_prompt = ChatPromptTemplate.from_messages(
+                [
+                    ("system", GRADE_DOCUMENTS_PROMPT),
+                    ("human", "Retrieved document: \n\n {document} \n\n User question: {query}"),
+                ]
+            )
+
+            retrieval_grader = grade_prompt | model | parser
+
+            for chunk_id, document in self.base_rag.chunk_store.items(state['chunk_ids']):
+                grader_response = retrieval_grader.invoke({"document": document, "query": query})
+                time.sleep(self.grade_delay)
+                if grader_response.binary_score.lower() == "yes":
+                    filtered_ids.append(chunk_id)
+                    filtered_scores.append(scores[chunk_id])
+            return filtered_ids, filtered_scores
+
+        graded_ids = list(state['chunk_ids'])
+        started = time.perf_counter()
+        state['chunk_ids'], state['chunk_scores'] = self.coalesce(
+            "grade", state, grade, tuple(state['chunk_ids'])
         )
-
-        retrieval_grader = grade_prompt | model | parser
-
-        for document in documents:
-            grader_response = retrieval_grader.invoke({"document": document, "query": query})
-            time.sleep(6)
-            if grader_response.binary_score.lower() == "yes":
-                filtered_documents.append(document)
-
-        state['relevant_documents'] = filtered_documents
+        state['graded_chunk_ids'] = (state.get('graded_chunk_ids') or []) + graded_ids
+        METRICS.inc("rag_filtered_chunks_total", len(state['chunk_ids']))
+
+        # cost and outcome of this attempt of the corrective loop
+        attempt = state['corrective_attempts'][-1]
+        attempt["grading_calls"] = len(graded_ids)
+        attempt["grading_seconds"] = round(time.perf_counter() - started, 4)
+        attempt["relevant_chunks"] = len(state['chunk_ids'])
+        attempt["outcome"] = self.corrective_step(state)
+        METRICS.inc("corrective_attempts_total", outcome=attempt["outcome"])
         return state
 
     def generate_answer_from_documents(self, state):
@@ -112,12 +290,20 @@ class CorrectiveRAG():
         metadata from each document, including 'source' and 'university_name'.
         """
         query = state['query']
-        documents = state['relevant_documents']
-        initial_state = {"messages": [HumanMessage(content=query)]}
-
-        # Generate answer using base RAG
-        result = self.base_rag.generation(initial_state, documents)
-        state['agent_response'] = result["messages"][-1].content
+        documents = self.base_rag.chunk_store.get(state['chunk_ids'])
+        conversation_context = self.memory.context(state)
+
+        def generate():
+            initial_state = {"messages": [HumanMessage(content=query)]}
+            # Generate answer using base RAG
+            result = self.base_rag.generation(
+                initial_state, documents, conversation_context=conversation_context
+            )
+            return result["messages"][-1].content
+
+        state['agent_response'] = self.coalesce(
+            "generate", state, generate, tuple(state['chunk_ids']), conversation_context
+        )
 
         # Collect metadata from documents to show the resource 
         if documents:
@@ -137,12 +323,30 @@ class CorrectiveRAG():
 
         return state
 
-    def decide_generation_source(self,state):
-        """Decide whether to generate answer from documents or rewrite query."""
-        if len(state['relevant_documents']) > 0:
+    def corrective_step(self, state):
+        """
+        Next step after grading: "generate" when relevant chunks were found,
+        "transform_query" while local attempts remain (the first failure is always
+        rewritten), "web_search" once they are exhausted.
+        """
+        if len(state['chunk_ids']) > 0:
             return "generate"
-        else:
+        retries = len(state.get('corrective_attempts') or [None]) - 1
+        if retries < self.max_local_retries or retries == 0:
             return "transform_query"
+        return "web_search"
+
+    def decide_generation_source(self,state):
+        """Decide whether to generate answer from documents, rewrite the query or search the web."""
+        return self.corrective_step(state)
+
+    def decide_after_rewrite(self, state):
+        """Retry the rewritten query on the local index while attempts remain, then search the web."""
+        retries = len(state.get('corrective_attempts') or [None]) - 1
+        if retries < self.max_local_retries:
+            return "retrieve"
+        else:
+            return "web_search"
         
     @traceable
     def transform_query(self,state):
@@ -150,20 +354,25 @@ class CorrectiveRAG():
         Rewrites the user's query to improve retrieval or generation.
         Uses the basic LLM model with a structured prompt.
         """
+        # already standalone: follow-ups are condensed by start_turn
         query = state["query"]
-        model = state["basic_model"]
 
-        re_write_prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", QUERY_REWRITER_PROMPT),
-                ("human", "Here is the initial question: \n\n {query} \n Formulate an improved question."),
-            ]
-        )
+        def rewrite():
+            model = self.models.get("basic")
+            re_write_prompt = ChatPromptTemplate.from_messages(
+                [
+                    ("system", QUERY_REWRITER_PROMPT),
+                    ("human", "Here is the initial question: \n\n {query} \n Formulate an improved question."),
+                ]
+            )
 
-        query_rewriter = re_write_prompt | model | StrOutputParser()
-        better_query = query_rewriter.invoke({"query": query})
-    
-        state["query"] = better_query
+            query_rewriter = re_write_prompt | model | StrOutputParser()
+            return query_rewriter.invoke({"query": query})
+
+        started = time.perf_counter()
+        state["query"] = self.coalesce("rewrite", state, rewrite)
+        if state.get("corrective_attempts"):
+            state["corrective_attempts"][-1]["rewrite_seconds"] = round(time.perf_counter() - started, 4)
 
         return state
 
@@ -172,20 +381,28 @@ class CorrectiveRAG():
         Fallback generation using web search (Groq) when no documents are found.
         """
         query = state['query']
-        short_query = self.summarizer.summarize_text(query, n_phrases=10)
-
-        client = Groq(api_key=self.groq_key)
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "user",
-                    "content": short_query,
-                }
-            ],
-            model="groq/compound", 
-        )
 
-        response_text = chat_completion.choices[0].message.content
+        def search():
+            short_query = self.summarizer.summarize_text(query, n_phrases=10)
+
+            client = Groq(api_key=self.groq_key)
+            with METRICS.timer("llm_call_seconds", model="groq"):
+                chat_completion = client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": short_query,
+                        }
+                    ],
+                    model="groq/compound", 
+                )
+            usage = getattr(chat_completion, "usage", None)
+            if usage is not None:
+                record_token_usage("groq", usage.prompt_tokens, usage.completion_tokens)
+
+            return chat_completion.choices[0].message.content
+
+        response_text = self.coalesce("web_search", state, search)
 
         state["agent_response"] = (
             "I couldn't get any data from the documents I had, "
@@ -199,23 +416,50 @@ class CorrectiveRAG():
     def build_graph(self):
         """
         Build and compile the RAG workflow as a StateGraph:
-        - Nodes include model setup, retrieval, grading, generation, query transformation, and web search.
-        - Conditional edges allow fallback when documents are missing.
+        - Nodes include turn setup, structured lookup, analytical queries, retrieval, grading, generation, query transformation, and web search.
+        - Conditional edges allow fallback when documents are missing: rewritten queries
+          loop back to retrieval up to `max_local_retries` times before the web search.
         """
 
         workflow = StateGraph(CorrectiveRAGState)
 
-        # Define the nodes
-        workflow.add_node("get_model", self.get_model)
-        workflow.add_node("get_relevant_documents", self.get_relevant_documents)
-        workflow.add_node("grade_and_filter_documents", self.grade_and_filter_documents)
-        workflow.add_node("generate_answer_from_documents", self.generate_answer_from_documents)
-        workflow.add_node("generate_answer_from_web_search", self.generate_answer_from_web_search)
-        workflow.add_node("transform_query", self.transform_query)
+        nodes = {
+            "start_turn": self.start_turn,
+            "answer_from_structured_data": self.answer_from_structured_data,
+            "plan_analytical_query": self.plan_analytical_query,
+            "answer_from_analytical_index": self.answer_from_analytical_index,
+            "get_relevant_documents": self.get_relevant_documents,
+            "grade_and_filter_documents": self.grade_and_filter_documents,
+            "generate_answer_from_documents": self.generate_answer_from_documents,
+            "generate_answer_from_web_search": self.generate_answer_from_web_search,
+            "transform_query": self.transform_query,
+            "update_memory": self.memory.update,
+        }
+
+        # Define the nodes, each timed into the local `rag_node_seconds` histogram
+        for name, node in nodes.items():
+            workflow.add_node(name, METRICS.timed("rag_node_seconds", node=name)(node))
 
         # Build graph
-        workflow.add_edge(START, "get_model")
-        workflow.add_edge("get_model", "get_relevant_documents")
+        workflow.add_edge(START, "start_turn")
+        workflow.add_edge("start_turn", "answer_from_structured_data")
+        workflow.add_conditional_edges(
+            "answer_from_structured_data",
+            self.decide_answer_path,
+            {
+                "answered": "update_memory",
+                "retrieve": "plan_analytical_query",
+            },
+        )
+        workflow.add_conditional_edges(
+            "plan_analytical_query",
+            self.decide_retrieval_route,
+            {
+                "analytical": "answer_from_analytical_index",
+                "retrieve": "get_relevant_documents",
+            },
+        )
+        workflow.add_edge("answer_from_analytical_index", "update_memory")
         workflow.add_edge("get_relevant_documents", "grade_and_filter_documents")
         workflow.add_conditional_edges(
             "grade_and_filter_documents",
@@ -223,11 +467,20 @@ class CorrectiveRAG():
             {
                 "transform_query": "transform_query",
                 "generate": "generate_answer_from_documents",
+                "web_search": "generate_answer_from_web_search",
+            },
+        )
+        workflow.add_edge("generate_answer_from_documents", "update_memory")
+        workflow.add_conditional_edges(
+            "transform_query",
+            self.decide_after_rewrite,
+            {
+                "retrieve": "get_relevant_documents",
+                "web_search": "generate_answer_from_web_search",
             },
         )
-        workflow.add_edge("generate_answer_from_documents", END)
-        workflow.add_edge("transform_query", "generate_answer_from_web_search")
-        workflow.add_edge("generate_answer_from_web_search", END)
+        workflow.add_edge("generate_answer_from_web_search", "update_memory")
+        workflow.add_edge("update_memory", END)
 
 
         return workflow.compile(checkpointer=self.checkpointer)
\ No newline at end of file
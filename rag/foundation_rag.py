@@ -11,6 +11,9 @@ if project_root not in sys.path:
 
 from states.conversation_state import ConversationState
 from core.vector_db import VectorDB
+from core.chunk_store import ChunkStore
+from core.metrics import METRICS
+from rag.llm_metrics import LLMMetricsCallback
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import HumanMessage, SystemMessage, Document
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -29,17 +32,24 @@ class FoundationRAG:
         3. Generation: Use an LLM to produce a grounded, informative answer.
     """
 
-    def __init__(self,google_api_key):
+    def __init__(self,google_api_key, vector_index=None):
         """
         Initialize the RAG system:
         - Connects to the vector database (ChromaDB or equivalent).
         - Ensures the collection is ready and populated.
         - Initializes Google Generative AI client.
+
+        Args:
+            google_api_key (str): Google Generative AI API key.
+            vector_index (MmapVectorIndex, optional): Memory-mapped export of the collection,
+                searched instead of Chroma when given (shared by the serving workers).
         """
         self.google_api_key = google_api_key
+        self.vector_index = vector_index
         self.vector_db = VectorDB()
         self.collection = self.vector_db.create_collection()
         self.client = genai.Client(api_key=self.google_api_key)
+        self.chunk_store = ChunkStore(self.collection)
 
         # Initialize collection if empty
         if self.collection is not None and self.collection.count() == 0:
@@ -49,6 +59,48 @@ class FoundationRAG:
             print(f"Collection already has {self.collection.count()} documents. Skipping add.")
 
     @traceable
+    def retrieve_chunks(self, query, k=5):
+        """
+        Retrieve the top-k chunks for a query as ids and distances. The chunks
+        themselves are cached in `chunk_store`.
+
+        Args:
+            query (str): User's input query.
+            k (int, optional): Number of top chunks to return. Defaults to 5.
+
+        Returns:
+            tuple[list[str], list[float]]: Chunk ids and their Chroma distances (lower is closer).
+        """
+        if self.vector_index is not None:
+            return self.retrieve_from_index(query, k)
+
+        with METRICS.timer("chroma_query_seconds"):
+            results = self.collection.query(query_texts=[query], n_results=k)
+        ids = results.get("ids") or []
+        documents = results.get("documents") or []
+        if not ids or not documents:
+            return [], []
+        metadatas = results.get("metadatas") or [[{}] * len(ids[0])]
+        distances = results.get("distances") or [[0.0] * len(ids[0])]
+
+        # Combine retrieved texts and their corresponding metadata
+        self.chunk_store.put(ids[0], [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(documents[0], metadatas[0])
+        ])
+        return list(ids[0]), [float(d) for d in distances[0]]
+
+    def retrieve_from_index(self, query, k=5):
+        """`retrieve_chunks` over the memory-mapped vector index."""
+        with METRICS.timer("mmap_index_query_seconds"):
+            embedding = self.vector_db.embedding_function([query])[0]
+            ids, distances, rows = self.vector_index.search(embedding, k)
+        self.chunk_store.put(ids, [
+            Document(page_content=self.vector_index.documents[row], metadata=self.vector_index.metadatas[row])
+            for row in rows
+        ])
+        return ids, distances
+
     def retrieval(self, query, k=5):
         """
         Retrieve top-k most relevant documents from the vector database for a given query.
@@ -61,28 +113,19 @@ class FoundationRAG:
             list[Document]: List of LangChain `Document` objects containing 
                             the retrieved text and metadata.
         """
-        results = self.collection.query(query_texts=[query], n_results=k)
-        documents = results.get("documents", [])
-        metadatas = results.get("metadatas", [])
-
-        if not documents:
-            return []
-        
-        # Combine retrieved texts and their corresponding metadata
-        retrieved_docs = [
-            Document(page_content=documents[0][i], metadata=metadatas[0][i])
-            for i in range(len(documents[0]))
-        ]
-        return retrieved_docs
+        ids, _ = self.retrieve_chunks(query, k)
+        return self.chunk_store.get(ids)
 
     @traceable
-    def augmented(self, query, retrieved_documents):
+    def augmented(self, query, retrieved_documents, conversation_context=""):
         """
         Construct an augmented prompt by combining the user's query with the retrieved context.
 
         Args:
             query (str): User's question.
             retrieved_documents (list[Document]): Documents fetched from the vector store.
+            conversation_context (str, optional): Summary and recent turns of the chat,
+                used to understand follow-up questions.
 
         Returns:
             str: Fully formatted prompt ready to be passed to the LLM.
@@ -103,10 +146,16 @@ class FoundationRAG:
         - Include any relevant details like faculty names, contact info, admission requirements, or location if available in the context.
         - Keep your answer in a readable paragraph format.
         """
+        if conversation_context:
+            prompt += f"""
+        Conversation so far (use it only to understand what the question refers to):
+        {conversation_context}
+        """
         return prompt
 
     @traceable
-    def generation(self, state: ConversationState, retrieved_documents, model_name="gemini-2.5-flash") -> ConversationState:
+    def generation(self, state: ConversationState, retrieved_documents, model_name="gemini-2.5-flash",
+                   conversation_context="") -> ConversationState:
         """
         Generate an answer to the user query using the augmented context and Gemini LLM.
 
@@ -114,6 +163,7 @@ class FoundationRAG:
             state (ConversationState): Object holding the conversation's message.
             retrieved_documents (list[Document]): Relevant documents for context.
             model_name (str, optional): Google Generative AI model name. Defaults to "gemini-2.5-flash".
+            conversation_context (str, optional): Bounded conversation memory of the chat thread.
 
         Returns:
             dict: Updated conversation state containing the model's response message.
@@ -121,14 +171,15 @@ class FoundationRAG:
         # Extract the most recent user query
         query = state['messages'][-1].content
 
-        prompt = self.augmented(query, retrieved_documents)
+        prompt = self.augmented(query, retrieved_documents, conversation_context)
 
         messages = [
             SystemMessage(content=prompt),
             HumanMessage(content=query)
         ]
 
-        llm = ChatGoogleGenerativeAI(model=model_name, temperature=0.7, api_key=self.google_api_key)
+        llm = ChatGoogleGenerativeAI(model=model_name, temperature=0.7, api_key=self.google_api_key,
+                                     callbacks=[LLMMetricsCallback("generation")])
         response = llm.invoke(messages)
 
         return {"messages": [response]}
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from langchain_core.callbacks import BaseCallbackHandler
+from core.metrics import METRICS, record_token_usage
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    LangChain callback recording the wall time and token usage of every call
+    of a chat model into `METRICS` (`llm_call_seconds`, `llm_tokens_total`).
+
+    Attach it when building the model: `ChatGoogleGenerativeAI(..., callbacks=[LLMMetricsCallback("basic")])`.
+    """
+
+    def __init__(self, model: str):
+        """
+        Args:
+            model (str): Label of the model in the metrics.
+        """
+        self.model = model
+        self._starts = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            METRICS.observe("llm_call_seconds", time.perf_counter() - start, model=self.model)
+
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        record_token_usage(self.model, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+        METRICS.inc("llm_errors_total", model=self.model)
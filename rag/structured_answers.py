@@ -0,0 +1,216 @@
+import os
+import re
+import sys
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.university_index import UniversityIndex, faculty_words, normalize
+
+# a question asking for something: "what is the", "tell me the", "can you give me the", ...
+ASK = (r"(?:what (?:is|s|are|was)|whats|tell me|give me|show me|send me|do you (?:know|have)|"
+       r"i (?:need|want)|i m looking for|can (?:i|you) (?:get|have|find|give me|tell me|share))"
+       r" (?:the |a |an |its |their |his |her )?(?:\w+ ){0,4}?")
+# bare field queries: "email of ejust", "number of students at cairo university"
+BARE = r"^(?:the )?"
+OF = r" (?:of|for|at|in)\b"
+
+STUDENTS = r"(?:(?:total )?number of students|student (?:population|count|body|numbers?)|enrol+ments?)"
+STAFF = r"(?:(?:total )?number of (?:staff|staff members|employees|professors|lecturers|faculty members)|staff (?:size|count|number))"
+STAFF_WORDS = r"(?:staff|staff members|employees|professors|lecturers|faculty members|teaching staff)"
+CONTACT = (r"(?:contact (?:info(?:rmation)?|details|numbers?)|(?:tele)?phone(?: numbers?)?|e ?mail(?: address)?|"
+           r"(?:postal |street )?address|website|web site|facebook(?: page)?|twitter(?: account)?|instagram(?: account)?|"
+           r"linkedin(?: page)?|youtube(?: channel)?|social media(?: accounts?| pages?)?|location)")
+
+
+def field_question(noun: str, *forms: str) -> re.Pattern:
+    """Pattern of the questions asking for `noun` (with `ASK`, or as a bare query), or in one of `forms`."""
+    alternatives = [rf"\b{ASK}{noun}\b", BARE + noun + OF] + list(forms)
+    return re.compile("|".join(f"(?:{a})" for a in alternatives))
+
+
+# field -> pattern of the questions asking for it (matched on the normalized question);
+# a field word alone is not enough ("what is the total tuition for students at ...")
+FIELD_PATTERNS = {
+    "number_of_students": field_question(
+        STUDENTS,
+        r"\bhow many (?:total )?students\b",
+        r"\bhow many people (?:study|are studying|attend|are enrolled)\b",
+        r"\bhow big is the student (?:body|population)\b",
+    ),
+    "number_of_staff": field_question(
+        STAFF,
+        rf"\bhow many (?:total )?{STAFF_WORDS}\b",
+    ),
+    "gender": field_question(
+        r"gender(?: policy)?",
+        r"^(?:is|are) (?:\w+ ){1,8}?(?:mixed|co ?ed(?:ucational)?|single sex|(?:male|female|boys|girls|men|women) only)\b",
+        r"^(?:does|do) (?:\w+ ){1,8}?(?:accept|admit|allow) (?:women|men|girls|boys|females|males)\b",
+    ),
+    "rating": field_question(
+        r"rating",
+        r"\bwhat rating\b",
+        r"\bhow (?:is|was) (?:\w+ ){1,8}?rated\b",
+    ),
+    "research_centers_availability": re.compile(
+        r"^(?:does|do) (?:\w+ ){1,8}?have (?:any |a |an )?research (?:centers?|centres?|institutes?)\b"
+        r"|^(?:are|is) there (?:any |a |an )?research (?:centers?|centres?|institutes?)\b"
+        r"|\bresearch (?:centers?|centres?) availability\b"
+    ),
+    "type": field_question(
+        r"(?:type|kind) of (?:university|institution)",
+        r"^(?:is|are) (?:\w+ ){1,8}?(?:public|private|governmental) or (?:public|private|governmental)\b",
+        r"^(?:is|are) (?:\w+ ){1,8}?(?:a )?(?:public|private|governmental)(?: university| institution)?$",
+        r"^what (?:type|kind) of (?:university|institution) is\b",
+    ),
+    "contact_info": field_question(
+        CONTACT,
+        r"\bhow (?:can|do|could|should|would) (?:i|we|you|one) (?:contact|reach|call|email|e mail|get in touch with)\b",
+        r"^where is (?:\w+ ){1,8}?located\b",
+    ),
+}
+
+# contact_info entries asked for by a word of the question (all entries otherwise)
+CONTACT_PATTERNS = {
+    "address": re.compile(r"\b(address|located|location|where)\b"),
+    "contact numbers": re.compile(r"\b(phone|telephone|call|number)\b"),
+    "email": re.compile(r"\be ?mail\b"),
+    "website": re.compile(r"\b(website|web site|site)\b"),
+    "facebook": re.compile(r"\bfacebook\b"),
+    "twitter": re.compile(r"\btwitter\b"),
+    "linkedin": re.compile(r"\blinkedin\b"),
+    "youtubeplay": re.compile(r"\byoutube\b"),
+    "instagram": re.compile(r"\binstagram\b"),
+}
+HIDDEN_CONTACTS = {"map_src"}
+
+# questions the records cannot answer exactly, even when a field is asked for
+OPEN_ENDED = re.compile(
+    r"\b(why|how come|compare|comparison|versus|vs|better|best|worst|than|which|each|per|average|ratio|history|explain|"
+    r"describe|faculty of|college of|department|international|foreign|postgraduate|graduate|undergraduate|"
+    r"tuition|fees?|costs?|price|expenses|admissions?|apply|application|requirements?|required|scholarships?|"
+    r"good|bad|worth|recommend|ranking|ranked|programs?|courses?|majors?|deadlines?|dates?|when)\b"
+)
+# qualified counts ("female students") are not the total the records hold
+COUNT_QUALIFIERS = re.compile(r"\b(female|male|women|men|girls|boys|new|first year|egyptian)\b")
+# questions about a part of the university ("students of the engineering faculty",
+# "graduated last year"): the records only hold university-wide values
+SUBGROUP = re.compile(
+    r"\b(faculty|faculties|college|colleges|school|schools|department|departments|institute|institutes|"
+    r"branch|branches|campus|campuses|hospitals?|graduated|graduates|graduating|alumni|"
+    r"(?:last|this|next|each|per) year|in \d{4})\b"
+)
+# words of faculty names that also are ordinary question words ("how many staff work at ...")
+GENERIC_WORDS = {"work", "it", "near", "high", "higher", "home", "system", "systems", "national", "public",
+                 "research", "researches", "special", "needs", "small", "early", "basic", "specific", "applied",
+                 "advanced", "data", "development", "international", "regional", "men", "women", "boys", "girls"}
+
+FIELD_LABELS = {
+    "number_of_students": "Number of students",
+    "number_of_staff": "Number of staff",
+    "gender": "Gender",
+    "rating": "Rating",
+    "research_centers_availability": "Research centers",
+    "type": "Type",
+    "contact_info": "Contact information",
+}
+
+
+def format_value(field: str, value: str) -> str:
+    if field in ("number_of_students", "number_of_staff") and value.isdigit():
+        return f"{int(value):,}"
+    if field == "research_centers_availability":
+        return {"yes": "available", "no": "not available"}.get(value, value)
+    return value
+
+
+class StructuredAnswerer:
+    """
+    Fast path for factual questions about one university: a regex intent /
+    field matcher over `UniversityIndex`. Questions asking for stored fields
+    (students, staff, gender, rating, research centers, type, contact info)
+    of exactly one university are answered from the record in well under a
+    millisecond, without retrieval or LLM calls. Everything else returns None
+    and goes through the CorrectiveRAG workflow.
+    """
+
+    def __init__(self, index: UniversityIndex = None):
+        self.index = index or UniversityIndex()
+        # subjects taught somewhere ("medicine", "engineering"), without the words of university names
+        name_words = {word for alias in self.index.aliases for word in alias.split()}
+        self.subject_words = set().union(*(
+            faculty_words(faculty["name"]) for record in self.index.records.values() for faculty in record["faculties"]
+        )) - name_words - GENERIC_WORDS
+
+    def asks_about_part(self, text: str) -> bool:
+        """
+        True if the question names a faculty, subject or subgroup besides the field
+        and the university ("the email of the medicine faculty at cairo university").
+        """
+        for pattern in FIELD_PATTERNS.values():
+            text = pattern.sub(" ", text)
+        rest = self.index.pattern.sub(" ", self.index.prepare(text))
+        return bool(SUBGROUP.search(rest) or self.subject_words.intersection(rest.split()))
+
+    def match(self, question: str):
+        """
+        Returns:
+            tuple[list[str], list[str]]: Universities mentioned and fields asked for.
+        """
+        text = normalize(question)
+        universities = self.index.find_universities(text)
+        fields = [field for field, pattern in FIELD_PATTERNS.items() if pattern.search(text)]
+        if OPEN_ENDED.search(text) or (fields and self.asks_about_part(text)):
+            fields = []
+        elif COUNT_QUALIFIERS.search(text):
+            fields = [f for f in fields if f not in ("number_of_students", "number_of_staff")]
+        return universities, fields
+
+    def answer(self, question: str):
+        """
+        Answer a question from the structured records.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            tuple[str, dict] | None: The answer and its source metadata (same keys as
+            the answers from documents, plus "fields"), or None when the question
+            needs the full workflow.
+        """
+        universities, fields = self.match(question)
+        if len(universities) != 1 or not fields:
+            return None
+        name = universities[0]
+        record = self.index.record(name)
+        text = normalize(question)
+
+        lines = []
+        for field in fields:
+            if field == "contact_info":
+                contacts = [c for c in record["contact_info"]
+                            if c["contact_name"] not in HIDDEN_CONTACTS and c["contact_info"].strip()]
+                asked = [c for c in contacts if c["contact_name"] in CONTACT_PATTERNS
+                         and CONTACT_PATTERNS[c["contact_name"]].search(text)]
+                contacts = asked or contacts
+                if not contacts:
+                    return None
+                lines.append(f"- **{FIELD_LABELS[field]}**:")
+                lines += [f"    - {c['contact_name'].replace('youtubeplay', 'youtube')}: {c['contact_info']}"
+                          for c in contacts]
+            else:
+                value = str(record.get(field, "")).strip()
+                if not value:
+                    # missing in the records: let retrieval or the web search try
+                    return None
+                lines.append(f"- **{FIELD_LABELS[field]}**: {format_value(field, value)}")
+
+        metadata = self.index.metadata(name)
+        response = f"According to the university records for **{self.index.display_name(name)}**:\n\n" + "\n".join(lines)
+        return response, {
+            "sources": [metadata["source"]],
+            "university_name": [name],
+            "fields": fields,
+        }
@@ -0,0 +1,398 @@
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import threading
+import argparse
+from concurrent.futures import Future
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from dotenv import load_dotenv
+from core.metrics import METRICS
+from core.warmup import WARMUP_QUERY, Warmup, warm_up_models
+
+load_dotenv()
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8700
+# a dead worker is restarted at most this often, so a crashing one cannot spin
+RESTART_DELAY = 1.0
+MAX_BODY_BYTES = 1 << 20
+
+
+def preload(startup: Warmup):
+    """
+    Load what every worker needs before forking, so the workers share it
+    copy-on-write instead of each loading its own copy:
+        - the KeyBERT model used for session titles,
+        - the MiniLM embedding model of the collection (cached by chromadb per process),
+        - the memory-mapped vector index, exported from the Chroma collection if stale.
+    Each is warmed with a synthetic input (see `core/warmup.py`).
+
+    Returns:
+        MmapVectorIndex: The shared vector index.
+    """
+    from chromadb.api.client import SharedSystemClient
+    from core.mmap_vector_index import MmapVectorIndex
+
+    vector_db = warm_up_models(startup)
+    if vector_db is None:
+        raise RuntimeError("the Chroma collection could not be opened")
+    vector_index = startup.step("mmap_export", MmapVectorIndex.open_or_export, vector_db.chroma_collection)
+    if vector_index is None:
+        raise RuntimeError("the memory-mapped vector index could not be opened")
+    startup.step("mmap_index", vector_index.search, vector_db.embedding_function([WARMUP_QUERY])[0])
+
+    # the Chroma client holds SQLite connections and threads: every worker opens its own
+    del vector_db
+    SharedSystemClient.clear_system_cache()
+    startup.finish()
+    return vector_index
+
+
+class Worker:
+    """
+    Per-process state of a serving worker: its own chat storage (SQLite pool and
+    background threads) and compiled graphs, created after the fork.
+    """
+
+    def __init__(self, vector_index):
+        from core.sqlite_chat_storage import SQLiteChatStorage
+
+        self.vector_index = vector_index
+        self.store = SQLiteChatStorage()
+        self.startup = Warmup()
+
+    def warm_up(self):
+        """
+        Open this worker's Chroma client and build the graph of the environment API
+        keys (if set) with a synthetic retrieval. Runs before the worker accepts
+        connections, so requests only reach warm workers.
+        """
+        google_key = os.environ.get("GOOGLE_API_KEY")
+        groq_key = os.environ.get("GROQ_API_KEY")
+        if google_key and groq_key:
+            if self.startup.step("graph", self.graph, google_key, groq_key) is not None:
+                self.startup.step("retrieval", self.rag(google_key, groq_key).base_rag.retrieve_chunks, WARMUP_QUERY)
+        self.startup.step("chat_storage", self.store.list_sessions, limit=1)
+        self.startup.finish()
+
+    @lru_cache(maxsize=8)
+    def rag(self, google_key: str, groq_key: str):
+        from rag.corrective_rag import CorrectiveRAG
+
+        return CorrectiveRAG(google_key, groq_key, vector_index=self.vector_index)
+
+    @lru_cache(maxsize=8)
+    def graph(self, google_key: str, groq_key: str):
+        # built once per key pair: its checkpointer holds the memory of every chat thread
+        return self.rag(google_key, groq_key).build_graph()
+
+    @staticmethod
+    def resolve(value):
+        """Message ids and names of the write-behind queue are Futures."""
+        return value.result() if isinstance(value, Future) else value
+
+    def ask(self, session_id: str, query: str, recent_turns=None, google_key: str = "", groq_key: str = ""):
+        """
+        Run one chat turn: store the question, answer it through the CorrectiveRAG
+        graph (thread = session) and store the answer.
+
+        Returns:
+            dict: response, metadata, user_message_id and message_id.
+        """
+        compiled_graph = self.graph(google_key, groq_key)
+        config = {"configurable": {"thread_id": session_id}}
+        graph_input = {"query": query}
+        if recent_turns and not compiled_graph.get_state(config).values:
+            # session reopened from the history: seed the memory with its loaded turns
+            graph_input["recent_turns"] = recent_turns
+
+        if self.store.get_session(session_id) is None:
+            self.store.create_session(session_id, "new chat")
+        if not self.store.get_last_n_messages(session_id, 1, decode_metadata=False):
+            self.store.update_session_name(session_id, query)
+        user_message_id = self.store.add_user_message(session_id, query)
+
+        try:
+            result = compiled_graph.invoke(graph_input, config=config)
+            response = result.get("agent_response", "I can’t understand the question.")
+            agent_metadata = result.get("agent_metadata", {})
+        except Exception as e:
+            print("Invoke error:", e)
+            response = "I can’t understand the question."
+            agent_metadata = {}
+
+        message_id = self.store.add_ai_message(session_id, response, agent_metadata)
+        return {
+            "response": response,
+            "metadata": agent_metadata,
+            "user_message_id": self.resolve(user_message_id),
+            "message_id": self.resolve(message_id),
+        }
+
+
+def make_handler(worker: Worker):
+    class Handler(BaseHTTPRequestHandler):
+        """
+        JSON API of a worker:
+            GET    /health
+            GET    /ready                      worker warm-up status and per-component timings
+            GET    /sessions?limit=&user=&before_created_at=&before_id=&since_created_at=&since_id=
+            POST   /sessions                   {"session_id"?, "name"?, "user_id"?}
+            GET    /sessions/{id}/messages?last=&before_id=&decode_metadata=
+            POST   /sessions/{id}/messages     {"query", "recent_turns"?}
+            DELETE /sessions/{id}
+            GET    /search?q=&limit=&user=
+        API keys come from the X-Google-Api-Key / X-Groq-Api-Key headers, or
+        GOOGLE_API_KEY / GROQ_API_KEY in the environment.
+        """
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status: int, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise ValueError("request body too large")
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+            return payload
+
+        @staticmethod
+        def cursor(query: dict, name: str):
+            """Keyset cursor (created_at, id) of the session list, from `<name>_created_at` and `<name>_id`."""
+            if f"{name}_created_at" not in query:
+                return None
+            return query[f"{name}_created_at"], query.get(f"{name}_id", "")
+
+        def route(self, method: str):
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            store = worker.store
+
+            if method == "GET" and parts == ["health"]:
+                return 200, {"status": "ok", "pid": os.getpid(), "chunks": len(worker.vector_index)}
+            if method == "GET" and parts == ["ready"]:
+                status = worker.startup.status()
+                return (200 if status["ready"] else 503), {**status, "pid": os.getpid()}
+            if method == "GET" and parts == ["sessions"]:
+                return 200, store.list_sessions(
+                    limit=int(query["limit"]) if "limit" in query else None,
+                    before=self.cursor(query, "before"),
+                    since=self.cursor(query, "since"),
+                    user_id=query.get("user"),
+                )
+            if method == "POST" and parts == ["sessions"]:
+                payload = self.read_json()
+                session_id = payload.get("session_id") or store.time_random_id()
+                store.create_session(session_id, payload.get("name", "new chat"), payload.get("user_id"))
+                # committed before answering: the next request may be served by another worker
+                store.get_session(session_id)
+                return 201, {"session_id": session_id}
+            if method == "GET" and parts == ["search"]:
+                return 200, store.search_messages(query.get("q", ""), limit=int(query.get("limit", 20)),
+                                                  user_id=query.get("user"))
+            if len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+                worker.resolve(store.delete_session(parts[1]))
+                return 200, {"deleted": parts[1]}
+            if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages":
+                if method == "GET":
+                    decode_metadata = query.get("decode_metadata", "1") != "0"
+                    if "last" not in query:
+                        return 200, store.get_messages(parts[1], decode_metadata=decode_metadata)
+                    before_id = int(query["before_id"]) if "before_id" in query else None
+                    return 200, store.get_last_n_messages(parts[1], int(query["last"]), before_id=before_id,
+                                                          decode_metadata=decode_metadata)
+                if method == "POST":
+                    payload = self.read_json()
+                    if not str(payload.get("query", "")).strip():
+                        return 400, {"error": "missing query"}
+                    google_key = self.headers.get("X-Google-Api-Key") or os.environ.get("GOOGLE_API_KEY", "")
+                    groq_key = self.headers.get("X-Groq-Api-Key") or os.environ.get("GROQ_API_KEY", "")
+                    if not google_key or not groq_key:
+                        return 401, {"error": "missing Google or Groq API key"}
+                    return 200, worker.ask(parts[1], payload["query"], payload.get("recent_turns"),
+                                           google_key, groq_key)
+            return 404, {"error": f"no route for {method} {url.path}"}
+
+        def handle_method(self, method: str):
+            with METRICS.timer("api_request_seconds", method=method):
+                try:
+                    status, payload = self.route(method)
+                except (ValueError, json.JSONDecodeError) as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e:
+                    print(f"API error on {method} {self.path}: {e}")
+                    status, payload = 500, {"error": "internal error"}
+            METRICS.inc("api_requests_total", method=method, status=status)
+            self.send_json(status, payload)
+
+        def do_GET(self):
+            self.handle_method("GET")
+
+        def do_POST(self):
+            self.handle_method("POST")
+
+        def do_DELETE(self):
+            self.handle_method("DELETE")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve_starting(listener: socket.socket, startup: Warmup):
+    """
+    Answer on the listening socket while the parent preloads: /ready and
+    /health report the startup progress, every other route is 503.
+    Single-threaded, and stopped before the workers are forked.
+
+    Returns:
+        tuple[HTTPServer, threading.Thread]: The running server and its thread.
+    """
+    class StartingHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status = startup.status()
+            ready = status["ready"]
+            if self.path.split("?")[0] == "/health":
+                code, payload = 200, {"status": "starting", "pid": os.getpid()}
+            elif self.path.split("?")[0] == "/ready":
+                code, payload = (200 if ready else 503), {**status, "pid": os.getpid()}
+            else:
+                code, payload = 503, {"error": "starting"}
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_POST = do_DELETE = do_GET
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer(listener.getsockname()[:2], StartingHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = listener
+    thread = threading.Thread(target=server.serve_forever, name="starting-server", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def serve_worker(listener: socket.socket, vector_index):
+    """Serve requests on the inherited listening socket until SIGTERM."""
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker = Worker(vector_index)
+    # warm up before accepting: the kernel only hands connections to workers in accept()
+    worker.warm_up()
+    # each worker counts its own requests: snapshots are told apart by the worker label
+    METRICS.start_sqlite_export(labels={"worker": os.getpid()})
+    server = ThreadingHTTPServer(listener.getsockname()[:2], make_handler(worker), bind_and_activate=False)
+    server.socket.close()
+    server.socket = listener
+    print(f"Worker {os.getpid()} ready")
+    try:
+        server.serve_forever()
+    finally:
+        worker.store.close()
+
+
+def run(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = 2):
+    """
+    Pre-fork server: open the listening socket (answering /ready with 503 meanwhile),
+    preload the shared models and index, fork `workers` processes that all accept
+    on it once warm, and restart the ones that die. The kernel spreads connections over the workers, so CPU-bound
+    retrieval and titling run on several cores instead of under one GIL.
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(128)
+
+    # /ready answers 503 during the preload; the server thread is stopped before forking
+    startup = Warmup()
+    starting, starting_thread = serve_starting(listener, startup)
+    try:
+        vector_index = preload(startup)
+    finally:
+        starting.shutdown()
+        starting_thread.join()
+    print(f"Serving on http://{host}:{listener.getsockname()[1]} with {workers} workers")
+
+    children = {}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                serve_worker(listener, vector_index)
+            except SystemExit as e:
+                code = e.code or 0
+            except BaseException as e:
+                print(f"Worker {os.getpid()} crashed: {e}")
+                code = 1
+            os._exit(code)
+        children[pid] = time.monotonic()
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        time.sleep(max(0.0, RESTART_DELAY - (time.monotonic() - started)))
+        spawn()
+    listener.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the CorrectiveRAG graph over HTTP with N worker processes.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                        help="Number of worker processes (default: number of CPUs).")
+    args = parser.parse_args()
+    run(args.host, args.port, args.workers)
@@ -1,15 +1,29 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.vectorstores import Chroma
 from typing_extensions import TypedDict, NotRequired, Optional
 
 class CorrectiveRAGState(TypedDict):
-    """ CorrectiveRAGState state for the RAG system. """
+    """
+    CorrectiveRAGState state for the RAG system.
+
+    It is checkpointed at every step, so it only holds plain data: retrieved
+    chunks are referenced by id (resolved through `FoundationRAG.chunk_store`)
+    and models live in the `ModelRegistry` of `CorrectiveRAG`.
+    """
     query: str
     agent_response: str
-    vector_store: Chroma
-    relevant_documents: list[str]
-    filter_model: ChatGoogleGenerativeAI
-    basic_model: ChatGoogleGenerativeAI
+    chunk_ids: list[str]
+    chunk_scores: list[float]
     agent_metadata: NotRequired[Optional[dict]]
+    # True when the turn was answered from the structured records (see rag/structured_answers.py)
+    structured_answer: NotRequired[bool]
+    # plan of an aggregate / comparison question (see rag/analytical_queries.py)
+    analytical_plan: NotRequired[Optional[dict]]
+    # corrective loop of the turn: chunks graded so far, and the cost and outcome of
+    # every retrieval attempt (query, k, new chunks, grading calls, timings)
+    graded_chunk_ids: NotRequired[list[str]]
+    corrective_attempts: NotRequired[list[dict]]
+    # conversation memory of the thread (see rag/conversation_memory.py)
+    question: NotRequired[str]
+    conversation_summary: NotRequired[str]
+    recent_turns: NotRequired[list[dict]]
 
 
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain.schema")
+
+from rag.analytical_queries import AnalyticalQueryEngine
+
+CAIRO_ALEXANDRIA = ["cairo university", "alexandria university"]
+
+# question -> (action, universities)
+COMPARISONS = [
+    ("Compare faculties of Cairo and Alexandria", "compare_faculties", CAIRO_ALEXANDRIA),
+    ("compare Cairo and Alexandria", "compare", CAIRO_ALEXANDRIA),
+    ("Compare Cairo University and Alexandria", "compare", CAIRO_ALEXANDRIA),
+    ("compare the number of students and staff of Cairo and Alexandria", "compare", CAIRO_ALEXANDRIA),
+    ("What is the difference between Ain Shams and Helwan in students?", "compare",
+     ["ain shams university", "helwan university"]),
+    ("compare Cairo and Alexandria universities", "compare", CAIRO_ALEXANDRIA),
+]
+
+# question -> faculty words of the plan
+FACULTY_LOOKUPS = [
+    ("universities with a faculty of medicine and their admission requirements", ["medicine"]),
+    ("universities with a faculty of medicine and more than 100,000 students", ["medicine"]),
+    ("list universities with a faculty of arts and humanities", ["arts", "humanities"]),
+    ("which universities have a faculty of computers and information", ["computers", "information"]),
+]
+
+# question -> (sort column, descending)
+RANKINGS = [
+    ("which universities have the most staff per student", "staff_per_student", True),
+    ("universities with the lowest staff to student ratio", "staff_per_student", False),
+    ("which universities have the most students per staff", "students_per_staff", True),
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return AnalyticalQueryEngine()
+
+
+@pytest.mark.parametrize("question, action, universities", COMPARISONS)
+def test_named_universities_are_compared(engine, question, action, universities):
+    plan = engine.plan(question)
+    assert plan is not None, question
+    assert plan["action"] == action
+    assert plan["universities"] == universities
+
+
+@pytest.mark.parametrize("question, faculty", FACULTY_LOOKUPS)
+def test_faculty_name_stops_at_the_faculty(engine, question, faculty):
+    plan = engine.plan(question)
+    assert plan is not None, question
+    assert plan["faculty"] == faculty
+
+
+@pytest.mark.parametrize("question, column, descending", RANKINGS)
+def test_ratio_rankings_sort_by_the_ratio(engine, question, column, descending):
+    plan = engine.plan(question)
+    assert plan is not None, question
+    assert (plan["action"], plan["sort"], plan["descending"]) == ("list", column, descending)
+    assert plan["columns"] == [column]
+
+
+def test_bare_names_are_spelled_out_only_after_a_comparison(engine):
+    index = engine.table.index
+    assert index.find_universities("Cairo and Alexandria") == []
+    assert index.find_universities("between public and private universities") == []
+
+
+def test_faculty_lookup_skips_faculties_qualifying_the_name(engine):
+    rows = engine.table.faculty_rows(["medicine"])
+    faculties = {faculty for names in rows.values() for faculty in names}
+    assert "faculty of medicine" in faculties
+    assert not any("veterinary" in faculty or "dental" in faculty for faculty in faculties)
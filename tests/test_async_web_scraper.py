@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import shutil
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+pytest.importorskip("playwright.async_api")
+
+from core.async_web_scraper import AsyncWebScraper
+from core.scrape_checkpoint import ScrapeCheckpoint
+from core.scrape_manifest import ScrapeManifest
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# home page, two listing pages, and two universities; the contacts entry of
+# Beta University is a javascript postback (no direct URL, scraped by clicking)
+SITE = os.path.join(FIXTURES, "universities_site")
+EXPECTED = os.path.join(FIXTURES, "universities_site_raw.json")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def chromium():
+    from playwright.sync_api import sync_playwright
+
+    try:
+        with sync_playwright() as pw:
+            pw.chromium.launch().close()
+    except Exception as e:
+        pytest.skip(f"Chromium is not available: {e}")
+
+
+def serve(directory):
+    """Serve a directory over HTTP (with Last-Modified, for conditional GETs)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(scope="module")
+def site(chromium):
+    """The fixture website."""
+    server = serve(SITE)
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def site_copy(chromium, tmp_path):
+    """A copy of the fixture website that a test can edit, and its URL."""
+    directory = tmp_path / "site"
+    shutil.copytree(SITE, directory)
+    server = serve(str(directory))
+    yield directory, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def expected():
+    with open(EXPECTED, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_scraper(site, tmp_path, manifest=None):
+    scraper = AsyncWebScraper(
+        base_url=site,
+        pool_size=2,
+        min_request_interval=0,
+        timeout=10000,
+        manifest=manifest,
+        checkpoint=ScrapeCheckpoint(str(tmp_path / "scrape_checkpoint.jsonl")),
+        max_retries=1,
+    )
+    scraper.raw_data_folder = str(tmp_path)
+    return scraper
+
+
+def load_raw(tmp_path):
+    with open(tmp_path / "raw_universities_data.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_full_crawl_matches_expected_raw_data(site, tmp_path, expected):
+    scraper = make_scraper(site, tmp_path)
+    scraper.scrap_public_universities()
+    scraper.save_data_to_json()
+
+    assert scraper.failed_links == []
+    assert load_raw(tmp_path) == expected
+    # a clean full crawl compacts the checkpoint, keeping the URL -> name index
+    checkpoint = ScrapeCheckpoint(str(tmp_path / "scrape_checkpoint.jsonl"))
+    assert checkpoint.links == [] and checkpoint.completed == {}
+    assert sorted(checkpoint.names.values()) == ["Alpha University", "Beta University"]
+
+
+def test_incremental_rerun_of_unchanged_site_keeps_the_data(site, tmp_path, expected):
+    manifest_path = str(tmp_path / "scrape_manifest.json")
+
+    first = make_scraper(site, tmp_path, ScrapeManifest(manifest_path))
+    first.scrap_public_universities(incremental=True)
+    first.save_data_to_json()
+    assert first.changed_universities == ["Alpha University", "Beta University"]
+    assert load_raw(tmp_path) == expected
+
+    second = make_scraper(site, tmp_path, ScrapeManifest(manifest_path))
+    second.scrap_public_universities(incremental=True)
+    second.save_data_to_json()
+    assert second.changed_universities == []
+    assert second.removed_universities == []
+    assert load_raw(tmp_path) == expected
+
+
+def test_incremental_rerun_detects_a_changed_postback_page(site_copy, tmp_path):
+    directory, url = site_copy
+    manifest_path = str(tmp_path / "scrape_manifest.json")
+    first = make_scraper(url, tmp_path, ScrapeManifest(manifest_path))
+    first.scrap_public_universities(incremental=True)
+    first.save_data_to_json()
+
+    # the contacts page of Beta University is only reachable through a javascript postback
+    contacts = directory / "beta_contacts.html"
+    contacts.write_text(contacts.read_text(encoding="utf-8").replace("034567890", "034567891"), encoding="utf-8")
+
+    second = make_scraper(url, tmp_path, ScrapeManifest(manifest_path))
+    second.scrap_public_universities(incremental=True)
+    second.save_data_to_json()
+    assert second.changed_universities == ["Beta University"]
+    beta = next(u for u in load_raw(tmp_path) if u["university_name"] == "Beta University")
+    assert "034567891" in json.dumps(beta)
@@ -0,0 +1,39 @@
+import os
+import sys
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.scrape_checkpoint import ScrapeCheckpoint
+
+
+def make_checkpoint(tmp_path):
+    return ScrapeCheckpoint(str(tmp_path / "scrape_checkpoint.jsonl"))
+
+
+def test_run_with_a_quarantined_university_is_settled_and_compacted(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    checkpoint.save_links(["u/alpha", "u/beta"])
+    checkpoint.save_university("u/alpha", {"university_name": "Alpha University"})
+    checkpoint.quarantine("u/beta", "timeout")
+    assert checkpoint.settled()
+
+    checkpoint.finish()
+    reloaded = make_checkpoint(tmp_path)
+    # the next run collects the links again, still skipping the quarantined university
+    assert reloaded.links == [] and reloaded.completed == {}
+    assert reloaded.is_quarantined("u/beta")
+    assert reloaded.names == {"u/alpha": "Alpha University"}
+
+
+def test_interrupted_run_is_resumed(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    checkpoint.save_links(["u/alpha", "u/beta"])
+    checkpoint.save_university("u/alpha", {"university_name": "Alpha University"})
+    assert not checkpoint.settled()
+
+    reloaded = make_checkpoint(tmp_path)
+    assert reloaded.links == ["u/alpha", "u/beta"]
+    assert list(reloaded.completed) == ["u/alpha"]
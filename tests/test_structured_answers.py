@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+# --- Project path setup ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from rag.structured_answers import StructuredAnswerer
+
+# question -> (university, fields) answered from the records
+ANSWERED = [
+    ("How many students study at Cairo University?", "cairo university", ["number_of_students"]),
+    ("how many students are in the university of cairo", "cairo university", ["number_of_students"]),
+    ("What is the number of students at Cairo University?", "cairo university", ["number_of_students"]),
+    ("What is the rating of Suez Canal University?", "suez canal university", ["rating"]),
+    ("What's the rating of suez university", "suez university", ["rating"]),
+    ("Does Al-Azhar University have research centers?", "al azhar university", ["research_centers_availability"]),
+    ("Is Azhar University mixed or single sex?", "al azhar university", ["gender"]),
+    ("Is Tanta University public or private?", "tanta university", ["type"]),
+    ("What type of university is Tanta University?", "tanta university", ["type"]),
+    ("How can I contact Ain Shams University?", "ain shams university", ["contact_info"]),
+    ("What is the phone number of Mansoura University?", "mansoura university", ["contact_info"]),
+    ("email of EJUST", "egypt japan university of science & technology (ejust)", ["contact_info"]),
+    ("Where is Zagazig University located?", "zagazig university", ["contact_info"]),
+    ("How many staff work at Cairo University?", "cairo university", ["number_of_staff"]),
+    ("How many faculty members does Assiut University have?", "assiut university", ["number_of_staff"]),
+]
+
+# questions mentioning a field word without asking for the field, or that the records cannot answer
+NOT_ANSWERED = [
+    "What are the admission requirements for public universities like Cairo University or Ain Shams?",
+    "What is the total tuition for students at Cairo University?",
+    "Can you call Ain Shams University a good university?",
+    "Is Cairo University a good place for international students?",
+    "What are the fees for students at Tanta University?",
+    "How do I apply to Mansoura University as a transfer student?",
+    "Is Tanta University worth it for public health students?",
+    "What programs does Cairo University offer to its students?",
+    "How many female students study at Cairo University?",
+    "Compare the students of Cairo University and Alexandria University",
+    "What faculties does Cairo University have?",
+    "Which university has the most students?",
+    "Tell me about the faculty of law at Cairo University",
+    "how many students at helwan?",
+    "how many students are enrolled in medicine at cairo university",
+    "how many staff work in the engineering faculty at cairo university",
+    "how many students graduated from cairo university last year",
+    "what is the email of the medicine faculty at cairo university",
+    "How many pharmacy students are there at Tanta University?",
+    "What is the phone number of the Ain Shams University hospital?",
+]
+
+
+@pytest.fixture(scope="module")
+def answerer():
+    return StructuredAnswerer()
+
+
+@pytest.mark.parametrize("question, university, fields", ANSWERED)
+def test_field_questions_are_answered(answerer, question, university, fields):
+    result = answerer.answer(question)
+    assert result is not None, question
+    response, metadata = result
+    assert metadata["university_name"] == [university]
+    assert metadata["fields"] == fields
+    assert response.startswith("According to the university records")
+
+
+@pytest.mark.parametrize("question", NOT_ANSWERED)
+def test_other_questions_go_to_the_workflow(answerer, question):
+    assert answerer.answer(question) is None
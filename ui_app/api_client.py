@@ -0,0 +1,84 @@
+import json
+import time
+import random
+import urllib.error
+import urllib.request
+from urllib.parse import quote, urlencode
+
+
+class ApiClient:
+    """
+    Client of the serving API (`serving/api_server.py`), used by the Streamlit
+    UI when RAG_API_URL is set: chat turns (retrieval, generation, titling and
+    message storage) then run in the server's worker processes.
+
+    It also implements the chat storage methods the UI reads the history with
+    (same signatures as `SQLiteChatStorage`), so the thin client loads no model
+    and opens no database.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 300.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload=None, headers=None, params=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        url = self.base_url + path + ("?" + urlencode(params) if params else "")
+        request = urllib.request.Request(url, data=data, method=method,
+                                         headers={"Content-Type": "application/json", **(headers or {})})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"{method} {path} failed with {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+
+    @staticmethod
+    def _session_path(session_id: str) -> str:
+        return f"/sessions/{quote(session_id, safe='')}"
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def ask(self, session_id: str, query: str, google_key: str, groq_key: str, recent_turns=None) -> dict:
+        """
+        Ask a question in a chat session. The server stores the question and the
+        answer, and names the session on its first message.
+
+        Returns:
+            dict: response, metadata, user_message_id and message_id.
+        """
+        return self._request(
+            "POST", self._session_path(session_id) + "/messages",
+            {"query": query, "recent_turns": recent_turns or []},
+            {"X-Google-Api-Key": google_key, "X-Groq-Api-Key": groq_key},
+        )
+
+    # ---------- Chat storage methods used by the UI ----------
+    def time_random_id(self):
+        """Generate a unique session ID based on timestamp and random number."""
+        timestamp = int(time.time() * 1000)
+        rand = random.randint(1000, 9999)
+        return f"session_{timestamp}_{rand}"
+
+    def create_session(self, session_id: str, name: str, user_id=None) -> str:
+        self._request("POST", "/sessions", {"session_id": session_id, "name": name, "user_id": user_id})
+        return session_id
+
+    def delete_session(self, session_id: str):
+        self._request("DELETE", self._session_path(session_id))
+
+    def list_sessions(self, limit=None, before=None, since=None, user_id=None) -> list:
+        params = {"limit": limit, "user": user_id}
+        for name, cursor in (("before", before), ("since", since)):
+            if cursor is not None:
+                params[f"{name}_created_at"], params[f"{name}_id"] = cursor
+        return self._request("GET", "/sessions", params=params)
+
+    def get_last_n_messages(self, session_id: str, n: int = 20, before_id=None, decode_metadata: bool = True) -> list:
+        return self._request("GET", self._session_path(session_id) + "/messages", params={
+            "last": n, "before_id": before_id, "decode_metadata": int(decode_metadata),
+        })
+
+    def search_messages(self, query: str, limit: int = 20, user_id=None) -> list:
+        return self._request("GET", "/search", params={"q": query, "limit": limit, "user": user_id})
@@ -1,20 +1,81 @@
 import sys
 import os
+import threading
 import streamlit as st
 # --- Project path setup ---
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from rag.corrective_rag import CorrectiveRAG
-from core.vector_db import VectorDB
-from core.sqlite_chat_storage import SQLiteChatStorage
+from core.metrics import METRICS
+from core.warmup import Warmup, warm_up_models
 from ui_app.ui_component import UIComponent
+from ui_app.api_client import ApiClient
+
+# With RAG_API_URL set the app is a thin client of serving/api_server.py: chat turns and the
+# chat history are served by its worker processes, and no model or database is loaded here
+api_client = ApiClient(os.environ["RAG_API_URL"]) if os.environ.get("RAG_API_URL") else None
 
 # --- Page setup ---
-store = SQLiteChatStorage()
+@st.cache_resource
+def get_chat_storage():
+    from core.sqlite_chat_storage import SQLiteChatStorage
+
+    # one storage (and one SQLite connection pool) shared by all sessions
+    return SQLiteChatStorage()
+
+@st.cache_resource
+def get_maintenance(_store):
+    from core.sqlite_maintenance import SQLiteMaintenance
+
+    # retention, archiving, VACUUM and ANALYZE in a background thread
+    maintenance = SQLiteMaintenance(_store)
+    maintenance.start()
+    return maintenance
+
+@st.cache_resource
+def get_startup():
+    # startup phase of the process: readiness flag and per-component timings
+    return Warmup()
+
+@st.cache_resource
+def start_metrics_export():
+    # local instrumentation: snapshots in the `metrics_samples` table of the chat
+    # database, plus Prometheus /metrics and readiness /ready endpoints when METRICS_PORT is set
+    if api_client is None:
+        METRICS.start_sqlite_export()
+    if os.environ.get("METRICS_PORT"):
+        METRICS.serve_prometheus(int(os.environ["METRICS_PORT"]), readiness=get_startup().status)
+    return METRICS
+
+# --- Initialize once ---
+@st.cache_resource
+def start_warm_up():
+    # load and warm every model and the vector index with a synthetic query, in a
+    # background thread started by the first run of the process: pages render
+    # meanwhile and the chat input is enabled once `startup.ready` is set
+    startup = get_startup()
+    if api_client is not None:
+        # the server warms its own models; nothing to load in the thin client
+        startup.finish()
+        return startup
+
+    def warm_up():
+        warm_up_models(startup)
+        startup.finish()
+
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    return startup
+
+startup = start_warm_up()
+
+if api_client is None:
+    store = get_chat_storage()
+    get_maintenance(store)
+else:
+    store = api_client
+start_metrics_export()
 ui_component = UIComponent(store)
-config = {"configurable": {"thread_id": "1"}}
 st.set_page_config(
     page_title="Egyptian Universities Assistant",
     page_icon="🧑‍🎓",
@@ -23,15 +84,6 @@ st.set_page_config(
 validate_gemini_key = False
 validate_groq_key = False
 
-# --- Initialize once ---
-@st.cache_resource
-def get_vector_db():
-    db = VectorDB()
-    db.create_collection()
-    db.add_to_collection()
-    return db
-vector_db = get_vector_db()
-
 # --- Sidebar ---
 
 # --- Google AI Key ---
@@ -70,30 +122,54 @@ if groq_key_input:
     else:
         st.sidebar.error("❌ Invalid key. Please check and try again.")
 
-if validate_gemini_key and validate_groq_key:
-    corrective_rag = CorrectiveRAG(google_key_input, groq_key_input)
-    compiled_graph = corrective_rag.build_graph()
+@st.cache_resource
+def get_compiled_graph(google_key, groq_key):
+    from rag.corrective_rag import CorrectiveRAG
+
+    # built once per key pair: its checkpointer holds the memory of every chat thread
+    corrective_rag = CorrectiveRAG(google_key, groq_key)
+    return corrective_rag.build_graph()
+
+ready = startup.ready.is_set()
+if validate_gemini_key and validate_groq_key and api_client is None and ready:
+    compiled_graph = get_compiled_graph(google_key_input, groq_key_input)
 
 
 if st.sidebar.button("➕ New Chat",type="primary",width="stretch"):
     ui_component.start_new_session()
     
 
-# Display previous sessions
-sessions = store.list_sessions()
+# Search the chat history (FTS5)
+search_query = st.sidebar.text_input("🔎 Search chats", key="chat_search_query")
+
 st.sidebar.markdown("### 💬 Previous Chats")
 
-if sessions:
-    for session in sessions:
-        ui_component.display_previous_sessions(session, store)
+if search_query:
+    search_results = ui_component.search_sessions(search_query)
+    if search_results:
+        for hit in search_results:
+            ui_component.display_search_result(hit)
+    else:
+        st.sidebar.markdown("#### No matching chats")
 else:
-    st.sidebar.markdown("#### No chat history yet")
+    # Display previous sessions (paginated)
+    sessions, has_more_sessions = ui_component.get_sidebar_sessions()
+    if sessions:
+        for session in sessions:
+            ui_component.display_previous_sessions(session, store)
+        if has_more_sessions:
+            st.sidebar.button("Load more", width="stretch", on_click=ui_component.load_more_sessions)
+    else:
+        st.sidebar.markdown("#### No chat history yet")
 
 # --- Main area ---
 st.markdown("<h1 style='text-align:center;'>🔍 University Information Assistant</h1>", unsafe_allow_html=True)
 st.markdown("<h2 style='text-align:center;'>Learn about public universities in Egypt</h2>", unsafe_allow_html=True)
 
-# Display existing chat
+# Display existing chat (only the loaded window of messages)
+if st.session_state.has_earlier_messages:
+    st.button("Load earlier messages", on_click=ui_component.load_earlier_messages)
+
 for message in st.session_state.messages:
     if message["role"] == "user":
         avatar = "🧑‍🎓"
@@ -102,8 +178,17 @@ for message in st.session_state.messages:
     with st.chat_message(message["role"] , avatar = avatar):
         st.markdown(message["content"])
 
+if not ready:
+    @st.fragment(run_every=2)
+    def wait_for_startup():
+        # polls the warm-up and reruns the page (enabling the chat input) once it is done
+        if startup.ready.is_set():
+            st.rerun()
+        st.info("⏳ Loading the models and the vector index...")
+    wait_for_startup()
+
 # Handle new user message
-if validate_gemini_key and validate_groq_key:
+if validate_gemini_key and validate_groq_key and ready:
     if prompt := st.chat_input("Enter your question here"):
         session_id = st.session_state.current_session
 
@@ -111,29 +196,51 @@ if validate_gemini_key and validate_groq_key:
         with st.chat_message("user", avatar="🧑‍🎓"):
             st.markdown(prompt)
 
-        # If this is the first message in the session,
-        # use its content to automatically set the session name
-        if len(st.session_state.messages) == 0:
-            store.update_session_name(session_id, prompt)
+        if api_client is not None:
+            # thin client: the server answers, names the session and stores both messages
+            with st.spinner("🔎 Searching the knowledge base..."):
+                try:
+                    result = api_client.ask(session_id, prompt, google_key_input, groq_key_input,
+                                            ui_component.recent_turns())
+                except Exception as e:
+                    print("API error:", e)
+                    result = {"response": "I can’t understand the question.", "metadata": {}}
+            response = result["response"]
+            agent_metadata = result.get("metadata") or {}
+            ui_component.append_message("user", prompt, result.get("user_message_id"))
+            message_id = result.get("message_id")
+        else:
+            # one conversation-memory thread per chat session
+            config = {"configurable": {"thread_id": session_id}}
+            graph_input = {"query": prompt}
+            if not compiled_graph.get_state(config).values:
+                # session reopened from the history: seed the memory with its loaded turns
+                graph_input["recent_turns"] = ui_component.recent_turns()
 
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        store.add_user_message(session_id, prompt)
+            # If this is the first message in the session,
+            # use its content to automatically set the session name
+            if len(st.session_state.messages) == 0:
+                store.update_session_name(session_id, prompt)
 
-        # RAG response
-        with st.spinner("🔎 Searching the knowledge base..."):
-            # result = compiled_graph.invoke({"query": prompt}, config=config)
-            # response = result["agent_response"]
-            # agent_metadata = result["agent_metadata"]
+            message_id = store.add_user_message(session_id, prompt)
+            ui_component.append_message("user", prompt, message_id)
 
-            try:
-                result = compiled_graph.invoke({"query": prompt}, config=config)
-                response = result.get("agent_response", "I can’t understand the question.")
-                agent_metadata = result.get("agent_metadata", {})
-            except Exception as e:
-                # Log the error (optional)
-                print("Invoke error:", e)
-                response = "I can’t understand the question."
-                agent_metadata = {}
+            # RAG response
+            with st.spinner("🔎 Searching the knowledge base..."):
+                # result = compiled_graph.invoke({"query": prompt}, config=config)
+                # response = result["agent_response"]
+                # agent_metadata = result["agent_metadata"]
+
+                try:
+                    result = compiled_graph.invoke(graph_input, config=config)
+                    response = result.get("agent_response", "I can’t understand the question.")
+                    agent_metadata = result.get("agent_metadata", {})
+                except Exception as e:
+                    # Log the error (optional)
+                    print("Invoke error:", e)
+                    response = "I can’t understand the question."
+                    agent_metadata = {}
+            message_id = store.add_ai_message(session_id, response,agent_metadata)
 
         with st.chat_message("assistant", avatar="🎓"):
             st.markdown(response)
@@ -148,7 +255,6 @@ if validate_gemini_key and validate_groq_key:
             except Exception as e:
                 pass
 
-        st.session_state.messages.append({"role": "assistant", "content": response})
-        store.add_ai_message(session_id, response,agent_metadata)
+        ui_component.append_message("assistant", response, message_id)
 else:
     st.chat_input("Enter your question here", disabled=True)
\ No newline at end of file
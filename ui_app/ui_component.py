@@ -5,31 +5,38 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from groq import Groq
+from concurrent.futures import Future
 from google import genai
 import streamlit as st
-from rag.corrective_rag import CorrectiveRAG
-from core.sqlite_chat_storage import SQLiteChatStorage
+from rag.conversation_memory import truncate_words
 from google.api_core.exceptions import PermissionDenied, InvalidArgument, Unauthenticated
 
 
 class UIComponent:
-    def __init__(self, store):
+    def __init__(self, store, sessions_page_size: int = 20, messages_window: int = 20):
         self.store = store
+        self.sessions_page_size = sessions_page_size
+        self.messages_window = messages_window
+        # optional per-user filtering of the chat history, e.g. ?user=<id>
+        self.user_id = st.query_params.get("user")
         self._init_session_state()
 
     def _init_session_state(self):
         """
-        Initializes Streamlit session state: deletes empty sessions, 
-        creates a new chat session, and sets up messages if not already set.
+        Initializes Streamlit session state: creates a new chat session and
+        sets up messages if not already set. Empty sessions are cleaned up by
+        `SQLiteMaintenance`, not on this path.
         """
         if "current_session" not in st.session_state:
-            # delete empty sessions when reload 
-            self.store.delete_empty_sessions()
             # create a fresh chat session when app starts
             new_id = self.store.time_random_id()
-            self.store.create_session(new_id, "new chat")
+            self.store.create_session(new_id, "new chat", self.user_id)
             st.session_state.current_session = new_id
             st.session_state.messages = []
+            st.session_state.has_earlier_messages = False
+        if "sessions_cursor" not in st.session_state:
+            # (created_at, id) of the oldest session loaded in the sidebar
+            st.session_state.sessions_cursor = None
 
 
     def validate_gemini_key(self, key: str) -> bool:
@@ -91,9 +98,144 @@ class UIComponent:
         if len(st.session_state.messages) == 0:
             self.store.delete_session(st.session_state.current_session)
         new_id = self.store.time_random_id()
-        self.store.create_session(new_id, "new chat")
+        self.store.create_session(new_id, "new chat", self.user_id)
         st.session_state.current_session = new_id
         st.session_state.messages = []
+        st.session_state.has_earlier_messages = False
+
+    def load_session_window(self, session_id: str):
+        """
+        Loads only the latest `messages_window` messages of a session.
+        Metadata JSON is left undecoded until it is displayed.
+
+        Parameters:
+        - session_id (str): Session to open.
+        """
+        # fetch one extra row to know whether earlier messages exist
+        messages = self.store.get_last_n_messages(session_id, self.messages_window + 1, decode_metadata=False)
+        st.session_state.has_earlier_messages = len(messages) > self.messages_window
+        st.session_state.messages = messages[-self.messages_window:]
+
+    def load_earlier_messages(self):
+        """Prepends the previous page of messages of the current session."""
+        messages = st.session_state.messages
+        before_id = messages[0].get("id") if messages else None
+        if isinstance(before_id, Future):
+            # id of a message still in the write-behind queue
+            before_id = before_id.result()
+        if before_id is None:
+            st.session_state.has_earlier_messages = False
+            return
+        earlier = self.store.get_last_n_messages(
+            st.session_state.current_session,
+            self.messages_window + 1,
+            before_id=before_id,
+            decode_metadata=False,
+        )
+        st.session_state.has_earlier_messages = len(earlier) > self.messages_window
+        st.session_state.messages = earlier[-self.messages_window:] + messages
+
+    def append_message(self, role: str, content: str, message_id=None):
+        """
+        Appends a new message to the displayed conversation, dropping the oldest
+        ones beyond the window so render cost stays bounded.
+
+        Parameters:
+        - role (str): 'user' or 'assistant'.
+        - content (str): Message text.
+        - message_id (int | Future, optional): Database id (or its pending write), used as
+          the "load earlier" cursor.
+        """
+        messages = st.session_state.messages
+        messages.append({"id": message_id, "role": role, "content": content})
+        if len(messages) > self.messages_window:
+            del messages[:len(messages) - self.messages_window]
+            st.session_state.has_earlier_messages = True
+
+    def recent_turns(self, max_turns: int = 3):
+        """
+        Returns the last question/answer pairs of the displayed conversation, used
+        to seed the conversation memory of a session reopened from the history.
+
+        Parameters:
+        - max_turns (int): Maximum number of turns returned.
+
+        Returns:
+        - list[dict]: Turns with "question" and "answer" keys, oldest first.
+        """
+        turns, question = [], None
+        for message in st.session_state.messages:
+            if message["role"] == "user":
+                question = message["content"]
+            elif question is not None:
+                turns.append({"question": question, "answer": truncate_words(message["content"], 150)})
+                question = None
+        return turns[-max_turns:]
+
+    def get_sidebar_sessions(self):
+        """
+        Returns the sessions shown in the sidebar: the first page on the first run,
+        then every session from the newest down to the oldest loaded one, so reruns
+        only read what is displayed regardless of the total history size.
+
+        Returns:
+        - tuple[list[dict], bool]: The sessions and whether older sessions exist.
+        """
+        cursor = st.session_state.sessions_cursor
+        if cursor is None:
+            sessions = self.store.list_sessions(limit=self.sessions_page_size, user_id=self.user_id)
+        else:
+            sessions = self.store.list_sessions(since=cursor, user_id=self.user_id)
+
+        if not sessions:
+            return sessions, False
+        st.session_state.sessions_cursor = (sessions[-1]["created_at"], sessions[-1]["id"])
+        has_more = bool(self.store.list_sessions(
+            limit=1, before=st.session_state.sessions_cursor, user_id=self.user_id
+        ))
+        return sessions, has_more
+
+    def load_more_sessions(self):
+        """Moves the sidebar cursor one page further back in the chat history."""
+        older = self.store.list_sessions(
+            limit=self.sessions_page_size,
+            before=st.session_state.sessions_cursor,
+            user_id=self.user_id,
+        )
+        if older:
+            st.session_state.sessions_cursor = (older[-1]["created_at"], older[-1]["id"])
+
+    def search_sessions(self, query: str, limit: int = 20):
+        """
+        Full-text search over the chat history, keeping the best matching
+        message of each session.
+
+        Parameters:
+        - query (str): Text typed in the sidebar search box.
+        - limit (int): Maximum number of matching messages to rank.
+
+        Returns:
+        - list[dict]: Search results (see `SQLiteChatStorage.search_messages`), one per session.
+        """
+        results, seen = [], set()
+        for hit in self.store.search_messages(query, limit=limit, user_id=self.user_id):
+            if hit["session_id"] not in seen:
+                seen.add(hit["session_id"])
+                results.append(hit)
+        return results
+
+    def display_search_result(self, hit):
+        """
+        Displays a sidebar button for a search result; opens its session if clicked.
+
+        Parameters:
+        - hit (dict): Search result with "session_id", "session_name", "message_id" and "snippet".
+        """
+        label = f"{hit['session_name'] or hit['session_id']}: {hit['snippet']}"
+        if st.sidebar.button(label, key=f"search_{hit['message_id']}", width="stretch"):
+            st.session_state.current_session = hit["session_id"]
+            self.load_session_window(hit["session_id"])
+            st.rerun()
 
     def display_previous_sessions(self, session, store):
         """
@@ -102,7 +244,7 @@ class UIComponent:
         
         Parameters:
         - session (dict): Session info with "id" and optional "name".
-        - store (object): Provides `get_messages(session_id)` to load session messages.
+        - store (object): Chat storage the session belongs to.
         """
         active_button = "secondary"
         if st.session_state.current_session == session["id"]:
@@ -110,7 +252,7 @@ class UIComponent:
         label = session["name"] or session["id"]
         if st.sidebar.button(label, key=session["id"],width="stretch",type=active_button):
             st.session_state.current_session = session["id"]
-            st.session_state.messages = store.get_messages(session["id"])
+            self.load_session_window(session["id"])
             st.rerun() 
 
     def get_pdf_path(self, university_name: str):